@@ -0,0 +1,443 @@
+# coding=utf-8
+
+"""
+Partidas automáticas para medir la tasa de victorias y la velocidad del motor.
+
+Se juegan partidas con semillas reproducibles en los niveles predefinidos (NIVELES) con una estrategia intercambiable,
+repartidas entre los procesos de un conjunto. Cada estrategia es una clase de ESTRATEGIAS con dos métodos: deducir,
+que devuelve las jugadas que se pueden hacer sin riesgo, y adivinar, que devuelve una jugada cuando no se puede deducir
+ninguna. En cada turno se piden primero las jugadas deducidas y, sólo si no hay ninguna, se adivina; todas las jugadas
+del turno se aplican en un único lote.
+
+De cada partida se mide el tiempo de cada fase (crear la partida, deducir, adivinar y aplicar las jugadas), y los
+resultados se agregan por nivel: tasa de victorias, jugadas y adivinanzas por partida, tiempos y partidas por segundo.
+El resumen se puede guardar en JSON y en CSV para comparar ejecuciones:
+
+    python autojuego.py --partidas 1000 --estrategia probabilidad --json resumen.json --csv resumen.csv
+
+Autor: Richard Albán Fernández
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import random
+import time
+from partida import nueva_partida, NIVELES, MARCAR, ABRIR
+from probabilidad import calcular_probabilidades
+from resolutor import Resolutor
+from tablero import ABIERTA, MARCADA
+
+# Fases de una partida de las que se mide el tiempo
+FASES = ("crear", "deducir", "adivinar", "aplicar")
+
+# Número de partidas que se envían juntas a cada proceso
+TAMANO_LOTE = 8
+
+# Número máximo de turnos de una partida, para no quedarse en un bucle si una estrategia no avanza
+MAX_TURNOS = 100000
+
+
+class EstrategiaAzar():
+    """
+    Estrategia que no deduce nada: abre la celda central y después celdas cerradas al azar.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, partida, generador):
+        """
+        Se inicializa la estrategia para una partida.
+
+        :param partida: partida que se juega
+        :param generador: generador de números aleatorios de la estrategia
+        """
+        self.__partida = partida
+        self.__generador = generador
+
+    def get_partida(self):
+        """
+        Devuelve la partida que se juega.
+
+        :return: partida de la estrategia
+        """
+        return self.__partida
+
+    def get_generador(self):
+        """
+        Devuelve el generador de números aleatorios de la estrategia.
+
+        :return: generador de la estrategia
+        """
+        return self.__generador
+
+    def actualizar(self, resultado):
+        """
+        Indica a la estrategia el resultado del último lote de jugadas.
+
+        :param resultado: Resultado del lote
+        """
+        pass
+
+    def deducir(self):
+        """
+        Devuelve las jugadas que se pueden hacer sin riesgo.
+
+        :return: lista de jugadas (fila, columna, accion)
+        """
+        return []
+
+    def adivinar(self):
+        """
+        Devuelve una jugada cuando no se puede deducir ninguna. La primera apertura es siempre la celda central, que
+        nunca tiene mina.
+
+        :return: tupla (fila, columna, accion), o None si no queda ninguna celda por abrir
+        """
+        tablero = self.__partida.get_tablero()
+
+        if self.__partida.is_primera_apertura():
+            return tablero.get_filas() // 2, tablero.get_columnas() // 2, ABRIR
+
+        estados = tablero.get_estados()
+        cerradas = [k for k in range(len(estados)) if not estados[k] & (ABIERTA | MARCADA)]
+
+        if not cerradas:
+            return None
+
+        return divmod(self.__generador.choice(cerradas), tablero.get_columnas()) + (ABRIR,)
+
+
+class EstrategiaResolutor(EstrategiaAzar):
+    """
+    Estrategia que hace todas las jugadas que deduce el resolutor y, cuando no hay ninguna, abre una celda al azar.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, partida, generador):
+        """
+        Se inicializa la estrategia para una partida.
+
+        :param partida: partida que se juega
+        :param generador: generador de números aleatorios de la estrategia
+        """
+        EstrategiaAzar.__init__(self, partida, generador)
+        self.__resolutor = Resolutor(partida)
+
+    def actualizar(self, resultado):
+        """
+        Indica al resolutor las celdas que han cambiado con el último lote de jugadas.
+
+        :param resultado: Resultado del lote
+        """
+        self.__resolutor.actualizar(resultado.get_cambiadas())
+
+    def deducir(self):
+        """
+        Devuelve la apertura de todas las celdas seguras y el marcado de todas las celdas con mina sin marcar.
+
+        :return: lista de jugadas (fila, columna, accion)
+        """
+        tablero = self.get_partida().get_tablero()
+        estados = tablero.get_estados()
+        columnas = tablero.get_columnas()
+        seguras, minas = self.__resolutor.deducir()
+
+        jugadas = [divmod(k, columnas) + (ABRIR,) for k in seguras if not estados[k] & MARCADA]
+        jugadas.extend(divmod(k, columnas) + (MARCAR,) for k in minas if not estados[k] & MARCADA)
+
+        return jugadas
+
+
+class EstrategiaProbabilidad(EstrategiaResolutor):
+    """
+    Estrategia que hace todas las jugadas que deduce el resolutor y, cuando no hay ninguna, abre la celda con menor
+    probabilidad de tener mina.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def adivinar(self):
+        """
+        Devuelve la apertura de la celda con menor probabilidad de tener mina.
+
+        :return: tupla (fila, columna, accion), o None si no queda ninguna celda por abrir
+        """
+        partida = self.get_partida()
+
+        if partida.is_primera_apertura():
+            return EstrategiaAzar.adivinar(self)
+
+        mas_segura = calcular_probabilidades(partida, generador=self.get_generador()).mas_segura()
+
+        if mas_segura is None:
+            return None
+
+        return divmod(mas_segura[0], partida.get_tablero().get_columnas()) + (ABRIR,)
+
+
+# Estrategias disponibles, por su nombre
+ESTRATEGIAS = {
+    "azar": EstrategiaAzar,
+    "resolutor": EstrategiaResolutor,
+    "probabilidad": EstrategiaProbabilidad,
+}
+
+
+def _pendientes(partida, jugadas):
+    """
+    Devuelve las jugadas de un turno a medida que se aplican, saltando las aperturas de celdas que ya se han abierto
+    con una jugada anterior del mismo lote.
+
+    :param partida: partida en la que se aplican las jugadas
+    :param jugadas: lista de jugadas (fila, columna, accion)
+    :return: generador de jugadas
+    """
+    tablero = partida.get_tablero()
+    estados = tablero.get_estados()
+
+    for fila, columna, accion in jugadas:
+        if accion != ABRIR or not estados[tablero.indice(fila, columna)] & ABIERTA:
+            yield fila, columna, accion
+
+
+def jugar_partida(tarea):
+    """
+    Juega una partida completa con una estrategia. Se ejecuta en los procesos del conjunto, por lo que recibe y
+    devuelve sólo tipos básicos.
+
+    :param tarea: tupla (filas, columnas, minas, semilla, estrategia) con el nombre de la estrategia
+    :return: diccionario con el resultado de la partida: si se ha ganado, las jugadas aplicadas, las adivinanzas, los
+    turnos y los segundos de cada fase
+    """
+    filas, columnas, minas, semilla, estrategia = tarea
+    tiempos = dict((fase, 0.0) for fase in FASES)
+    jugadas_aplicadas = 0
+    adivinanzas = 0
+    turnos = 0
+
+    inicio = time.time()
+    partida = nueva_partida(filas, columnas, minas, semilla)
+    jugador = ESTRATEGIAS[estrategia](partida, random.Random(semilla))
+    tiempos["crear"] = time.time() - inicio
+
+    while not partida.is_fin_de_partida() and turnos < MAX_TURNOS:
+        turnos += 1
+
+        inicio = time.time()
+        jugadas = jugador.deducir()
+        tiempos["deducir"] += time.time() - inicio
+
+        if not jugadas:
+            inicio = time.time()
+            jugada = jugador.adivinar()
+            tiempos["adivinar"] += time.time() - inicio
+
+            if jugada is None:
+                break
+
+            jugadas = [jugada]
+            adivinanzas += 1
+
+        inicio = time.time()
+        resultado = partida.aplicar_lote(_pendientes(partida, jugadas))
+        tiempos["aplicar"] += time.time() - inicio
+
+        jugadas_aplicadas += resultado.get_aplicadas()
+        jugador.actualizar(resultado)
+
+        # Una estrategia que sólo propone jugadas no válidas no puede avanzar
+        if not resultado.get_aplicadas():
+            break
+
+    return {
+        "filas": filas,
+        "columnas": columnas,
+        "minas": minas,
+        "semilla": semilla,
+        "terminada": partida.is_fin_de_partida(),
+        "ganada": partida.is_partida_ganada(),
+        "jugadas": jugadas_aplicadas,
+        "adivinanzas": adivinanzas,
+        "turnos": turnos,
+        "tiempos": tiempos,
+    }
+
+
+def generar_tareas(niveles, partidas, estrategia, semilla=0):
+    """
+    Devuelve las tareas de las partidas a jugar. Las semillas de los tableros se obtienen de la semilla indicada, por
+    lo que dos ejecuciones con la misma semilla juegan los mismos tableros.
+
+    :param niveles: secuencia de tuplas (filas, columnas, minas)
+    :param partidas: número de partidas por nivel
+    :param estrategia: nombre de la estrategia
+    :param semilla: semilla de la que se obtienen las de los tableros
+    :return: lista de tareas para jugar_partida
+    """
+    generador = random.Random(semilla)
+    tareas = []
+
+    for filas, columnas, minas in niveles:
+        for _ in range(partidas):
+            tareas.append((filas, columnas, minas, generador.getrandbits(63), estrategia))
+
+    return tareas
+
+
+def jugar_partidas(tareas, procesos=None):
+    """
+    Juega varias partidas repartiéndolas entre los procesos de un conjunto.
+
+    :param tareas: lista de tareas para jugar_partida
+    :param procesos: número de procesos; si no se indica se usa uno por procesador, y con 1 no se crean procesos
+    :return: lista de resultados de las partidas, en el orden de las tareas
+    """
+    if procesos == 1:
+        return map(jugar_partida, tareas)
+
+    conjunto = multiprocessing.Pool(procesos)
+
+    try:
+        return conjunto.map(jugar_partida, tareas, TAMANO_LOTE)
+    finally:
+        conjunto.close()
+        conjunto.join()
+
+
+def resumir(resultados, duracion):
+    """
+    Agrega los resultados de las partidas por nivel.
+
+    :param resultados: lista de resultados de jugar_partida
+    :param duracion: segundos que han tardado en jugarse todas las partidas
+    :return: lista de diccionarios, uno por nivel, con el número de partidas, las ganadas, la tasa de victorias, las
+    jugadas, adivinanzas y turnos por partida, los segundos medios de cada fase y las partidas por segundo
+    """
+    por_nivel = {}
+
+    for resultado in resultados:
+        por_nivel.setdefault((resultado["filas"], resultado["columnas"], resultado["minas"]), []).append(resultado)
+
+    total_tiempos = sum(sum(resultado["tiempos"].values()) for resultado in resultados)
+    resumen = []
+
+    for (filas, columnas, minas), partidas in sorted(por_nivel.items()):
+        cantidad = len(partidas)
+        ganadas = sum(1 for partida in partidas if partida["ganada"])
+        tiempo_nivel = sum(sum(partida["tiempos"].values()) for partida in partidas)
+
+        fila_resumen = {
+            "filas": filas,
+            "columnas": columnas,
+            "minas": minas,
+            "partidas": cantidad,
+            "ganadas": ganadas,
+            "tasa_victorias": float(ganadas) / cantidad,
+            "jugadas_por_partida": float(sum(partida["jugadas"] for partida in partidas)) / cantidad,
+            "adivinanzas_por_partida": float(sum(partida["adivinanzas"] for partida in partidas)) / cantidad,
+            "turnos_por_partida": float(sum(partida["turnos"] for partida in partidas)) / cantidad,
+            # La duración total se reparte entre los niveles según el tiempo de proceso de sus partidas
+            "partidas_por_segundo": cantidad / (duracion * tiempo_nivel / total_tiempos) if tiempo_nivel else 0.0,
+        }
+
+        for fase in FASES:
+            fila_resumen["segundos_" + fase] = sum(partida["tiempos"][fase] for partida in partidas) / cantidad
+
+        resumen.append(fila_resumen)
+
+    return resumen
+
+
+# Columnas del fichero CSV del resumen
+COLUMNAS_CSV = ("filas", "columnas", "minas", "partidas", "ganadas", "tasa_victorias", "jugadas_por_partida",
+                "adivinanzas_por_partida", "turnos_por_partida", "partidas_por_segundo") + \
+    tuple("segundos_" + fase for fase in FASES)
+
+
+def guardar_json(nombre_fichero, configuracion, resumen, resultados=None):
+    """
+    Guarda el resumen de una ejecución en un fichero JSON.
+
+    :param nombre_fichero: nombre del fichero
+    :param configuracion: diccionario con los parámetros de la ejecución
+    :param resumen: resumen por nivel (resumir)
+    :param resultados: resultados de cada partida, que sólo se guardan si se indican
+    """
+    datos = {"configuracion": configuracion, "niveles": resumen}
+
+    if resultados is not None:
+        datos["partidas"] = resultados
+
+    with open(nombre_fichero, "wb") as fichero:
+        json.dump(datos, fichero, indent=1, sort_keys=True)
+
+
+def guardar_csv(nombre_fichero, resumen):
+    """
+    Guarda el resumen de una ejecución en un fichero CSV, con una fila por nivel.
+
+    :param nombre_fichero: nombre del fichero
+    :param resumen: resumen por nivel (resumir)
+    """
+    with open(nombre_fichero, "wb") as fichero:
+        escritor = csv.DictWriter(fichero, COLUMNAS_CSV)
+        escritor.writerow(dict(zip(COLUMNAS_CSV, COLUMNAS_CSV)))
+        escritor.writerows(resumen)
+
+
+def imprimir_resumen(resumen):
+    """
+    Imprime el resumen de una ejecución.
+
+    :param resumen: resumen por nivel (resumir)
+    """
+    print "%-10s %8s %9s %9s %11s %10s" % ("NIVEL", "PARTIDAS", "VICTORIAS", "JUGADAS", "ADIVINANZAS", "PARTIDAS/S")
+
+    for nivel in resumen:
+        print "%-10s %8d %8.1f%% %9.1f %11.2f %10.1f" % (
+            "%dx%d/%d" % (nivel["filas"], nivel["columnas"], nivel["minas"]), nivel["partidas"],
+            nivel["tasa_victorias"] * 100, nivel["jugadas_por_partida"], nivel["adivinanzas_por_partida"],
+            nivel["partidas_por_segundo"])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Juega partidas automáticas en los niveles predefinidos.")
+    parser.add_argument("--partidas", type=int, default=100, help="número de partidas por nivel")
+    parser.add_argument("--estrategia", choices=sorted(ESTRATEGIAS), default="probabilidad",
+                        help="estrategia con la que se juega")
+    parser.add_argument("--niveles", type=int, nargs="+", choices=range(1, len(NIVELES) + 1),
+                        default=range(1, len(NIVELES) + 1), help="niveles que se juegan (1 a %d)" % len(NIVELES))
+    parser.add_argument("--procesos", type=int, help="número de procesos (por defecto, uno por procesador)")
+    parser.add_argument("--semilla", type=int, default=0, help="semilla de la que se obtienen los tableros")
+    parser.add_argument("--json", help="fichero JSON en el que se guarda el resumen")
+    parser.add_argument("--detalle", action="store_true", help="incluye en el JSON el resultado de cada partida")
+    parser.add_argument("--csv", help="fichero CSV en el que se guarda el resumen")
+    argumentos = parser.parse_args()
+
+    if argumentos.partidas < 1:
+        parser.error("se debe jugar al menos una partida por nivel")
+
+    niveles = [NIVELES[nivel - 1] for nivel in argumentos.niveles]
+    tareas = generar_tareas(niveles, argumentos.partidas, argumentos.estrategia, argumentos.semilla)
+
+    inicio = time.time()
+    resultados = jugar_partidas(tareas, argumentos.procesos)
+    resumen = resumir(resultados, time.time() - inicio)
+
+    imprimir_resumen(resumen)
+
+    if argumentos.json:
+        configuracion = {
+            "partidas": argumentos.partidas,
+            "estrategia": argumentos.estrategia,
+            "niveles": niveles,
+            "semilla": argumentos.semilla,
+            "procesos": argumentos.procesos or multiprocessing.cpu_count(),
+        }
+        guardar_json(argumentos.json, configuracion, resumen, resultados if argumentos.detalle else None)
+
+    if argumentos.csv:
+        guardar_csv(argumentos.csv, resumen)
@@ -48,9 +48,9 @@ a estado abierto, y se pueden dar los siguientes estados adicionales:
 FORMATO DE LOS FICHEROS DE DEFINICIÓN DE TABLEROS:
 
 Son ficheros de texto que constan de una primera línea donde se indica el número de filas y columnas
-del tablero (2 enteros en el rango 1..30 separados por un espacio) a la que siguen una serie de líneas
+del tablero (2 enteros positivos separados por un espacio) a la que siguen una serie de líneas
 (una por cada fila) de igual longitud (un carácter por columna) donde la presencia de una mina se
-indica con el carácter asterisco (*).
+indica con el carácter asterisco (*) y su ausencia con un punto (.).
 
 Ejemplo:
 
@@ -67,7 +67,11 @@ PETICIÓN DE LA(S) JUGADA(S):
 Existen dos tipos de acciones que se pueden realizar: marcar una celda (cuando se cree que contiene
 una mina) y abrir una celda (cuando se cree que no la contiene). La manera de indicar cada acción
 es nombrar la celda seguida de un carácter de exclamación (!) si se desea marcar y de un carácter
-asterisco (*) si se desea abrir. El usuario puede indicar más de una acción en la misma jugada, se
+asterisco (*) si se desea abrir. La celda se nombra con la letra de su fila y la de su columna (por ejemplo
+Ab*) o, en cualquier tablero, con el número de su fila y el de su columna separados por una coma (por ejemplo
+120,7*); en los tableros que no caben en los nombres de una letra sólo se puede usar la forma numérica.
+Se admiten espacios entre las acciones y alrededor de la coma. Si la cadena contiene algo que no es una
+acción, se indica la posición en la que empieza. El usuario puede indicar más de una acción en la misma jugada, se
 entiende que en ese caso se ejecutan en secuencia mientras sean acciones válidas (y no se produzca
 una explosión, claro). Si se encuentra una acción no válida se muestra el mensaje de error adecuado
 y el resto de acciones de la cadena se desecha.
@@ -80,6 +84,27 @@ marcadas (si no es menor o igual a cero se muestra un error).
 Se mostrará el estado del tablero, el número de celdas marcadas, el número de minas por descubrir y
 el tiempo transcurrido y se pedirá al usuario que introduzca su jugada(s).
 
+En los tableros de más de 30 filas o columnas sólo se muestra una vista del tablero, que sigue a la última
+celda jugada. La vista se puede mover con el comando "ver" seguido de una celda (por ejemplo ver 500,500).
+
+Con la opción --sin-adivinar, los tableros aleatorios se pueden resolver siempre sin adivinar: la partida empieza
+con la celda central ya abierta y a partir de ella todas las jugadas se pueden deducir (ver el módulo generador).
+
+Con el comando "pista" se muestra una jugada que se puede deducir sin riesgo a partir de lo que se ve en
+el tablero, si la hay (ver el módulo resolutor). Si no la hay, se indica la celda con menor probabilidad de tener
+mina (ver el módulo probabilidad).
+
+Con los comandos "deshacer" y "rehacer" se deshace la última jugada y se vuelve a realizar la última jugada
+deshecha (ver el módulo partida).
+
+La partida se puede guardar en cualquier momento con el comando "guardar" seguido del nombre de un fichero.
+El fichero se guarda en un formato binario (ver el módulo guardado) que también se puede abrir con la
+opción de leer de fichero, y la partida continúa con el tiempo que ya se había jugado.
+
+Con la opción --grabar seguida del nombre de un fichero se graban las jugadas de la partida, que después se pueden
+reproducir con el módulo repeticion. En el menú cada partida se graba en un fichero numerado (por ejemplo
+partida-1.bmr, partida-2.bmr...).
+
 
 EVALUACIÓN DE UNA ACCIÓN VÁLIDA:
 
@@ -119,39 +144,55 @@ contenga minas.
 Autor: Richard Albán Fernández
 """
 
-import random
-import time
-from celda import Celda
+import argparse
+import cProfile
+import os
+from partida import Partida, nueva_partida, MENSAJES, ENTRADA_ERRONEA, NIVELES
+from tablero import Tablero, crear_tablero
+from pantalla import NOMBRE_FILAS, NOMBRE_COLUMNAS, PantallaDiferencial, get_caracter, centrar_ventana, seguir_celda
+from entrada import ErrorDeJugada, interpretar_celda, nombrar_celda, tokenizar_jugadas
+from ficheros import ErrorDeFormato, cargar_tablero
+from guardado import cargar_partida, guardar_partida, is_fichero_binario
+from resolutor import Resolutor
+from probabilidad import calcular_probabilidades
+from generador import RESERVA, celda_inicial, partida_sin_adivinar
+from repeticion import Grabador
+import instrumentacion
+import pantalla
 
-# Caracteres asociados a las acciones (! marcar, * abrir)
-ACCIONES = "!*"
+# Comando para mover la vista del tablero
+COMANDO_VER = "ver"
 
-# Caracteres para el nombre de las filas y las columnas
-NOMBRE_FILAS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ@#$%&"  # type: str
-NOMBRE_COLUMNAS = "abcdefghijklmnopqrstuvwxyz=+-:/"  # type: str
+# Comando para guardar la partida en un fichero binario
+COMANDO_GUARDAR = "guardar"
 
-# Asociación de caracteres y enteros
-DIC_FILAS = dict(zip(NOMBRE_FILAS, range(len(NOMBRE_FILAS))))
-DIC_COLUMNAS = dict(zip(NOMBRE_COLUMNAS, range(len(NOMBRE_COLUMNAS))))
+# Comandos para deshacer la última jugada y para rehacer la última jugada deshecha
+COMANDO_DESHACER = "deshacer"
+COMANDO_REHACER = "rehacer"
 
-# Caracteres para dibujar cuadros
-COE = u'\u2500'  # ─
-CNS = u'\u2502'  # │
-CES = u'\u250C'  # ┌
-CSO = u'\u2510'  # ┐
-CNE = u'\u2514'  # └
-CON = u'\u2518'  # ┘
-COES = u'\u252C'  # ┬
-CNES = u'\u251C'  # ├
-CONS = u'\u2524'  # ┤
-CONE = u'\u2534'  # ┴
-CSOM = u'\u2593'  # ▒
+# Comando para pedir una jugada segura
+COMANDO_PISTA = "pista"
 
+# Fichero en el que se conservan las semillas de los tableros sin adivinar entre ejecuciones
+FICHERO_RESERVA = os.path.join(os.path.expanduser("~"), ".buscaminas_semillas.json")
 
-def main():
+
+def main(diferencial=False, sin_adivinar=False, grabar=None):
     """
     Función principal.
+
+    :param diferencial: determina si en cada turno sólo se redibujan las celdas que han cambiado (True), usando
+    secuencias de control ANSI, o el tablero completo (False)
+    :param sin_adivinar: determina si los niveles predefinidos se juegan con tableros que se pueden resolver sin
+    adivinar, cuyas semillas se preparan en segundo plano mientras se juega
+    :param grabar: si se indica, cada partida se graba en un fichero con este nombre numerado
     """
+    partidas = 0
+
+    if sin_adivinar:
+        cargar_reserva()
+        RESERVA.rellenar_en_segundo_plano(NIVELES)
+
     while True:
         print "BUSCAMINAS"
         print "----------"
@@ -169,15 +210,21 @@ def main():
             except ValueError:
                 print "Por favor, introduzca una opción válida."
 
-        if modo == 1:
-            jugar(9, 9, 10)
-        elif modo == 2:
-            jugar(16, 16, 40)
-        elif modo == 3:
-            jugar(16, 30, 99)
+        if 1 <= modo <= len(NIVELES):
+            filas, columnas, minas = NIVELES[modo - 1]
+            partidas += 1
+            jugar(filas, columnas, minas, diferencial=diferencial, sin_adivinar=sin_adivinar,
+                  grabar=numerar_grabacion(grabar, partidas))
+
+            if sin_adivinar:
+                RESERVA.rellenar_en_segundo_plano([NIVELES[modo - 1]])
         elif modo == 4:
-            jugar(None, None, None, True)
+            partidas += 1
+            jugar(None, None, None, True, diferencial, grabar=numerar_grabacion(grabar, partidas))
         elif modo == 5:
+            if sin_adivinar:
+                guardar_reserva()
+
             print "¡Hasta la próxima!"
             break
         else:
@@ -186,7 +233,7 @@ def main():
         print '\n'
 
 
-def jugar(filas, columnas, minas, leer_fichero = False):
+def jugar(filas, columnas, minas, leer_fichero = False, diferencial = False, sin_adivinar = False, grabar = None):
     """
     Realiza todas las operaciones que afectan a la partida.
 
@@ -194,783 +241,334 @@ def jugar(filas, columnas, minas, leer_fichero = False):
     :param columnas: columnas que tendrá el tablero
     :param minas: minas que tendrá el tablero
     :param leer_fichero: determina si el tablero se creará aleatoriamente (False) o se leerá de fichero (True)
+    :param diferencial: determina si en cada turno sólo se redibujan las celdas que han cambiado
+    :param sin_adivinar: determina si el tablero aleatorio se podrá resolver sin adivinar; en ese caso la partida
+    empieza con la celda central ya abierta
+    :param grabar: nombre del fichero en el que se graban las jugadas de la partida, si se indica
     """
-    fin_de_partida = False
-    partida_ganada = False
-    tiempo_inicio = 0
-    primera_apertura = True
+    pantalla_diferencial = PantallaDiferencial() if diferencial else None
+    resolutor = None
+    tiempo = 0
+    partida = None
+    inicio = (0, 0)
 
     if leer_fichero:
-        tablero, minas = leer_tablero()
-    else:
-        tablero = crear_tablero(filas, columnas, minas)
+        partida, tiempo = leer_partida()
+    elif sin_adivinar:
+        partida = partida_sin_adivinar(filas, columnas, minas)
 
-    calcular_minas_por_descubrir(tablero)
+        if partida is None:
+            print "NO SE HA ENCONTRADO NINGUN TABLERO QUE SE PUEDA RESOLVER SIN ADIVINAR\n"
+        else:
+            inicio = celda_inicial(filas, columnas)
 
-    if tablero:
-        imprimir_tablero(tablero, minas, tiempo_inicio)
-        tiempo_inicio = time.time()
+    if partida is None and not leer_fichero:
+        partida = nueva_partida(filas, columnas, minas)
 
-        while not fin_de_partida:
-            jugada = raw_input("Indique celda y acción (! marcar, * abrir): ")
-            print
+    if partida:
+        # En los tableros grandes sólo se muestra una vista, que empieza en la esquina superior izquierda o, si ya
+        # se ha abierto la celda inicial, alrededor de ella
+        ventana = centrar_ventana(partida.get_tablero(), *inicio)
 
-            # Se dividen las jugadas en una lista, en la que cada elemento es una jugada distinta
-            jugada = dividir_en_subjugadas(jugada)
+        if pantalla_diferencial:
+            pantalla_diferencial.dibujar(partida, tiempo, ventana=ventana)
+        else:
+            imprimir_tablero(partida, tiempo, ventana=ventana)
 
-            for i in range(len(jugada)):
-                jugada_valida = validar_jugada(jugada[i], tablero, minas)
+        # Una partida guardada continúa con el tiempo que ya se había jugado
+        partida.iniciar_tiempo(tiempo)
+        grabador = None
 
-                if not jugada_valida:
-                    break
+        if grabar:
+            try:
+                grabador = Grabador(grabar, partida)
+            except IOError:
+                print 'NO SE HA PODIDO GRABAR LA PARTIDA EN "' + grabar + '"\n'
 
-                hacer_jugada(jugada[i], tablero, primera_apertura)
-                calcular_minas_por_descubrir(tablero)
+        while not partida.is_fin_de_partida():
+            jugada = raw_input("Indique celda y acción (! marcar, * abrir): ")
+            print
 
-                if ACCIONES[1] in jugada[i]:
-                    primera_apertura = False
+            cambiadas = []
+            error = None
+            mensaje = None
 
-                fin_de_partida, partida_ganada = detectar_fin_de_partida(tablero, minas)
+            if jugada.strip().startswith(COMANDO_VER):
+                celda = interpretar_celda(jugada.strip()[len(COMANDO_VER):])
 
-                if fin_de_partida:
-                    abrir_celdas(tablero)
-                    break
+                if celda is None:
+                    error = ENTRADA_ERRONEA
+                else:
+                    ventana = centrar_ventana(partida.get_tablero(), *celda)
+            elif jugada.strip() == COMANDO_PISTA:
+                # El resolutor se crea al pedir la primera pista y después se actualiza con cada jugada
+                if resolutor is None:
+                    resolutor = Resolutor(partida)
+
+                pista = resolutor.pista()
+                tablero = partida.get_tablero()
+
+                if pista is None:
+                    mensaje = "NO SE PUEDE DEDUCIR NINGUNA JUGADA SEGURA"
+
+                    # Se indica la celda con menor probabilidad de tener mina
+                    mas_segura = calcular_probabilidades(partida).mas_segura()
+
+                    if mas_segura is not None:
+                        fila, columna = divmod(mas_segura[0], tablero.get_columnas())
+                        mensaje += ". LA CELDA MAS SEGURA ES " + nombrar_celda(fila, columna, tablero.get_filas(),
+                                                                             tablero.get_columnas()) + \
+                            " (PROBABILIDAD DE MINA: %d%%)" % round(mas_segura[1] * 100)
+                        ventana = seguir_celda(tablero, ventana, fila, columna)
+                else:
+                    mensaje = "PISTA: " + nombrar_celda(pista[0], pista[1], tablero.get_filas(),
+                                                        tablero.get_columnas()) + pista[2]
 
-            tiempo_fin = time.time()
-            tiempo = tiempo_fin - tiempo_inicio
+                    if tablero.is_marcada(tablero.indice(pista[0], pista[1])):
+                        mensaje += " (LA CELDA ESTA MARCADA PERO NO TIENE MINA)"
 
-            if fin_de_partida:
-                if partida_ganada:
-                    imprimir_tablero(tablero, minas, tiempo)
-                    print "¡HAS GANADO LA PARTIDA! TIEMPO: "
+                    ventana = seguir_celda(tablero, ventana, pista[0], pista[1])
+            elif jugada.strip() == COMANDO_DESHACER:
+                resultado = partida.deshacer()
 
+                if resultado is None:
+                    mensaje = "NO HAY NINGUNA JUGADA QUE DESHACER"
                 else:
-                    imprimir_tablero(tablero, minas, tiempo)
-                    print "GAME OVER"
+                    cambiadas = resultado.get_cambiadas()
 
-                break
+                    # El resolutor sólo sigue el avance de la partida, así que se crea de nuevo con la próxima pista
+                    resolutor = None
 
-            imprimir_tablero(tablero, minas, tiempo)
+                    if grabador is not None:
+                        grabador.registrar_deshacer()
+            elif jugada.strip() == COMANDO_REHACER:
+                resultado = partida.rehacer()
 
-    Celda.reiniciar_celdas_marcadas()
+                if resultado is None:
+                    mensaje = "NO HAY NINGUNA JUGADA QUE REHACER"
+                else:
+                    cambiadas = resultado.get_cambiadas()
 
+                    if resolutor is not None:
+                        resolutor.actualizar(cambiadas)
 
-def crear_tablero(filas, columnas, minas):
-    """
-    Se crea un tablero a partir del número de filas, el número de columnas y el número de filas.
+                    if grabador is not None:
+                        grabador.registrar_rehacer()
+            elif jugada.strip().startswith(COMANDO_GUARDAR):
+                nombre_fichero = jugada.strip()[len(COMANDO_GUARDAR):].strip()
 
-    :param filas: número de filas que tiene el tablero
-    :param columnas: número de columnas que tiene el tablero
-    :param minas: número de minas que tiene el tablero
-    :return: el tablero con las dimensiones y minas adecuadas
-    """
-    tablero = []
+                try:
+                    guardar_partida(partida, nombre_fichero, partida.get_tiempo())
+                    mensaje = 'PARTIDA GUARDADA EN "' + nombre_fichero + '"'
+                except IOError:
+                    mensaje = 'NO SE HA PODIDO GUARDAR LA PARTIDA EN "' + nombre_fichero + '"'
+            else:
+                # Se interpretan las jugadas hasta el primer fragmento no válido, si lo hay
+                jugadas = []
+                posicion_erronea = None
 
-    # Se rellena el tablero con objetos de la clase Celda
-    for i in range(filas):
-        componentes_fila = []
-        for j in range(columnas):
-            componentes_fila.append(Celda())
+                try:
+                    for jugada_interpretada in tokenizar_jugadas(jugada):
+                        jugadas.append(jugada_interpretada)
+                except ErrorDeJugada as e:
+                    posicion_erronea = e.posicion
 
-        tablero.append(componentes_fila)
+                # Las jugadas se aplican en un único lote, que se detiene en la primera no válida o al terminar la partida
+                resultado = partida.aplicar_lote(jugadas)
+                cambiadas = resultado.get_cambiadas()
 
-    # Una vez el tablero está relleno de objeto Celda, lo rellenamos con las minas adecuadas según el modo de juego
-    while minas != 0:
-        i = random.randint(0, filas - 1)
-        j = random.randint(0, columnas - 1)
+                if grabador is not None:
+                    grabador.registrar(jugadas[:resultado.get_aplicadas()])
 
-        if not tablero[i][j].hay_mina():
-            tablero[i][j].poner_mina()
-            minas -= 1
+                if resolutor is not None:
+                    resolutor.actualizar(cambiadas)
 
-    return tablero
+                if resultado.get_aplicadas():
+                    # La vista sigue a la última celda jugada
+                    ventana = seguir_celda(partida.get_tablero(), ventana, *jugadas[resultado.get_aplicadas() - 1][:2])
 
+                if not resultado.is_valida():
+                    error = resultado.get_error()
+                elif posicion_erronea is not None and not resultado.is_fin_de_partida():
+                    error = ENTRADA_ERRONEA
+                    mensaje = MENSAJES[error] + " (POSICION %d)" % (posicion_erronea + 1)
 
-def calcular_minas_por_descubrir(tablero):
-    """
-    Se calcula el número de minas por descubrir que tiene cada una de las celdas. Además, se añaden las celdas vecinas
-    de cada Celda en una lista que tiene cada objeto de este tipo.
+            if error and mensaje is None:
+                mensaje = MENSAJES[error]
 
-    :param tablero: tablero en el que se calcula el número de minas por descubrir de cada celda
-    """
-    celdas_vecinas_con_mina = 0
-    celdas_vecinas_marcadas = 0
-
-    for i in range(len(tablero)):
-        for j in range(len(tablero[0])):
-
-            # Parte superior
-            if i == 0:
-                if j == 0:
-                    if tablero[i][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if not tablero[i][j].get_celdas_vecinas():
-                        tablero[i][j].add_vecina(tablero[i][j + 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j])
-                        tablero[i][j].add_vecina(tablero[i + 1][j + 1])
-
-                elif j == len(tablero[0]) - 1:
-                    if tablero[i][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if not tablero[i][j].get_celdas_vecinas():
-                        tablero[i][j].add_vecina(tablero[i][j - 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j])
-                        tablero[i][j].add_vecina(tablero[i + 1][j - 1])
+            tiempo = partida.get_tiempo()
 
+            if pantalla_diferencial:
+                # Al terminar la partida se abren todas las celdas, por lo que se redibuja el tablero completo
+                if partida.is_fin_de_partida():
+                    pantalla_diferencial.dibujar(partida, tiempo, ventana=ventana)
                 else:
-                    if tablero[i][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if not tablero[i][j].get_celdas_vecinas():
-                        tablero[i][j].add_vecina(tablero[i][j - 1])
-                        tablero[i][j].add_vecina(tablero[i][j + 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j])
-                        tablero[i][j].add_vecina(tablero[i + 1][j + 1])
-
-            # Parte inferior
-            elif i == len(tablero) - 1:
-                if i % 2 == 0:
-                    if j == 0:
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i - 1][j + 1])
-
-                    elif j == len(tablero[0]) - 1:
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-
-                    else:
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i - 1][j + 1])
+                    pantalla_diferencial.dibujar(partida, tiempo, cambiadas, ventana)
 
-                else:
-                    if j == 0:
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-
-                    elif j == len(tablero[0]) - 1:
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i - 1][j - 1])
-
-                    else:
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j - 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-
-            # Lateral izquierdo
-            elif j == 0:
-                if i != 0 and i != len(tablero) - 1:
-                    if i % 2 == 0:
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i - 1][j + 1])
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i + 1][j])
-                            tablero[i][j].add_vecina(tablero[i + 1][j + 1])
-
-                    else:
-                        if tablero[i][j + 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j + 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j + 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i + 1][j])
-
-            # Lateral derecho
-            elif j == len(tablero[0]) - 1:
-                if i != 0 and i != len(tablero) - 1:
-                    if i % 2 == 0:
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i + 1][j])
-
-                    else:
-                        if tablero[i - 1][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i - 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i - 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j - 1].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j - 1].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if tablero[i + 1][j].hay_mina():
-                            celdas_vecinas_con_mina += 1
-                        if tablero[i + 1][j].is_marcada():
-                            celdas_vecinas_marcadas += 1
-
-                        if not tablero[i][j].get_celdas_vecinas():
-                            tablero[i][j].add_vecina(tablero[i - 1][j - 1])
-                            tablero[i][j].add_vecina(tablero[i - 1][j])
-                            tablero[i][j].add_vecina(tablero[i][j - 1])
-                            tablero[i][j].add_vecina(tablero[i + 1][j - 1])
-                            tablero[i][j].add_vecina(tablero[i + 1][j])
-
-            # Interior
+                if mensaje:
+                    print mensaje + "\n"
             else:
-                if i % 2 == 0:
-                    if tablero[i - 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i - 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i - 1][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i - 1][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if not tablero[i][j].get_celdas_vecinas():
-                        tablero[i][j].add_vecina(tablero[i - 1][j])
-                        tablero[i][j].add_vecina(tablero[i - 1][j + 1])
-                        tablero[i][j].add_vecina(tablero[i][j - 1])
-                        tablero[i][j].add_vecina(tablero[i][j + 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j])
-                        tablero[i][j].add_vecina(tablero[i + 1][j + 1])
-
-                else:
-                    if tablero[i - 1][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i - 1][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i - 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i - 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
+                if mensaje:
+                    print mensaje + "\n"
 
-                    if tablero[i][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
+                imprimir_tablero(partida, tiempo, ventana=ventana)
 
-                    if tablero[i][j + 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i][j + 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
+            instrumentacion.fin_de_turno()
 
-                    if tablero[i + 1][j - 1].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j - 1].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if tablero[i + 1][j].hay_mina():
-                        celdas_vecinas_con_mina += 1
-                    if tablero[i + 1][j].is_marcada():
-                        celdas_vecinas_marcadas += 1
-
-                    if not tablero[i][j].get_celdas_vecinas():
-                        tablero[i][j].add_vecina(tablero[i - 1][j - 1])
-                        tablero[i][j].add_vecina(tablero[i - 1][j])
-                        tablero[i][j].add_vecina(tablero[i][j - 1])
-                        tablero[i][j].add_vecina(tablero[i][j + 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j - 1])
-                        tablero[i][j].add_vecina(tablero[i + 1][j])
-
-            minas_por_descubrir = celdas_vecinas_con_mina - celdas_vecinas_marcadas
+            if partida.is_fin_de_partida():
+                if partida.is_partida_ganada():
+                    print "¡HAS GANADO LA PARTIDA! TIEMPO: "
+                else:
+                    print "GAME OVER"
 
-            tablero[i][j].set_minas_por_descubrir(minas_por_descubrir)
+                break
 
-            celdas_vecinas_con_mina = 0
-            celdas_vecinas_marcadas = 0
+        if grabador is not None:
+            grabador.cerrar()
 
 
-def imprimir_tablero(tablero, minas, tiempo):
+def numerar_grabacion(grabar, numero):
     """
-    Imprime el tablero que se pasa como parámetro.
+    Devuelve el nombre del fichero en el que se graba una partida del menú, añadiendo su número al nombre indicado.
 
-    :param tablero: tablero a imprimir
+    :param grabar: nombre indicado para las grabaciones, o None si no se graban las partidas
+    :param numero: número de la partida
+    :return: nombre del fichero, o None si no se graban las partidas
     """
-    print "MINAS RESTANTES: %2d | MARCADAS: %2d | TIEMPO: %.1f" % (minas, Celda.get_celdas_marcadas(), tiempo)
-    print "    ",
+    if grabar is None:
+        return None
 
-    for i in range(len(tablero[0])):
-        print NOMBRE_COLUMNAS[i], " ",
-    print
-
-    # Primer bloque de caracteres unicode
-    print "   ", CES + COE*3 + (COES + COE*3)*(len(tablero[0]) - 1) + CSO
-
-    # Bloque de caracteres unicode del interior
-    for i in range(len(tablero)):
-        if i % 2 == 0:
-            tab = "  "
-        else:
-            tab = ""
+    raiz, extension = os.path.splitext(grabar)
 
-        print NOMBRE_FILAS[i] + tab,
+    return "%s-%d%s" % (raiz, numero, extension)
 
-        for j in range(len(tablero[0])):
-            if j == 0:
-                print CNS,
 
-            print get_caracter_a_imprimir(tablero[i][j]) + " " + CNS,
-
-            if j == len(tablero[0]) - 1:
-                print
-
-        if i % 2 == 0:
-            if i != len(tablero) - 1:
-                print "  " + CES + COE + CONE + COE + COES + \
-                      (COE + CONE + COE + COES)*(len(tablero[0]) - 1) + \
-                      COE + CON
-        else:
-            if i != len(tablero) - 1:
-                print "  " + CNE + COE + COES + COE + CONE + \
-                      (COE + COES + COE + CONE)*(len(tablero[0]) - 1) +\
-                      COE + CSO
-
-        # Último bloque de caracteres unicode
-        if i == len(tablero) - 1:
-            if i % 2 == 0:
-                print "    " + CNE + COE*3 + (CONE + COE*3)*(len(tablero[0]) - 1) + CON
-            else:
-                print "  " + CNE + COE*3 + (CONE + COE*3)*(len(tablero[0]) - 1) + CON
-
-    print
-
-
-def get_caracter_a_imprimir(celda):
+def cargar_reserva():
     """
-    Devuelve el caracter a imprimir teniendo en cuenta el estado de las celdas, tal y como se especifica en el
-    enunciado.
-
-    :param celda: celda en la que se evalúa el estado
-    :return: caracter a imprimir según el estado de la celda
+    Añade a la reserva las semillas de tableros sin adivinar que se guardaron en la ejecución anterior, si las hay.
     """
-    caracter = ""
-
-    if not celda.is_abierta() and not celda.is_marcada():
-        caracter = CSOM
-    elif not celda.is_abierta() and celda.is_marcada():
-        caracter = "X"
-    elif celda.is_abierta() and celda.get_minas_por_descubrir() == 0:
-        caracter = " "
-    elif celda.is_abierta() and celda.get_minas_por_descubrir() < 0:
-        caracter = "?"
-    elif celda.is_abierta() and celda.get_minas_por_descubrir() > 0:
-        caracter = str(celda.get_minas_por_descubrir())
-
-    if celda.is_abierta() and celda.is_marcada() and not celda.hay_mina():
-        caracter = "#"
-    elif celda.is_abierta() and not celda.is_marcada() and celda.hay_mina():
-        caracter = "*"
-
-    return caracter
-
-def leer_tablero():
-    """
-    Devuelve un tablero creado a partir de la lectura de un fichero y el número de minas que tiene el tablero.
-
-    :return: tablero implementado según el contenido del fichero y número de minas que contiene
-    """
-    nombre_fichero = raw_input("Introduce el nombre del fichero: ")
-    tablero = []
-    minas = 0
-
-    print
-
     try:
-        fich = open(nombre_fichero, "r")
-
-        lineas_ficheros = fich.readlines()
-
-        fich.close()
-
-        filas, columnas = lineas_ficheros[0].split()
-
-        lineas_ficheros.pop(0)
+        RESERVA.cargar(FICHERO_RESERVA)
+    except (IOError, ValueError):
+        pass
 
-        for i in range(int(filas)):
-            componentes_filas = []
-            for j in range(int(columnas)):
-                celda = Celda()
-                if lineas_ficheros[i][j] == "*":
-                    celda.poner_mina()
-                    componentes_filas.append(celda)
-                    minas += 1
-                elif lineas_ficheros[i][j] == ".":
-                    componentes_filas.append(celda)
-
-            tablero.append(componentes_filas)
 
+def guardar_reserva():
+    """
+    Guarda las semillas de tableros sin adivinar que no se han usado, para la próxima ejecución.
+    """
+    try:
+        RESERVA.guardar(FICHERO_RESERVA)
     except IOError:
-        print 'No se ha encontrado ningún fichero con el nombre "' + nombre_fichero + '".'
-    except:
-        print "El fichero no cumple con el formato adecuado para la definición del tablero."
+        pass
 
-    return tablero, minas
 
-
-def dividir_en_subjugadas(jugada):
+def calcular_minas_por_descubrir(tablero):
     """
-    Devuelve la lista resultante de dividir la cadena jugada que se pasa como parámetro, en bloques de jugadas
-    independientes.
+    Se calcula desde cero el número de minas por descubrir que tiene cada una de las celdas. Durante la partida este
+    número se mantiene actualizado de forma incremental, por lo que basta con llamar a esta función para verificarlo.
 
-    :return: lista de jugadas
+    :param tablero: tablero en el que se calcula el número de minas por descubrir de cada celda
     """
-    lista_jugadas = []
-    cadena_jugada = ""
-
-    # Dividimos las cadena jugada en bloques de 3 caracteres
-    for i in range(len(jugada)):
-        cadena_jugada += jugada[i]
+    if tablero:
+        tablero.calcular_minas_por_descubrir()
 
-        if len(cadena_jugada) == 3:
-            lista_jugadas.append(cadena_jugada)
-            cadena_jugada = ""
 
-    jugada = list(jugada)
+def verificar_minas_por_descubrir(tablero):
+    """
+    Comprueba que el número de minas por descubrir mantenido de forma incremental en cada celda coincide con el que
+    se obtiene recalculando el tablero completo con calcular_minas_por_descubrir.
 
-    # Borramos de la lista jugada todos los bloques de 3 caracteres que ya se han añadido a lista_jugadas
-    for i in range(len(lista_jugadas)):
-        jugada.pop(0)
-        jugada.pop(0)
-        jugada.pop(0)
+    :param tablero: tablero a verificar
+    :return: True si todos los valores coinciden y False en caso contrario
+    """
+    incrementales = tablero.get_contadores()[:]
 
-    # En caso de que sigan existiendo elementos en la lista jugada, se añaden a la lista lista_jugdas
-    if jugada:
-        lista_jugadas.append("".join(jugada))
+    calcular_minas_por_descubrir(tablero)
 
-    return lista_jugadas
+    return incrementales == tablero.get_contadores()
 
 
-def validar_jugada(jugada, tablero, minas):
+def imprimir_tablero(partida, tiempo, salida=None, ventana=None):
     """
-    Determina si una jugada es válida o no, teniendo en cuenta las condiciones del enunciado.
-
-    :param jugada: jugada a validar
-    :param tablero: tablero en el que se comprobará si la jugada es válida
-    :param minas: minas que tiene el tablero
-    :return: True si la jugada es válida y False en caso de que no lo sea
+    Imprime el tablero de la partida que se pasa como parámetro. La imagen completa se compone en memoria y se escribe
+    de una sola vez.
+
+    :param partida: partida cuyo tablero se imprime
+    :param tiempo: tiempo transcurrido desde el inicio de la partida
+    :param salida: fichero en el que se imprime; si no se indica se usa la salida estándar
+    :param ventana: tupla (fila, columna, filas, columnas) con la parte del tablero que se imprime; si no se indica se
+    imprime el tablero completo
     """
-    if len(jugada) < 3 or jugada[0] not in NOMBRE_FILAS[:len(tablero)] or jugada[1] not in NOMBRE_COLUMNAS[:len(tablero[0])] or jugada[2] not in ACCIONES:
-        print "ENTRADA ERRONEA\n"
-        return False
+    pantalla.imprimir_tablero(partida, tiempo, salida, ventana)
 
-    fila = DIC_FILAS.get(jugada[0])
-    columna = DIC_COLUMNAS.get(jugada[1])
-    accion = jugada[2]
 
-    if accion == ACCIONES[0]:
-        if not tablero[fila][columna].is_marcada():
-            if Celda.get_celdas_marcadas() + 1 > minas:
-                print "NO SE PUEDEN MARCAR MAS CELDAS QUE MINAS\n"
-                return False
-
-            if tablero[fila][columna].is_abierta():
-                print "NO SE PUEDE MARCAR UNA CELDA ABIERTA\n"
-                return False
-
-    if accion == ACCIONES[1]:
-        if tablero[fila][columna].is_marcada():
-            print "NO SE PUEDE ABRIR UNA CELDA MARCADA\n"
-            return False
+def get_caracter_a_imprimir(celda):
+    """
+    Devuelve el caracter a imprimir teniendo en cuenta el estado de las celdas, tal y como se especifica en el
+    enunciado.
 
-        if tablero[fila][columna].is_abierta() and tablero[fila][columna].get_minas_por_descubrir() > 0:
-            print "CELDA YA ABIERTA. NO SE PUEDEN ABRIR LAS CELDAS VECINAS POR NUMERO INSUFICIENTE DE MARCAS\n"
-            return False
+    :param celda: celda en la que se evalúa el estado
+    :return: caracter a imprimir según el estado de la celda
+    """
+    tablero = celda.get_tablero()
 
-    return True
+    return get_caracter(tablero.get_estados()[celda.get_indice()], celda.get_minas_por_descubrir())
 
 
-def hacer_jugada(jugada, tablero, primera_apertura):
+def leer_partida():
     """
-    Se realiza la jugada que se pasa como parámetro en el tablero que también se pasa como parámetro.
+    Devuelve una partida creada a partir de la lectura de un fichero, que puede ser un fichero de definición de tablero
+    en formato de texto o una partida guardada en formato binario, y el tiempo que ya se había jugado.
 
-    :param jugada: jugada a realizar
-    :param tablero: tablero donde se hará la jugada
+    :return: tupla con la partida, o None si no se ha podido leer, y los segundos que se habían jugado
     """
-    fila = DIC_FILAS.get(jugada[0])
-    columna = DIC_COLUMNAS.get(jugada[1])
-    accion = jugada[2]
+    nombre_fichero = raw_input("Introduce el nombre del fichero: ")
+    partida = None
+    tiempo = 0
 
-    if accion == "!":
-        tablero[fila][columna].marcar()
+    print
 
-    elif accion == "*":
-        if tablero[fila][columna].is_abierta() and tablero[fila][columna].get_minas_por_descubrir() <= 0:
-            abrir_recursivamente(tablero[fila][columna])
+    try:
+        if is_fichero_binario(nombre_fichero):
+            partida, tiempo = cargar_partida(nombre_fichero)
         else:
-            if tablero[fila][columna].hay_mina() and primera_apertura:
-                mover_mina_a_primera_posicion_sin_minas(tablero[fila][columna], tablero)
+            tablero, minas = cargar_tablero(nombre_fichero)
+            partida = Partida(tablero, minas)
+    except IOError:
+        print 'No se ha encontrado ningún fichero con el nombre "' + nombre_fichero + '".'
+    except ErrorDeFormato as e:
+        print "El fichero no cumple con el formato adecuado para la definición del tablero."
+        print str(e)
+    except ValueError as e:
+        print "El fichero no es una partida guardada válida."
+        print str(e)
 
-            tablero[fila][columna].abrir()
+    return partida, tiempo
 
 
 def abrir_recursivamente(celda):
     """
-    Abre de forma recusiva las celdas vecinas de una celda en concreto que se pasa como parámetro si la celda vecina
-    no está abierta ni marcada.
+    Abre las celdas vecinas de una celda en concreto que se pasa como parámetro si la celda vecina no está abierta ni
+    marcada, y continúa abriendo las vecinas de las celdas abiertas sin mina cuyo número de minas por descubrir sea
+    menor o igual que cero. El recorrido es iterativo, por lo que no depende del límite de recursión.
 
     :param celda: celda de la que se quieren abrir las celdas vecinas
+    :return: lista con los índices de las celdas que se han abierto
     """
-    if not celda.get_celdas_vecinas():
-        return
-    else:
-        celda_vecina = celda.get_celdas_vecinas().pop()
-
-        if not celda_vecina.is_abierta() and not celda_vecina.is_marcada():
-            celda_vecina.abrir()
+    return celda.get_tablero().abrir_region(celda.get_indice())
 
-        abrir_recursivamente(celda_vecina)
 
-
-def detectar_fin_de_partida(tablero, minas):
+def detectar_fin_de_partida(partida):
     """
     Determina si una partida ha llegado a su fin, y además si la partida se ha ganado o se ha perdido, según las
     condiciones que se detallan en el enunciado.
 
-    :param tablero: tablero a detectar el fin de partida
-    :param minas: minas que contiene el tablero
+    :param partida: partida en la que se detecta el fin de partida
     :return: una tupla en la que el primer elemento determina si se ha detectado el final de la partida (True si se
     detecta y False en caso contrario), y el segundo indica si se ha ganado (True) o si se ha perdido (False)
     """
-    todas_abiertas_o_marcadas = True
-    fin_de_partida = False
-    partida_ganada = False
-
-    for i in range(len(tablero)):
-        for j in range(len(tablero[0])):
-            if tablero[i][j].hay_mina() and tablero[i][j].is_abierta():
-                fin_de_partida = True
-
-            if not tablero[i][j].is_marcada():
-                if not tablero[i][j].is_abierta():
-                    todas_abiertas_o_marcadas = False
-
-    if Celda.get_celdas_marcadas() == minas and todas_abiertas_o_marcadas:
-        partida_ganada = True
-        fin_de_partida = True
-
-    return fin_de_partida, partida_ganada
+    return partida.detectar_fin_de_partida()
 
 
 def abrir_celdas(tablero):
@@ -979,10 +577,7 @@ def abrir_celdas(tablero):
 
     :param tablero: tablero del que se abren las celdas
     """
-    for i in range(len(tablero)):
-        for j in range(len(tablero[0])):
-            if not tablero[i][j].is_abierta():
-                tablero[i][j].abrir()
+    tablero.abrir_todas()
 
 
 def mover_mina_a_primera_posicion_sin_minas(celda, tablero):
@@ -992,13 +587,64 @@ def mover_mina_a_primera_posicion_sin_minas(celda, tablero):
     :param celda: celda a mover
     :param tablero: tablero en el que se va a mover la celda
     """
-    for i in range(len(tablero)):
-        for j in range(len(tablero[0])):
-            if not tablero[i][j].hay_mina():
-                celda.quitar_mina()
-                tablero[i][j].poner_mina()
-                return
+    tablero.mover_mina_a_primera_posicion_sin_minas(celda.get_indice())
 
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Buscaminas en rejilla hexagonal.")
+    parser.add_argument("--diferencial", action="store_true",
+                        help="redibuja sólo las celdas que cambian en cada turno (requiere un terminal ANSI)")
+    parser.add_argument("--filas", type=int, help="juega directamente una partida con este número de filas")
+    parser.add_argument("--columnas", type=int, help="número de columnas de la partida")
+    parser.add_argument("--minas", type=int, help="número de minas de la partida")
+    parser.add_argument("--sin-adivinar", action="store_true",
+                        help="juega sólo tableros que se pueden resolver sin adivinar desde la celda central")
+    parser.add_argument("--grabar", help="graba las jugadas de la partida en este fichero para reproducirlas después")
+    parser.add_argument("--estadisticas", action="store_true",
+                        help="mide el tiempo de cada etapa de los turnos y lo muestra al terminar")
+    parser.add_argument("--volcado", help="fichero JSON en el que se guardan periódicamente las estadísticas")
+    parser.add_argument("--intervalo", type=float, default=60, help="segundos entre volcados de las estadísticas")
+    parser.add_argument("--perfil", "--profile", help="ejecuta la sesión con cProfile y guarda el perfil en un "
+                                                      "fichero que se puede leer con pstats")
+    argumentos = parser.parse_args()
+
+    if argumentos.filas is not None:
+        if argumentos.columnas is None or argumentos.minas is None:
+            parser.error("--filas requiere también --columnas y --minas")
+        if argumentos.filas < 1 or argumentos.columnas < 1:
+            parser.error("el tablero debe tener al menos una fila y una columna")
+        if not 0 <= argumentos.minas <= argumentos.filas * argumentos.columnas:
+            parser.error("el número de minas no cabe en el tablero")
+
+    if argumentos.intervalo <= 0:
+        parser.error("el intervalo de volcado debe ser positivo")
+
+    if argumentos.estadisticas or argumentos.volcado:
+        instrumentacion.activar()
+
+        if argumentos.volcado:
+            instrumentacion.iniciar_volcado(argumentos.volcado, argumentos.intervalo)
+
+    if argumentos.filas is not None:
+        sesion = lambda: jugar(argumentos.filas, argumentos.columnas, argumentos.minas,
+                               diferencial=argumentos.diferencial, sin_adivinar=argumentos.sin_adivinar,
+                               grabar=argumentos.grabar)
+    else:
+        sesion = lambda: main(argumentos.diferencial, argumentos.sin_adivinar, argumentos.grabar)
+
+    try:
+        if argumentos.perfil:
+            perfil = cProfile.Profile()
+
+            try:
+                perfil.runcall(sesion)
+            finally:
+                perfil.dump_stats(argumentos.perfil)
+        else:
+            sesion()
+    finally:
+        estadisticas = instrumentacion.desactivar()
+
+        if estadisticas is not None and argumentos.estadisticas:
+            print
+            estadisticas.volcar()
\ No newline at end of file
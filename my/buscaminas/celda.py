@@ -2,25 +2,43 @@
 
 class Celda():
     """
-    Representa una celda del clásico juego Buscaminas.
+    Representa una celda del clásico juego Buscaminas. El estado de la celda se guarda en el Tablero al que pertenece,
+    por lo que la Celda es sólo una vista sobre una posición de dicho tablero y no comparte ningún estado con las
+    celdas de otras partidas.
 
     Autor: Richard Albán Fernández
     """
 
-    __celdas_marcadas = 0
+    def __init__(self, tablero=None, indice=0):
+        """
+        Se inicializa el objeto celda como vista sobre la celda con el índice indicado del tablero. Si no se indica
+        tablero, se crea uno de una única celda, que está cerrada, sin marcar, sin mina y sin celdas vecinas.
+
+        :param tablero: tablero al que pertenece la celda
+        :param indice: índice de la celda dentro del tablero
+        """
+        if tablero is None:
+            from tablero import Tablero
+            tablero = Tablero(1, 1)
+
+        self.__tablero = tablero
+        self.__indice = indice
 
-    def __init__(self):
+    def get_tablero(self):
         """
-        Se inicializa el objeto celda con un estado que indica que está cerrado, sin marcar y sin mina. El número
-        de minas por descubrir se inicializa a None y la lista de celdas vecinas está inicialmente vacía.
-        :param fila:
-        :param columna:
+        Devuelve el tablero al que pertenece la Celda.
+
+        :return: tablero de la Celda
+        """
+        return self.__tablero
+
+    def get_indice(self):
         """
-        self.__abierta = False
-        self.__marcada = False
-        self.__hay_mina = False
-        self.__minas_por_descubrir = None
-        self.__celdas_vecinas = []
+        Devuelve el índice de la Celda dentro de su tablero.
+
+        :return: índice de la Celda
+        """
+        return self.__indice
 
     def is_abierta(self):
         """
@@ -28,7 +46,7 @@ class Celda():
 
         :return: True en caso de que la Celda esté abierta y False en caso de que esté cerrada
         """
-        return self.__abierta
+        return self.__tablero.is_abierta(self.__indice)
 
     def is_marcada(self):
         """
@@ -36,7 +54,7 @@ class Celda():
 
         :return: True en caso de que la Celda esté maracada y False en caso contrario
         """
-        return self.__marcada
+        return self.__tablero.is_marcada(self.__indice)
 
     def hay_mina(self):
         """
@@ -44,52 +62,36 @@ class Celda():
 
         :return: True en caso de que la Celda tenga una mina y False en caso contrario
         """
-        return self.__hay_mina
+        return self.__tablero.hay_mina(self.__indice)
 
     def poner_mina(self):
         """
         Establece que en la Celda hay una mina. Se lanza una excepción en caso de que se quiera poner una mina en una
-        Celda que ya tenga mina.
+        Celda que ya tenga mina. Se actualiza el número de minas por descubrir de las celdas vecinas.
         """
-        if self.__hay_mina:
-            raise ValueError("Esta celda ya tiene una mina.")
-
-        self.__hay_mina = True
+        self.__tablero.poner_mina(self.__indice)
 
     def quitar_mina(self):
         """
         Establece que en la Celda no hay ninguna mina. Se lanza una excepción en caso de que se quiera quitar una mina
-        en una Celda donde no hay ninguna mina.
+        en una Celda donde no hay ninguna mina. Se actualiza el número de minas por descubrir de las celdas vecinas.
         """
-        if not self.__hay_mina:
-            raise ValueError("Esta celda no tiene ninguna mina.")
-
-        self.__hay_mina = False
+        self.__tablero.quitar_mina(self.__indice)
 
     def marcar(self):
         """
         Establece que una Celda está marcada (True), si cuando se llama al método la celda no está marcada, y establece
         la Celda como no marcada (False) si cuando se llama al método la celda está marcada. Se lanza una excepción en
-        caso de que se intente marca una celda que ya esté abierta.
+        caso de que se intente marca una celda que ya esté abierta. El número de minas por descubrir de las celdas
+        vecinas se actualiza en el momento.
         """
-        if self.is_marcada():
-            self.__marcada = False
-            self.decrementa_celdas_marcadas()
-        else:
-            if self.is_abierta():
-                raise ValueError("No se puede marcar una celda que ya está abierta.")
-
-            self.__marcada = True
-            self.incrementa_celdas_marcadas()
+        self.__tablero.marcar(self.__indice)
 
     def abrir(self):
         """
         Establece una Celda como abierta. Si se intenta abrir una celda que ya está abierta, se lanza una excepción.
         """
-        if self.is_abierta():
-            raise ValueError("No se puede abrir una celda que ya está abierta.")
-
-        self.__abierta = True
+        self.__tablero.abrir(self.__indice)
 
     def get_minas_por_descubrir(self):
         """
@@ -97,7 +99,7 @@ class Celda():
 
         :return: número de minas por descubrir
         """
-        return self.__minas_por_descubrir
+        return self.__tablero.get_minas_por_descubrir(self.__indice)
 
     def set_minas_por_descubrir(self, minas_por_descubrir):
         """
@@ -105,48 +107,12 @@ class Celda():
 
         :param minas_por_descubrir: número de minas a descubrir
         """
-        self.__minas_por_descubrir = minas_por_descubrir
-
-    def add_vecina(self, celda):
-        """
-        Añade una celda a la lista de celdas vecinas de una celda.
-
-        :param celda: celda a añadir a la lista de celdas vecinas
-        """
-        self.__celdas_vecinas.append(celda)
+        self.__tablero.set_minas_por_descubrir(self.__indice, minas_por_descubrir)
 
     def get_celdas_vecinas(self):
         """
-        Devuelve la cantidad de celdas vecinas que tiene una celda.
-
-        :return: cantidad de celda vecinas de una celda
-        """
-        return self.__celdas_vecinas
-
-    @classmethod
-    def incrementa_celdas_marcadas(cls):
-        """
-        Incrementa en uno el número total de celdas marcadas.
-        """
-        cls.__celdas_marcadas += 1
+        Devuelve una lista nueva con las celdas vecinas de una celda.
 
-    @classmethod
-    def decrementa_celdas_marcadas(cls):
-        """
-        Decrementa en uno el número total de celdas marcadas.
-        """
-        cls.__celdas_marcadas -= 1
-
-    @classmethod
-    def get_celdas_marcadas(self):
-        """
-        Devuelve la cantidad de celdas que están marcadas.
-        """
-        return self.__celdas_marcadas
-
-    @classmethod
-    def reiniciar_celdas_marcadas(cls):
-        """
-        Reinicia a 0 la cantidas de celdas marcadas.
+        :return: lista de celdas vecinas de una celda
         """
-        cls.__celdas_marcadas = 0
\ No newline at end of file
+        return [Celda(self.__tablero, vecina) for vecina in self.__tablero.get_vecinas(self.__indice)]
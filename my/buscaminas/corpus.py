@@ -0,0 +1,295 @@
+# coding=utf-8
+
+"""
+Carga masiva de ficheros de definición de tableros en un corpus indexado.
+
+Los ficheros se leen de un directorio (recorriendo también sus subdirectorios) o de un archivo tar o zip, y se
+interpretan en paralelo en un conjunto de procesos. De cada tablero sólo se guarda la codificación de sus minas
+(Tablero.codificar), su huella, sus dimensiones y su número de minas, por lo que el corpus ocupa poco más de un bit
+por celda y cualquier tablero se puede recuperar al momento con decodificar_tablero, sin volver a leer su fichero.
+
+Los ficheros que no cumplen con el formato no detienen la carga: se guardan en la lista de errores del corpus con el
+mensaje que indica la línea y la columna del error.
+
+Autor: Richard Albán Fernández
+"""
+
+import multiprocessing
+import os
+import tarfile
+import zipfile
+from ficheros import ErrorDeFormato, leer_estados
+from tablero import MINA, codificar_minas, calcular_huella, decodificar_tablero
+
+# Número de ficheros que se envían juntos a cada proceso
+TAMANO_LOTE = 64
+
+
+class Corpus():
+    """
+    Representa un conjunto de tableros indexado por su posición y por su huella.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self):
+        """
+        Se inicializa un corpus vacío.
+        """
+        self.__nombres = []
+        self.__codificaciones = []
+        self.__huellas = []
+        self.__dimensiones = []
+        self.__minas = []
+        self.__por_huella = {}
+        self.__errores = []
+
+    def __len__(self):
+        """
+        Devuelve el número de tableros del corpus.
+
+        :return: número de tableros
+        """
+        return len(self.__codificaciones)
+
+    def anadir(self, nombre, codificacion, huella, filas, columnas, minas):
+        """
+        Añade un tablero al corpus.
+
+        :param nombre: nombre del fichero del que procede el tablero
+        :param codificacion: codificación de las minas del tablero
+        :param huella: huella del tablero
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :return: posición del tablero en el corpus
+        """
+        posicion = len(self.__codificaciones)
+
+        self.__nombres.append(nombre)
+        self.__codificaciones.append(codificacion)
+        self.__huellas.append(huella)
+        self.__dimensiones.append((filas, columnas))
+        self.__minas.append(minas)
+        self.__por_huella.setdefault(huella, posicion)
+
+        return posicion
+
+    def anadir_error(self, nombre, mensaje):
+        """
+        Registra un fichero que no se ha podido cargar.
+
+        :param nombre: nombre del fichero
+        :param mensaje: descripción del error
+        """
+        self.__errores.append((nombre, mensaje))
+
+    def get_nombre(self, posicion):
+        """
+        Devuelve el nombre del fichero del que procede un tablero.
+
+        :param posicion: posición del tablero en el corpus
+        :return: nombre del fichero
+        """
+        return self.__nombres[posicion]
+
+    def get_codificacion(self, posicion):
+        """
+        Devuelve la codificación de las minas de un tablero.
+
+        :param posicion: posición del tablero en el corpus
+        :return: cadena de bytes con la codificación del tablero
+        """
+        return self.__codificaciones[posicion]
+
+    def get_huella(self, posicion):
+        """
+        Devuelve la huella de un tablero.
+
+        :param posicion: posición del tablero en el corpus
+        :return: cadena hexadecimal con la huella del tablero
+        """
+        return self.__huellas[posicion]
+
+    def get_dimensiones(self, posicion):
+        """
+        Devuelve las dimensiones de un tablero.
+
+        :param posicion: posición del tablero en el corpus
+        :return: tupla (filas, columnas)
+        """
+        return self.__dimensiones[posicion]
+
+    def get_minas(self, posicion):
+        """
+        Devuelve el número de minas de un tablero.
+
+        :param posicion: posición del tablero en el corpus
+        :return: número de minas
+        """
+        return self.__minas[posicion]
+
+    def get_errores(self):
+        """
+        Devuelve los ficheros que no se han podido cargar.
+
+        :return: lista de tuplas (nombre, mensaje)
+        """
+        return self.__errores
+
+    def get_tablero(self, posicion):
+        """
+        Crea un tablero nuevo, con todas las celdas cerradas y sin marcar, a partir de su codificación en el corpus.
+
+        :param posicion: posición del tablero en el corpus
+        :return: el tablero
+        """
+        return decodificar_tablero(self.__codificaciones[posicion])
+
+    def buscar(self, huella):
+        """
+        Devuelve la posición del primer tablero del corpus con la huella indicada.
+
+        :param huella: huella del tablero
+        :return: posición del tablero, o None si no hay ningún tablero con esa huella
+        """
+        return self.__por_huella.get(huella)
+
+    def buscar_dimensiones(self, filas, columnas, minas=None):
+        """
+        Devuelve las posiciones de los tableros con las dimensiones y, si se indica, el número de minas indicados.
+
+        :param filas: número de filas
+        :param columnas: número de columnas
+        :param minas: número de minas, o None para cualquier número
+        :return: lista de posiciones
+        """
+        return [posicion for posicion in range(len(self.__dimensiones))
+                if self.__dimensiones[posicion] == (filas, columnas) and
+                (minas is None or self.__minas[posicion] == minas)]
+
+
+def _procesar_fichero(tarea):
+    """
+    Interpreta un fichero de definición de tableros. Se ejecuta en los procesos del conjunto, por lo que recibe y
+    devuelve sólo tipos básicos.
+
+    :param tarea: tupla (nombre, ruta, contenido); si el contenido es None se lee el fichero de la ruta
+    :return: tupla (nombre, datos, error) donde datos es la tupla (codificacion, huella, filas, columnas, minas) o
+    None si se ha producido un error, y error es el mensaje del error o None
+    """
+    nombre, ruta, contenido = tarea
+
+    try:
+        if contenido is None:
+            with open(ruta, "rb") as fichero:
+                filas, columnas, estados = leer_estados(fichero)
+        else:
+            filas, columnas, estados = leer_estados(contenido.splitlines())
+
+    except (IOError, ErrorDeFormato) as e:
+        return nombre, None, str(e)
+
+    codificacion = codificar_minas(filas, columnas, estados)
+
+    return nombre, (codificacion, calcular_huella(codificacion), filas, columnas, estados.count(chr(MINA))), None
+
+
+def _tareas_directorio(ruta):
+    """
+    Devuelve las tareas para interpretar los ficheros de un directorio y sus subdirectorios, en orden alfabético.
+
+    :param ruta: ruta del directorio
+    :return: generador de tareas
+    """
+    for directorio, subdirectorios, ficheros in os.walk(ruta):
+        subdirectorios.sort()
+
+        for nombre in sorted(ficheros):
+            ruta_fichero = os.path.join(directorio, nombre)
+            yield os.path.relpath(ruta_fichero, ruta), ruta_fichero, None
+
+
+def _tareas_tar(ruta):
+    """
+    Devuelve las tareas para interpretar los ficheros de un archivo tar, en el orden en el que aparecen.
+
+    :param ruta: ruta del archivo
+    :return: generador de tareas
+    """
+    archivo = tarfile.open(ruta)
+
+    try:
+        for miembro in archivo:
+            if miembro.isfile():
+                yield miembro.name, None, archivo.extractfile(miembro).read()
+    finally:
+        archivo.close()
+
+
+def _tareas_zip(ruta):
+    """
+    Devuelve las tareas para interpretar los ficheros de un archivo zip, en el orden en el que aparecen.
+
+    :param ruta: ruta del archivo
+    :return: generador de tareas
+    """
+    archivo = zipfile.ZipFile(ruta)
+
+    try:
+        for nombre in archivo.namelist():
+            if not nombre.endswith("/"):
+                yield nombre, None, archivo.read(nombre)
+    finally:
+        archivo.close()
+
+
+def cargar_corpus(ruta, procesos=None):
+    """
+    Carga en un corpus todos los ficheros de definición de tableros de un directorio o de un archivo tar o zip. Los
+    ficheros se interpretan en un conjunto de procesos mientras se siguen leyendo, y el corpus conserva el orden de
+    los ficheros.
+
+    :param ruta: ruta del directorio o del archivo
+    :param procesos: número de procesos; si no se indica se usa uno por procesador, y con 1 no se crean procesos
+    :return: el corpus cargado
+    :raise IOError: si la ruta no existe o no es un directorio ni un archivo tar o zip
+    """
+    if os.path.isdir(ruta):
+        tareas = _tareas_directorio(ruta)
+    elif tarfile.is_tarfile(ruta):
+        tareas = _tareas_tar(ruta)
+    elif zipfile.is_zipfile(ruta):
+        tareas = _tareas_zip(ruta)
+    else:
+        raise IOError('"' + ruta + '" no es un directorio ni un archivo tar o zip.')
+
+    corpus = Corpus()
+
+    if procesos == 1:
+        resultados = map(_procesar_fichero, tareas)
+        _anadir_resultados(corpus, resultados)
+    else:
+        conjunto = multiprocessing.Pool(procesos)
+
+        try:
+            _anadir_resultados(corpus, conjunto.imap(_procesar_fichero, tareas, TAMANO_LOTE))
+        finally:
+            conjunto.close()
+            conjunto.join()
+
+    return corpus
+
+
+def _anadir_resultados(corpus, resultados):
+    """
+    Añade al corpus los resultados de interpretar los ficheros.
+
+    :param corpus: corpus al que se añaden los tableros
+    :param resultados: iterable de resultados de _procesar_fichero
+    """
+    for nombre, datos, error in resultados:
+        if datos is None:
+            corpus.anadir_error(nombre, error)
+        else:
+            corpus.anadir(nombre, *datos)
@@ -0,0 +1,123 @@
+# coding=utf-8
+
+"""
+Interpretación de las jugadas escritas por el jugador.
+
+Una cadena de jugadas es una secuencia de celdas seguidas cada una del carácter de su acción (! marcar, * abrir).
+Cada celda se nombra con la letra de su fila y la de su columna (Ab) o con sus números separados por una coma (120,7).
+Entre dos jugadas y alrededor de la coma se admiten espacios.
+
+tokenizar_jugadas recorre la cadena una única vez con una expresión regular compilada y devuelve las jugadas a medida
+que las encuentra, por lo que su coste es lineal en la longitud de la cadena. Al llegar a un fragmento que no es una
+jugada se lanza un ErrorDeJugada con la posición en la que empieza.
+
+Autor: Richard Albán Fernández
+"""
+
+import re
+from pantalla import NOMBRE_FILAS, NOMBRE_COLUMNAS
+
+# Caracteres asociados a las acciones (! marcar, * abrir)
+ACCIONES = "!*"
+
+# Asociación de caracteres y enteros
+DIC_FILAS = dict(zip(NOMBRE_FILAS, range(len(NOMBRE_FILAS))))
+DIC_COLUMNAS = dict(zip(NOMBRE_COLUMNAS, range(len(NOMBRE_COLUMNAS))))
+
+# Nombre de una celda, con letras o con números
+_PATRON_CELDA = r"(?:(?P<fila>[%s])(?P<columna>[%s])|(?P<numero_fila>\d+)\s*,\s*(?P<numero_columna>\d+))" % (
+    re.escape(NOMBRE_FILAS), re.escape(NOMBRE_COLUMNAS))
+
+_CELDA = re.compile(r"\s*" + _PATRON_CELDA + r"\s*$")
+_JUGADA = re.compile(r"\s*" + _PATRON_CELDA + r"(?P<accion>[%s])" % re.escape(ACCIONES))
+_ESPACIOS = re.compile(r"\s*")
+
+
+class ErrorDeJugada(ValueError):
+    """
+    Error que se produce al encontrar en una cadena de jugadas un fragmento que no es una jugada.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, posicion):
+        """
+        Se inicializa el error con la posición del fragmento no válido.
+
+        :param posicion: posición, empezando en 0, del primer carácter del fragmento no válido
+        """
+        ValueError.__init__(self, "Jugada no válida en la posición %d." % posicion)
+        self.posicion = posicion
+
+
+def _convertir(coincidencia):
+    """
+    Devuelve la fila y la columna de la celda reconocida por una expresión regular.
+
+    :param coincidencia: resultado de la expresión regular
+    :return: tupla (fila, columna)
+    """
+    fila = coincidencia.group("fila")
+
+    if fila is not None:
+        return DIC_FILAS[fila], DIC_COLUMNAS[coincidencia.group("columna")]
+
+    return int(coincidencia.group("numero_fila")), int(coincidencia.group("numero_columna"))
+
+
+def tokenizar_jugadas(texto):
+    """
+    Recorre una cadena de jugadas devolviendo cada jugada en cuanto se reconoce. Las jugadas anteriores a un fragmento
+    no válido se devuelven antes de lanzar el error, de forma que se pueden ir aplicando mientras sean válidas.
+
+    :param texto: cadena de jugadas
+    :return: generador de tuplas (fila, columna, accion)
+    :raise ErrorDeJugada: si la cadena contiene un fragmento que no es una jugada
+    """
+    posicion = 0
+    jugada = _JUGADA.match(texto, posicion)
+
+    while jugada is not None:
+        fila, columna = _convertir(jugada)
+        yield fila, columna, jugada.group("accion")
+
+        posicion = jugada.end()
+        jugada = _JUGADA.match(texto, posicion)
+
+    posicion = _ESPACIOS.match(texto, posicion).end()
+
+    if posicion < len(texto):
+        raise ErrorDeJugada(posicion)
+
+
+def interpretar_celda(nombre):
+    """
+    Convierte el nombre de una celda, ya sea con la letra de su fila y la de su columna (por ejemplo Ab) o con sus
+    números separados por una coma (por ejemplo 120,7), en su fila y su columna.
+
+    :param nombre: nombre de la celda
+    :return: tupla (fila, columna), o None si el nombre no tiene el formato adecuado
+    """
+    celda = _CELDA.match(nombre)
+
+    if celda is None:
+        return None
+
+    return _convertir(celda)
+
+
+def nombrar_celda(fila, columna, filas, columnas):
+    """
+    Devuelve el nombre de una celda tal y como lo escribiría el jugador: con letras si el tablero cabe en los nombres
+    de un carácter y con números separados por una coma en caso contrario.
+
+    :param fila: fila de la celda
+    :param columna: columna de la celda
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :return: nombre de la celda
+    """
+    if filas <= len(NOMBRE_FILAS) and columnas <= len(NOMBRE_COLUMNAS):
+        return NOMBRE_FILAS[fila] + NOMBRE_COLUMNAS[columna]
+
+    return "%d,%d" % (fila, columna)
@@ -0,0 +1,135 @@
+# coding=utf-8
+
+"""
+Lectura de los ficheros de definición de tableros.
+
+El fichero se recorre línea a línea sin cargarlo entero en memoria. Cada fila se comprueba con una única búsqueda de
+caracteres no válidos y se convierte de una vez, con una tabla de traducción, en los bits de estado de sus celdas, que
+se van añadiendo al buffer del tablero. El coste de la lectura es por tanto lineal en el tamaño del fichero y no se
+crea ningún objeto por celda.
+
+Cualquier error de formato se indica con un ErrorDeFormato que contiene la línea y la columna en la que se ha
+encontrado.
+
+Autor: Richard Albán Fernández
+"""
+
+import re
+import string
+from tablero import Tablero, MINA
+
+# Caracteres de las celdas con mina y sin mina
+CARACTER_MINA = "*"
+CARACTER_LIBRE = "."
+
+_CARACTER_NO_VALIDO = re.compile(r"[^%s]" % re.escape(CARACTER_MINA + CARACTER_LIBRE))
+_CARACTER_A_ESTADO = string.maketrans(CARACTER_MINA + CARACTER_LIBRE, chr(MINA) + chr(0))
+
+
+class ErrorDeFormato(ValueError):
+    """
+    Error que se produce cuando un fichero no cumple con el formato de definición de tableros.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, mensaje, linea, columna=None):
+        """
+        Se inicializa el error con su descripción y la posición en la que se ha encontrado.
+
+        :param mensaje: descripción del error
+        :param linea: línea del fichero, empezando en 1
+        :param columna: columna de la línea, empezando en 1, o None si el error afecta a toda la línea
+        """
+        if columna is None:
+            posicion = "Línea %d" % linea
+        else:
+            posicion = "Línea %d, columna %d" % (linea, columna)
+
+        ValueError.__init__(self, "%s: %s" % (posicion, mensaje))
+        self.linea = linea
+        self.columna = columna
+
+
+def interpretar_tablero(lineas):
+    """
+    Crea un tablero a partir de las líneas de un fichero de definición de tableros.
+
+    :param lineas: iterable con las líneas del fichero, incluida la cabecera
+    :return: tupla con el tablero y el número de minas que contiene
+    :raise ErrorDeFormato: si las líneas no cumplen con el formato
+    """
+    filas, columnas, estados = leer_estados(lineas)
+
+    tablero = Tablero(filas, columnas)
+    tablero.set_estados(estados)
+
+    return tablero, tablero.get_minas()
+
+
+def leer_estados(lineas):
+    """
+    Obtiene las dimensiones y el buffer de estados de las celdas a partir de las líneas de un fichero de definición
+    de tableros, sin crear el tablero.
+
+    :param lineas: iterable con las líneas del fichero, incluida la cabecera
+    :return: tupla con las filas, las columnas y un bytearray con el bit MINA de cada celda
+    :raise ErrorDeFormato: si las líneas no cumplen con el formato
+    """
+    lineas = iter(lineas)
+    cabecera = next(lineas, None)
+
+    if cabecera is None:
+        raise ErrorDeFormato("el fichero está vacío.", 1)
+
+    dimensiones = cabecera.split()
+
+    if len(dimensiones) != 2 or not dimensiones[0].isdigit() or not dimensiones[1].isdigit():
+        raise ErrorDeFormato("se esperaban el número de filas y el de columnas separados por un espacio.", 1)
+
+    filas, columnas = int(dimensiones[0]), int(dimensiones[1])
+
+    if filas < 1 or columnas < 1:
+        raise ErrorDeFormato("el número de filas y el de columnas deben ser positivos.", 1)
+
+    estados = bytearray()
+    numero_linea = 1
+
+    for numero_linea, linea in enumerate(lineas, 2):
+        fila = linea.rstrip("\r\n")
+
+        if numero_linea - 1 > filas:
+            # Sólo se admiten líneas en blanco tras la última fila
+            if fila.strip():
+                raise ErrorDeFormato("el fichero tiene más de %d filas." % filas, numero_linea)
+            continue
+
+        caracter = _CARACTER_NO_VALIDO.search(fila)
+
+        if caracter is not None and caracter.start() < columnas:
+            raise ErrorDeFormato("carácter no válido %r." % caracter.group(), numero_linea, caracter.start() + 1)
+
+        if len(fila) != columnas:
+            raise ErrorDeFormato("la fila tiene %d columnas en vez de %d." % (len(fila), columnas), numero_linea,
+                                 min(len(fila), columnas) + 1)
+
+        estados.extend(fila.translate(_CARACTER_A_ESTADO))
+
+    if len(estados) != filas * columnas:
+        raise ErrorDeFormato("el fichero tiene %d filas en vez de %d." % (len(estados) // columnas, filas),
+                             numero_linea + 1)
+
+    return filas, columnas, estados
+
+
+def cargar_tablero(nombre_fichero):
+    """
+    Crea un tablero a partir de un fichero de definición de tableros, leyéndolo línea a línea.
+
+    :param nombre_fichero: nombre del fichero
+    :return: tupla con el tablero y el número de minas que contiene
+    :raise IOError: si no se puede abrir el fichero
+    :raise ErrorDeFormato: si el fichero no cumple con el formato
+    """
+    with open(nombre_fichero, "rb") as fichero:
+        return interpretar_tablero(fichero)
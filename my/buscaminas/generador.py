@@ -0,0 +1,352 @@
+# coding=utf-8
+
+"""
+Generación de tableros que se pueden resolver sin adivinar.
+
+Un tablero se identifica por la semilla con la que nueva_partida coloca sus minas. Para cada semilla candidata se
+juega la partida abriendo la celda central (celda_inicial) y se deja que el resolutor haga todas las jugadas que
+puede deducir; la semilla se acepta si con ellas se gana la partida, es decir, si el tablero se puede resolver desde
+la primera apertura sin tener que adivinar en ningún momento.
+
+Las candidatas se evalúan en paralelo en un conjunto de procesos y la búsqueda se cancela en cuanto se han encontrado
+las semillas pedidas. Las semillas aceptadas se guardan en una ReservaDeSemillas por (filas, columnas, minas), que se
+puede rellenar en segundo plano y guardar en un fichero, de forma que al empezar una partida normalmente ya hay una
+semilla disponible y no hace falta buscarla.
+
+Autor: Richard Albán Fernández
+"""
+
+import json
+import multiprocessing
+import random
+import threading
+from partida import nueva_partida, ABRIR, MAX_SEMILLA
+from resolutor import Resolutor
+
+# Número máximo de semillas candidatas que se evalúan en una búsqueda
+MAX_CANDIDATOS = 20000
+
+# Número de candidatas que se envían juntas a cada proceso
+TAMANO_LOTE = 16
+
+# Número de semillas que se intentan tener preparadas para cada tamaño de tablero
+TAMANO_RESERVA = 3
+
+
+def celda_inicial(filas, columnas):
+    """
+    Devuelve la celda que se abre en primer lugar en los tableros sin adivinar.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :return: tupla (fila, columna) de la celda central
+    """
+    return filas // 2, columnas // 2
+
+
+def abrir_celda_inicial(partida):
+    """
+    Abre la celda inicial de una partida que todavía no ha empezado.
+
+    :param partida: partida en la que se abre la celda
+    :return: Resultado de la jugada
+    """
+    tablero = partida.get_tablero()
+    fila, columna = celda_inicial(tablero.get_filas(), tablero.get_columnas())
+
+    return partida.aplicar((fila, columna, ABRIR))
+
+
+def es_resoluble(filas, columnas, minas, semilla):
+    """
+    Determina si el tablero generado con una semilla se puede resolver sin adivinar a partir de la celda inicial.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param semilla: semilla con la que se colocan las minas
+    :return: True si el resolutor gana la partida y False en caso contrario
+    """
+    partida = nueva_partida(filas, columnas, minas, semilla)
+    abrir_celda_inicial(partida)
+
+    if not partida.is_fin_de_partida():
+        Resolutor(partida).resolver()
+
+    return partida.is_partida_ganada()
+
+
+def _evaluar_semilla(tarea):
+    """
+    Evalúa una semilla candidata. Se ejecuta en los procesos del conjunto, por lo que recibe y devuelve sólo tipos
+    básicos.
+
+    :param tarea: tupla (filas, columnas, minas, semilla)
+    :return: la semilla si el tablero se puede resolver sin adivinar, o None en caso contrario
+    """
+    if es_resoluble(*tarea):
+        return tarea[3]
+
+    return None
+
+
+def _candidatas(filas, columnas, minas, max_candidatos):
+    """
+    Devuelve las tareas con las semillas candidatas, elegidas al azar.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param max_candidatos: número de candidatas
+    :return: generador de tareas para _evaluar_semilla
+    """
+    generador = random.SystemRandom()
+
+    for _ in range(max_candidatos):
+        yield filas, columnas, minas, generador.getrandbits(63)
+
+
+def buscar_semillas(filas, columnas, minas, cantidad=1, procesos=None, max_candidatos=MAX_CANDIDATOS):
+    """
+    Busca semillas de tableros que se pueden resolver sin adivinar. Las candidatas se evalúan en un conjunto de
+    procesos, que se detiene en cuanto se han encontrado las semillas pedidas.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param cantidad: número de semillas que se buscan
+    :param procesos: número de procesos; si no se indica se usa uno por procesador, y con 1 no se crean procesos
+    :param max_candidatos: número máximo de candidatas que se evalúan
+    :return: lista con las semillas encontradas, que puede tener menos de las pedidas si no se han encontrado
+    suficientes entre las candidatas
+    """
+    if not 0 <= minas <= filas * columnas:
+        raise ValueError("El número de minas no cabe en el tablero.")
+
+    tareas = _candidatas(filas, columnas, minas, max_candidatos)
+    semillas = []
+
+    if procesos == 1:
+        for semilla in (_evaluar_semilla(tarea) for tarea in tareas):
+            if semilla is not None:
+                semillas.append(semilla)
+
+                if len(semillas) == cantidad:
+                    break
+
+        return semillas
+
+    conjunto = multiprocessing.Pool(procesos)
+
+    try:
+        for semilla in conjunto.imap_unordered(_evaluar_semilla, tareas, TAMANO_LOTE):
+            if semilla is not None:
+                semillas.append(semilla)
+
+                if len(semillas) == cantidad:
+                    break
+    finally:
+        # Se descartan las candidatas que quedan por evaluar
+        conjunto.terminate()
+        conjunto.join()
+
+    return semillas
+
+
+def _es_semilla(valor):
+    """
+    Determina si un valor leído de un fichero JSON es una semilla válida.
+
+    :param valor: valor leído
+    :return: True si es un entero entre 0 y MAX_SEMILLA y False en caso contrario
+    """
+    return isinstance(valor, (int, long)) and not isinstance(valor, bool) and 0 <= valor <= MAX_SEMILLA
+
+
+class ReservaDeSemillas():
+    """
+    Representa un conjunto de semillas aceptadas, agrupadas por las dimensiones y las minas de sus tableros. Se puede
+    usar a la vez desde varios hilos.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self):
+        """
+        Se inicializa una reserva vacía.
+        """
+        self.__semillas = {}
+        self.__cerrojo = threading.Lock()
+
+    def __len__(self):
+        """
+        Devuelve el número total de semillas de la reserva.
+
+        :return: número de semillas
+        """
+        with self.__cerrojo:
+            return sum(len(semillas) for semillas in self.__semillas.values())
+
+    def contar(self, filas, columnas, minas):
+        """
+        Devuelve el número de semillas disponibles para un tamaño de tablero.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :return: número de semillas
+        """
+        with self.__cerrojo:
+            return len(self.__semillas.get((filas, columnas, minas), ()))
+
+    def anadir(self, filas, columnas, minas, semillas):
+        """
+        Añade a la reserva semillas aceptadas.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :param semillas: semillas a añadir
+        """
+        with self.__cerrojo:
+            self.__semillas.setdefault((filas, columnas, minas), []).extend(semillas)
+
+    def sacar(self, filas, columnas, minas):
+        """
+        Saca de la reserva una semilla para un tamaño de tablero, de forma que no se vuelva a usar.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :return: la semilla, o None si no hay ninguna disponible
+        """
+        with self.__cerrojo:
+            semillas = self.__semillas.get((filas, columnas, minas))
+
+            if not semillas:
+                return None
+
+            return semillas.pop(0)
+
+    def obtener(self, filas, columnas, minas, procesos=None):
+        """
+        Devuelve una semilla para un tamaño de tablero, sacándola de la reserva o buscándola si no hay ninguna.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :param procesos: número de procesos con los que se busca la semilla si no hay ninguna en la reserva
+        :return: la semilla, o None si no se ha encontrado ninguna
+        """
+        semilla = self.sacar(filas, columnas, minas)
+
+        if semilla is None:
+            semillas = buscar_semillas(filas, columnas, minas, procesos=procesos)
+
+            if semillas:
+                semilla = semillas[0]
+
+        return semilla
+
+    def rellenar(self, filas, columnas, minas, cantidad=TAMANO_RESERVA, procesos=None):
+        """
+        Busca las semillas que faltan para tener preparadas las indicadas para un tamaño de tablero.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        :param minas: número de minas del tablero
+        :param cantidad: número de semillas que se quieren tener preparadas
+        :param procesos: número de procesos con los que se buscan las semillas
+        """
+        faltan = cantidad - self.contar(filas, columnas, minas)
+
+        if faltan > 0:
+            self.anadir(filas, columnas, minas, buscar_semillas(filas, columnas, minas, faltan, procesos))
+
+    def rellenar_en_segundo_plano(self, niveles, cantidad=TAMANO_RESERVA):
+        """
+        Rellena la reserva para varios tamaños de tablero en un hilo aparte, que no impide que termine el programa.
+        Las semillas se buscan sin crear procesos, para no competir con la partida que se esté jugando.
+
+        :param niveles: secuencia de tuplas (filas, columnas, minas)
+        :param cantidad: número de semillas que se quieren tener preparadas para cada tamaño
+        :return: el hilo creado
+        """
+        def rellenar_niveles():
+            for filas, columnas, minas in niveles:
+                self.rellenar(filas, columnas, minas, cantidad, 1)
+
+        hilo = threading.Thread(target=rellenar_niveles)
+        hilo.daemon = True
+        hilo.start()
+
+        return hilo
+
+    def guardar(self, nombre_fichero):
+        """
+        Guarda las semillas de la reserva en un fichero JSON.
+
+        :param nombre_fichero: nombre del fichero
+        """
+        with self.__cerrojo:
+            datos = dict(("%dx%dx%d" % clave, semillas) for clave, semillas in self.__semillas.items() if semillas)
+
+        with open(nombre_fichero, "wb") as fichero:
+            json.dump(datos, fichero, indent=1, sort_keys=True)
+
+    def cargar(self, nombre_fichero):
+        """
+        Añade a la reserva las semillas guardadas en un fichero JSON. Se comprueba la estructura completa del fichero
+        antes de añadir ninguna semilla, de forma que un fichero no válido no deja la reserva a medias.
+
+        :param nombre_fichero: nombre del fichero
+        :raise IOError: si no se puede abrir el fichero
+        :raise ValueError: si el fichero no tiene el formato adecuado
+        """
+        with open(nombre_fichero, "rb") as fichero:
+            datos = json.load(fichero)
+
+        if not isinstance(datos, dict):
+            raise ValueError("El fichero de la reserva no contiene un objeto JSON.")
+
+        leidas = []
+
+        for clave, semillas in datos.items():
+            dimensiones = clave.split("x")
+
+            if len(dimensiones) != 3 or not all(valor.isdigit() for valor in dimensiones):
+                raise ValueError("La clave %r no tiene el formato filasxcolumnasxminas." % clave)
+
+            if not isinstance(semillas, list) or not all(_es_semilla(semilla) for semilla in semillas):
+                raise ValueError("Las semillas de %r no son una lista de enteros entre 0 y %d." % (clave, MAX_SEMILLA))
+
+            leidas.append((tuple(int(valor) for valor in dimensiones), semillas))
+
+        for (filas, columnas, minas), semillas in leidas:
+            self.anadir(filas, columnas, minas, semillas)
+
+
+# Reserva compartida por todas las partidas del proceso
+RESERVA = ReservaDeSemillas()
+
+
+def partida_sin_adivinar(filas, columnas, minas, reserva=RESERVA, procesos=None):
+    """
+    Crea una partida con un tablero que se puede resolver sin adivinar, con la celda inicial ya abierta.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param reserva: reserva de la que se saca la semilla
+    :param procesos: número de procesos con los que se busca la semilla si no hay ninguna en la reserva
+    :return: la partida, o None si no se ha encontrado ningún tablero que se pueda resolver sin adivinar
+    """
+    semilla = reserva.obtener(filas, columnas, minas, procesos)
+
+    if semilla is None:
+        return None
+
+    partida = nueva_partida(filas, columnas, minas, semilla)
+    abrir_celda_inicial(partida)
+
+    return partida
@@ -0,0 +1,217 @@
+# coding=utf-8
+
+"""
+Formato binario para guardar tableros y partidas del Buscaminas.
+
+Un fichero guardado empieza por una cabecera de tamaño fijo (CABECERA) con la marca MAGIA, la versión del formato,
+unos indicadores, las filas, las columnas, el número de minas, la semilla y el tiempo jugado. A continuación van tres
+conjuntos de bits, uno por cada bit de estado en el orden de PLANOS, con un bit por celda en orden de índice. Todos los
+enteros se guardan en orden de bytes de red.
+
+Los ficheros se leen con mmap, de forma que sólo se copian a memoria los bytes que se usan y la conversión de los
+conjuntos de bits al buffer de estados del tablero se hace de una vez, sin recorrer las celdas en Python.
+
+Ejecutado como programa convierte entre el formato de texto de los ficheros de definición de tableros y el binario:
+
+    python guardado.py a-binario tablero.txt tablero.bmh
+    python guardado.py a-texto tablero.bmh tablero.txt
+
+Autor: Richard Albán Fernández
+"""
+
+import argparse
+import mmap
+import struct
+from ficheros import CARACTER_MINA, CARACTER_LIBRE, cargar_tablero
+from partida import Partida
+from tablero import Tablero, ABIERTA, MARCADA, MINA, empaquetar_bits, desempaquetar_bits
+
+# Marca con la que empiezan los ficheros binarios y versión del formato
+MAGIA = "BMHX"
+VERSION = 1
+
+# Cabecera: marca, versión, indicadores, filas, columnas, minas, semilla y tiempo jugado
+CABECERA = struct.Struct(">4sHHIIIQd")
+
+# Indicadores de la cabecera
+CON_SEMILLA = 1
+PRIMERA_APERTURA = 2
+VECINAS_SEGURAS = 4
+TERMINADA = 8
+GANADA = 16
+
+# Bits de estado guardados, en el orden en el que aparecen sus conjuntos de bits en el fichero
+PLANOS = (MINA, ABIERTA, MARCADA)
+
+# Tabla de traducción del buffer de estados a los caracteres del formato de texto
+_ESTADO_A_CARACTER = "".join(CARACTER_MINA if estado & MINA else CARACTER_LIBRE for estado in range(256))
+
+
+def codificar_partida(partida, tiempo=0):
+    """
+    Devuelve la codificación binaria de una partida.
+
+    :param partida: partida a codificar
+    :param tiempo: segundos jugados de la partida
+    :return: cadena de bytes con la partida codificada
+    """
+    tablero = partida.get_tablero()
+    semilla = partida.get_semilla()
+    indicadores = 0
+
+    if semilla is not None:
+        indicadores |= CON_SEMILLA
+    if partida.is_primera_apertura():
+        indicadores |= PRIMERA_APERTURA
+    if partida.is_vecinas_seguras():
+        indicadores |= VECINAS_SEGURAS
+    if partida.is_fin_de_partida():
+        indicadores |= TERMINADA
+    if partida.is_partida_ganada():
+        indicadores |= GANADA
+
+    partes = [CABECERA.pack(MAGIA, VERSION, indicadores, tablero.get_filas(), tablero.get_columnas(),
+                            partida.get_minas(), semilla or 0, tiempo)]
+    partes.extend(empaquetar_bits(tablero.get_estados(), bit) for bit in PLANOS)
+
+    return "".join(partes)
+
+
+def decodificar_partida(datos):
+    """
+    Crea una partida a partir de su codificación binaria.
+
+    :param datos: buffer con la partida codificada (una cadena de bytes o un mmap)
+    :return: tupla con la partida y los segundos que se habían jugado
+    """
+    if len(datos) < CABECERA.size:
+        raise ValueError("El fichero es demasiado corto para ser una partida guardada.")
+
+    magia, version, indicadores, filas, columnas, minas, semilla, tiempo = CABECERA.unpack_from(datos)
+
+    if magia != MAGIA:
+        raise ValueError("El fichero no es una partida guardada.")
+    if version != VERSION:
+        raise ValueError("Versión %d del formato no soportada." % version)
+
+    celdas = filas * columnas
+    tamano_plano = (celdas + 7) // 8
+
+    if len(datos) != CABECERA.size + len(PLANOS) * tamano_plano:
+        raise ValueError("El tamaño del fichero no corresponde a un tablero de %d x %d." % (filas, columnas))
+
+    planos = []
+    inicio = CABECERA.size
+
+    for bit in PLANOS:
+        planos.append((bit, datos[inicio:inicio + tamano_plano]))
+        inicio += tamano_plano
+
+    tablero = Tablero(filas, columnas)
+    tablero.set_estados(desempaquetar_bits(planos, celdas))
+
+    partida = Partida(tablero, minas, semilla if indicadores & CON_SEMILLA else None,
+                      bool(indicadores & VECINAS_SEGURAS))
+
+    if not indicadores & PRIMERA_APERTURA:
+        partida.registrar_apertura()
+
+    # Al terminar la partida se abren todas las celdas, también las minas, por lo que el resultado de una partida
+    # terminada se toma de los indicadores
+    if indicadores & TERMINADA:
+        partida.registrar_fin_de_partida(bool(indicadores & GANADA))
+    else:
+        partida.detectar_fin_de_partida()
+
+    return partida, tiempo
+
+
+def guardar_partida(partida, nombre_fichero, tiempo=0):
+    """
+    Guarda una partida en un fichero binario.
+
+    :param partida: partida a guardar
+    :param nombre_fichero: nombre del fichero
+    :param tiempo: segundos jugados de la partida
+    """
+    with open(nombre_fichero, "wb") as fichero:
+        fichero.write(codificar_partida(partida, tiempo))
+
+
+def cargar_partida(nombre_fichero):
+    """
+    Carga una partida de un fichero binario, que se lee mediante mmap.
+
+    :param nombre_fichero: nombre del fichero
+    :return: tupla con la partida y los segundos que se habían jugado
+    :raise IOError: si no se puede abrir el fichero
+    :raise ValueError: si el fichero no es una partida guardada válida
+    """
+    with open(nombre_fichero, "rb") as fichero:
+        # No se puede crear un mmap de un fichero vacío
+        if not fichero.read(1):
+            raise ValueError("El fichero está vacío.")
+
+        datos = mmap.mmap(fichero.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            return decodificar_partida(datos)
+        finally:
+            datos.close()
+
+
+def is_fichero_binario(nombre_fichero):
+    """
+    Determina si un fichero está en el formato binario, comprobando su marca.
+
+    :param nombre_fichero: nombre del fichero
+    :return: True si el fichero empieza por la marca del formato binario y False en caso contrario
+    :raise IOError: si no se puede abrir el fichero
+    """
+    with open(nombre_fichero, "rb") as fichero:
+        return fichero.read(len(MAGIA)) == MAGIA
+
+
+def convertir_a_binario(fichero_texto, fichero_binario):
+    """
+    Convierte un fichero de definición de tablero en formato de texto en una partida sin empezar en formato binario.
+
+    :param fichero_texto: nombre del fichero de texto
+    :param fichero_binario: nombre del fichero binario que se crea
+    """
+    tablero, minas = cargar_tablero(fichero_texto)
+
+    guardar_partida(Partida(tablero, minas), fichero_binario)
+
+
+def convertir_a_texto(fichero_binario, fichero_texto):
+    """
+    Convierte un fichero en formato binario en un fichero de definición de tablero en formato de texto. Sólo se
+    conservan las minas, por lo que se pierde el progreso de la partida.
+
+    :param fichero_binario: nombre del fichero binario
+    :param fichero_texto: nombre del fichero de texto que se crea
+    """
+    partida = cargar_partida(fichero_binario)[0]
+    tablero = partida.get_tablero()
+    columnas = tablero.get_columnas()
+    caracteres = str(tablero.get_estados()).translate(_ESTADO_A_CARACTER)
+
+    with open(fichero_texto, "wb") as fichero:
+        fichero.write("%d %d\n" % (tablero.get_filas(), columnas))
+
+        for inicio in range(0, len(caracteres), columnas):
+            fichero.write(caracteres[inicio:inicio + columnas] + "\n")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Convierte tableros entre el formato de texto y el binario.")
+    parser.add_argument("conversion", choices=("a-binario", "a-texto"), help="sentido de la conversión")
+    parser.add_argument("origen", help="fichero de entrada")
+    parser.add_argument("destino", help="fichero de salida")
+    argumentos = parser.parse_args()
+
+    if argumentos.conversion == "a-binario":
+        convertir_a_binario(argumentos.origen, argumentos.destino)
+    else:
+        convertir_a_texto(argumentos.origen, argumentos.destino)
@@ -0,0 +1,464 @@
+# coding=utf-8
+
+"""
+Medición opcional del tiempo que se dedica a cada etapa de un turno.
+
+Las etapas son la interpretación de las jugadas (entrada), su validación (validacion), la actualización de las minas
+por descubrir (recuento), la apertura recursiva (apertura), la detección del fin de partida (fin_de_partida) y el
+dibujo del tablero (pantalla). De cada etapa se cuentan las llamadas y se acumula su duración, tanto en total como en
+un histograma de latencias con intervalos que doblan su tamaño; de la apertura recursiva se cuentan además las
+celdas abiertas.
+
+Mientras la medición está desactivada no tiene ningún coste: activar sustituye las funciones y métodos de cada etapa
+(ETAPAS) por envoltorios que miden sus llamadas, y desactivar vuelve a dejar los originales. Las funciones de módulo
+se sustituyen en todos los módulos que las han importado, incluido el programa principal.
+
+Al final de cada turno, jugar llama a fin_de_turno, que registra la duración total de las etapas del turno y la pasa
+a los observadores añadidos con anadir_observador. Las estadísticas se pueden consultar en cualquier momento con
+get_estadisticas y volcar periódicamente en un fichero con iniciar_volcado.
+
+Autor: Richard Albán Fernández
+"""
+
+import json
+import math
+import sys
+import threading
+import timeit
+import types
+import entrada
+import pantalla
+from partida import Partida
+from tablero import Tablero
+
+# Etapas medidas: (nombre, objeto que contiene la función o el método, nombre de la función o el método)
+ETAPAS = (
+    ("entrada", entrada, "tokenizar_jugadas"),
+    ("validacion", Partida, "validar"),
+    ("recuento", Tablero, "marcar"),
+    ("recuento", Tablero, "calcular_minas_por_descubrir"),
+    ("apertura", Tablero, "abrir_region"),
+    ("fin_de_partida", Partida, "detectar_fin_de_partida"),
+    ("pantalla", pantalla, "imprimir_tablero"),
+    ("pantalla", pantalla.PantallaDiferencial, "dibujar"),
+)
+
+# Etapa en la que se registra la duración de cada turno
+TURNO = "turno"
+
+# Límite superior, en segundos, del primer intervalo de los histogramas de latencia
+PRIMER_INTERVALO = 1e-6
+
+_reloj = timeit.default_timer
+
+
+class Estadisticas():
+    """
+    Representa las mediciones de las etapas de los turnos. Se puede usar a la vez desde varios hilos.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self):
+        """
+        Se inicializan las estadísticas sin ninguna medición.
+        """
+        self.__cerrojo = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        """
+        Descarta todas las mediciones.
+        """
+        with self.__cerrojo:
+            self.__llamadas = {}
+            self.__tiempos = {}
+            self.__maximos = {}
+            self.__histogramas = {}
+            self.__celdas = {}
+            self.__turno = {}
+
+    def registrar(self, etapa, segundos, celdas=0):
+        """
+        Registra una llamada a una etapa.
+
+        :param etapa: nombre de la etapa
+        :param segundos: duración de la llamada
+        :param celdas: celdas recorridas en la llamada
+        """
+        intervalo = 0 if segundos <= PRIMER_INTERVALO else int(math.log(segundos / PRIMER_INTERVALO, 2)) + 1
+
+        with self.__cerrojo:
+            self.__llamadas[etapa] = self.__llamadas.get(etapa, 0) + 1
+            self.__tiempos[etapa] = self.__tiempos.get(etapa, 0.0) + segundos
+            self.__maximos[etapa] = max(self.__maximos.get(etapa, 0.0), segundos)
+            self.__celdas[etapa] = self.__celdas.get(etapa, 0) + celdas
+
+            if etapa != TURNO:
+                self.__turno[etapa] = self.__turno.get(etapa, 0.0) + segundos
+
+            histograma = self.__histogramas.setdefault(etapa, {})
+            histograma[intervalo] = histograma.get(intervalo, 0) + 1
+
+    def cerrar_turno(self):
+        """
+        Registra la duración total de las etapas medidas desde el turno anterior como una llamada a la etapa TURNO.
+
+        :return: diccionario con los segundos de cada etapa en el turno
+        """
+        with self.__cerrojo:
+            turno = self.__turno
+            self.__turno = {}
+
+        self.registrar(TURNO, sum(turno.values()))
+
+        return turno
+
+    def get_etapas(self):
+        """
+        Devuelve los nombres de las etapas de las que hay mediciones.
+
+        :return: lista ordenada de etapas
+        """
+        with self.__cerrojo:
+            return sorted(self.__llamadas)
+
+    def get_llamadas(self, etapa):
+        """
+        Devuelve el número de llamadas a una etapa.
+
+        :param etapa: nombre de la etapa
+        :return: número de llamadas
+        """
+        return self.__llamadas.get(etapa, 0)
+
+    def get_tiempo(self, etapa):
+        """
+        Devuelve la duración acumulada de una etapa.
+
+        :param etapa: nombre de la etapa
+        :return: segundos
+        """
+        return self.__tiempos.get(etapa, 0.0)
+
+    def get_maximo(self, etapa):
+        """
+        Devuelve la duración de la llamada más lenta a una etapa.
+
+        :param etapa: nombre de la etapa
+        :return: segundos
+        """
+        return self.__maximos.get(etapa, 0.0)
+
+    def get_celdas(self, etapa):
+        """
+        Devuelve las celdas recorridas en una etapa.
+
+        :param etapa: nombre de la etapa
+        :return: número de celdas
+        """
+        return self.__celdas.get(etapa, 0)
+
+    def get_histograma(self, etapa):
+        """
+        Devuelve el histograma de latencias de una etapa. El intervalo 0 contiene las llamadas de hasta
+        PRIMER_INTERVALO segundos y cada intervalo i siguiente las de hasta PRIMER_INTERVALO * 2 ** i segundos.
+
+        :param etapa: nombre de la etapa
+        :return: lista de tuplas (limite, llamadas) con el límite superior en segundos de cada intervalo no vacío
+        """
+        with self.__cerrojo:
+            histograma = dict(self.__histogramas.get(etapa, {}))
+
+        return [(PRIMER_INTERVALO * 2 ** intervalo, llamadas) for intervalo, llamadas in sorted(histograma.items())]
+
+    def resumen(self):
+        """
+        Devuelve todas las mediciones en tipos básicos, para mostrarlas o guardarlas.
+
+        :return: diccionario con las mediciones de cada etapa
+        """
+        resumen = {}
+
+        for etapa in self.get_etapas():
+            llamadas = self.get_llamadas(etapa)
+            resumen[etapa] = {
+                "llamadas": llamadas,
+                "segundos": self.get_tiempo(etapa),
+                "media": self.get_tiempo(etapa) / llamadas,
+                "maximo": self.get_maximo(etapa),
+                "celdas": self.get_celdas(etapa),
+                "histograma": self.get_histograma(etapa),
+            }
+
+        return resumen
+
+    def volcar(self, salida=None):
+        """
+        Escribe una tabla con las mediciones de cada etapa.
+
+        :param salida: fichero en el que se escribe; si no se indica se usa la salida estándar
+        """
+        if salida is None:
+            salida = sys.stdout
+
+        salida.write("%-16s %10s %12s %12s %12s %12s\n" % ("ETAPA", "LLAMADAS", "TOTAL (ms)", "MEDIA (ms)",
+                                                          "MAXIMO (ms)", "CELDAS"))
+
+        for etapa, datos in sorted(self.resumen().items()):
+            salida.write("%-16s %10d %12.3f %12.3f %12.3f %12d\n" % (
+                etapa, datos["llamadas"], datos["segundos"] * 1000, datos["media"] * 1000, datos["maximo"] * 1000,
+                datos["celdas"]))
+
+        salida.flush()
+
+
+# Estadísticas de la medición activa, o None si está desactivada
+_estadisticas = None
+
+# Funciones y métodos sustituidos: tuplas (objeto, nombre, original)
+_sustituidos = []
+
+# Funciones a las que se llama al final de cada turno
+_observadores = []
+
+# Temporizador del volcado periódico y fichero en el que se vuelca
+_temporizador = None
+_fichero_volcado = None
+
+
+def _envolver(etapa, funcion, estadisticas):
+    """
+    Crea el envoltorio que mide las llamadas a una función. Los generadores se miden mientras se recorren.
+
+    :param etapa: nombre de la etapa
+    :param funcion: función original
+    :param estadisticas: estadísticas en las que se registran las llamadas
+    :return: función envoltorio
+    """
+    def envoltorio(*argumentos, **opciones):
+        inicio = _reloj()
+        resultado = funcion(*argumentos, **opciones)
+
+        if isinstance(resultado, types.GeneratorType):
+            return _recorrer(etapa, resultado, _reloj() - inicio, estadisticas)
+
+        # La apertura recursiva devuelve las celdas que ha abierto
+        celdas = len(resultado) if etapa == "apertura" else 0
+        estadisticas.registrar(etapa, _reloj() - inicio, celdas)
+
+        return resultado
+
+    envoltorio.__name__ = funcion.__name__
+    envoltorio.__doc__ = funcion.__doc__
+
+    return envoltorio
+
+
+def _recorrer(etapa, generador, segundos, estadisticas):
+    """
+    Recorre un generador acumulando el tiempo que se dedica a obtener sus elementos, que se registra como una única
+    llamada al terminar, ya sea normalmente o con una excepción.
+
+    :param etapa: nombre de la etapa
+    :param generador: generador original
+    :param segundos: tiempo ya dedicado a crear el generador
+    :param estadisticas: estadísticas en las que se registra la llamada
+    :return: generador con los mismos elementos
+    """
+    try:
+        while True:
+            inicio = _reloj()
+
+            try:
+                elemento = next(generador)
+            finally:
+                segundos += _reloj() - inicio
+
+            yield elemento
+    except StopIteration:
+        pass
+    finally:
+        estadisticas.registrar(etapa, segundos)
+
+
+def _sustituir(objeto, nombre, nuevo):
+    """
+    Sustituye una función o un método. Las funciones de módulo se sustituyen también en todos los módulos que las han
+    importado.
+
+    :param objeto: módulo o clase que contiene la función
+    :param nombre: nombre de la función
+    :param nuevo: función con la que se sustituye
+    """
+    original = objeto.__dict__[nombre]
+
+    if isinstance(objeto, types.ModuleType):
+        for modulo in sys.modules.values():
+            if modulo is not None and getattr(modulo, nombre, None) is original:
+                _sustituidos.append((modulo, nombre, original))
+                setattr(modulo, nombre, nuevo)
+    else:
+        _sustituidos.append((objeto, nombre, original))
+        setattr(objeto, nombre, nuevo)
+
+
+def activar(estadisticas=None):
+    """
+    Activa la medición de las etapas, si no estaba activada.
+
+    :param estadisticas: estadísticas en las que se registran las mediciones; si no se indican se crean unas nuevas
+    :return: las estadísticas de la medición activa
+    """
+    global _estadisticas
+
+    if _estadisticas is not None:
+        return _estadisticas
+
+    _estadisticas = estadisticas or Estadisticas()
+
+    for etapa, objeto, nombre in ETAPAS:
+        _sustituir(objeto, nombre, _envolver(etapa, objeto.__dict__[nombre], _estadisticas))
+
+    return _estadisticas
+
+
+def desactivar():
+    """
+    Desactiva la medición de las etapas y deja las funciones y métodos originales.
+
+    :return: las estadísticas de la medición que estaba activa, o None si no había ninguna
+    """
+    global _estadisticas
+
+    detener_volcado()
+
+    while _sustituidos:
+        objeto, nombre, original = _sustituidos.pop()
+        setattr(objeto, nombre, original)
+
+    estadisticas = _estadisticas
+    _estadisticas = None
+
+    return estadisticas
+
+
+def get_estadisticas():
+    """
+    Devuelve las estadísticas de la medición activa.
+
+    :return: las estadísticas, o None si la medición está desactivada
+    """
+    return _estadisticas
+
+
+def anadir_observador(observador):
+    """
+    Añade una función a la que se llama al final de cada turno mientras la medición está activada.
+
+    :param observador: función que recibe un diccionario con los segundos de cada etapa en el turno
+    """
+    _observadores.append(observador)
+
+
+def quitar_observador(observador):
+    """
+    Quita una función añadida con anadir_observador.
+
+    :param observador: función a quitar
+    """
+    _observadores.remove(observador)
+
+
+def fin_de_turno():
+    """
+    Indica que ha terminado un turno. Si la medición está desactivada no hace nada.
+    """
+    if _estadisticas is None:
+        return
+
+    turno = _estadisticas.cerrar_turno()
+
+    for observador in _observadores:
+        observador(turno)
+
+
+def _guardar(nombre_fichero):
+    """
+    Guarda las estadísticas de la medición activa en un fichero JSON.
+
+    :param nombre_fichero: nombre del fichero
+    """
+    estadisticas = _estadisticas
+
+    if estadisticas is not None:
+        with open(nombre_fichero, "wb") as fichero:
+            json.dump(estadisticas.resumen(), fichero, indent=1, sort_keys=True)
+
+
+def _programar_volcado(nombre_fichero, intervalo):
+    """
+    Programa el siguiente volcado periódico.
+
+    :param nombre_fichero: nombre del fichero
+    :param intervalo: segundos hasta el volcado
+    """
+    global _temporizador
+
+    _temporizador = threading.Timer(intervalo, _volcar_periodicamente, (nombre_fichero, intervalo))
+    _temporizador.daemon = True
+    _temporizador.start()
+
+
+def _volcar_periodicamente(nombre_fichero, intervalo):
+    """
+    Guarda las estadísticas en un fichero JSON y programa el siguiente volcado.
+
+    :param nombre_fichero: nombre del fichero
+    :param intervalo: segundos entre volcados
+    """
+    if _fichero_volcado == nombre_fichero:
+        _guardar(nombre_fichero)
+        _programar_volcado(nombre_fichero, intervalo)
+
+
+def iniciar_volcado(nombre_fichero, intervalo=60):
+    """
+    Guarda periódicamente las estadísticas de la medición activa en un fichero JSON, que se sobrescribe cada vez.
+
+    :param nombre_fichero: nombre del fichero
+    :param intervalo: segundos entre volcados
+    """
+    global _fichero_volcado
+
+    detener_volcado()
+
+    _fichero_volcado = nombre_fichero
+    _programar_volcado(nombre_fichero, intervalo)
+
+
+def detener_volcado():
+    """
+    Detiene el volcado periódico, si lo había, y hace un último volcado con las estadísticas finales.
+    """
+    global _temporizador, _fichero_volcado
+
+    if _fichero_volcado is None:
+        return
+
+    nombre_fichero = _fichero_volcado
+    _fichero_volcado = None
+
+    # Se espera al hilo del temporizador para que no siga vivo al terminar el programa; si estaba volcando puede
+    # haber programado otro temporizador antes de ver que el volcado se ha detenido
+    while _temporizador is not None:
+        temporizador = _temporizador
+        temporizador.cancel()
+
+        if temporizador is not threading.current_thread():
+            temporizador.join()
+
+        if _temporizador is temporizador:
+            _temporizador = None
+
+    _guardar(nombre_fichero)
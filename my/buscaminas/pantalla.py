@@ -0,0 +1,440 @@
+# coding=utf-8
+
+"""
+Dibujo del tablero del Buscaminas en la consola.
+
+Cada imagen del tablero se compone entera en memoria y se escribe de una sola vez en la salida. Las líneas de borde
+dependen sólo del número de columnas, por lo que se calculan una vez para cada ancho, y el carácter de cada celda se
+obtiene de una tabla indexada por los bits de estado de la celda y su número de minas por descubrir.
+
+En los tableros grandes sólo se muestra una vista (ventana) de como mucho FILAS_VISTA x COLUMNAS_VISTA celdas, que se
+desplaza por el tablero. Si el tablero no cabe en los nombres de un carácter, las filas y las columnas se nombran con
+su número.
+
+Con PantallaDiferencial, después de la primera imagen sólo se envían las secuencias ANSI necesarias para reescribir
+las celdas que han cambiado y la línea de estado, por lo que lo enviado en cada turno depende del tamaño del cambio y
+no del tamaño del tablero.
+
+Autor: Richard Albán Fernández
+"""
+
+import sys
+from array import array
+from tablero import ABIERTA, MARCADA, MINA
+
+# Caracteres para el nombre de las filas y las columnas
+NOMBRE_FILAS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ@#$%&"  # type: str
+NOMBRE_COLUMNAS = "abcdefghijklmnopqrstuvwxyz=+-:/"  # type: str
+
+# Caracteres para dibujar cuadros
+COE = u'\u2500'  # ─
+CNS = u'\u2502'  # │
+CES = u'\u250C'  # ┌
+CSO = u'\u2510'  # ┐
+CNE = u'\u2514'  # └
+CON = u'\u2518'  # ┘
+COES = u'\u252C'  # ┬
+CNES = u'\u251C'  # ├
+CONS = u'\u2524'  # ┤
+CONE = u'\u2534'  # ┴
+CSOM = u'\u2593'  # ▒
+
+# Máximo número de celdas vecinas, que acota el número de minas por descubrir entre -6 y 6
+MAX_VECINAS = 6
+
+
+def _calcular_caracter(estado, minas_por_descubrir):
+    """
+    Devuelve el caracter a imprimir para una celda, tal y como se especifica en el enunciado.
+
+    :param estado: bits de estado de la celda
+    :param minas_por_descubrir: número de minas por descubrir de la celda
+    :return: caracter a imprimir según el estado de la celda
+    """
+    if not estado & ABIERTA:
+        return "X" if estado & MARCADA else CSOM
+
+    if estado & MARCADA and not estado & MINA:
+        return "#"
+    if not estado & MARCADA and estado & MINA:
+        return "*"
+
+    if minas_por_descubrir == 0:
+        return " "
+    elif minas_por_descubrir < 0:
+        return "?"
+
+    return unicode(minas_por_descubrir)
+
+
+# Tabla con el carácter de cada celda: CARACTERES[estado][minas_por_descubrir + MAX_VECINAS]
+CARACTERES = [[_calcular_caracter(estado, n) for n in range(-MAX_VECINAS, MAX_VECINAS + 1)]
+              for estado in range((ABIERTA | MARCADA | MINA) + 1)]
+
+# Misma tabla aplanada, indexada por la clave de la celda: estado * VALORES_POR_ESTADO + minas_por_descubrir + MAX_VECINAS
+VALORES_POR_ESTADO = 2 * MAX_VECINAS + 1
+_CARACTERES_POR_CLAVE = [caracter for caracteres in CARACTERES for caracter in caracteres]
+
+# Misma tabla con el texto completo que ocupa cada celda en su fila
+_TEXTOS_CELDA = [[u" " + caracter + u" " + CNS for caracter in caracteres] for caracteres in CARACTERES]
+
+# Secuencias ANSI de control del terminal
+BORRAR_PANTALLA = u"\x1b[H\x1b[2J"
+BORRAR_LINEA = u"\x1b[K"
+BORRAR_HASTA_EL_FINAL = u"\x1b[J"
+
+# Número de filas y columnas que se muestran como máximo a la vez; el resto del tablero se recorre desplazando la vista
+FILAS_VISTA = 30
+COLUMNAS_VISTA = 30
+
+# Líneas fijas del tablero ya calculadas, indexadas por el número de columnas y la sangría
+_BORDES = {}
+
+
+def get_caracter(estado, minas_por_descubrir):
+    """
+    Devuelve el caracter a imprimir para una celda a partir de su estado y su número de minas por descubrir.
+
+    :param estado: bits de estado de la celda
+    :param minas_por_descubrir: número de minas por descubrir de la celda
+    :return: caracter a imprimir según el estado de la celda
+    """
+    return CARACTERES[estado][minas_por_descubrir + MAX_VECINAS]
+
+
+def get_ancho_nombres(filas, columnas):
+    """
+    Devuelve el ancho del nombre de las filas de un tablero. Si el tablero cabe en los nombres de un carácter de
+    NOMBRE_FILAS y NOMBRE_COLUMNAS el ancho es 0, y en caso contrario las filas y columnas se nombran con su número y
+    el ancho es el del número de la última fila.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :return: 0 si se usan nombres de un carácter, o el número de dígitos del nombre de las filas
+    """
+    if filas <= len(NOMBRE_FILAS) and columnas <= len(NOMBRE_COLUMNAS):
+        return 0
+
+    return len(str(filas - 1))
+
+
+def get_bordes(columnas, sangria=0):
+    """
+    Devuelve las líneas del tablero que sólo dependen del número de columnas mostradas, calculándolas la primera vez.
+
+    :param columnas: número de columnas mostradas
+    :param sangria: espacios que se añaden al inicio de cada línea cuando el nombre de las filas ocupa más de un carácter
+    :return: tupla con los bordes superiores antes de una fila par y antes de una impar, los separadores tras una fila
+    par y tras una impar y los bordes inferiores tras una fila par y tras una impar, todos ellos terminados en salto de
+    línea
+    """
+    bordes = _BORDES.get((columnas, sangria))
+
+    if bordes is None:
+        margen = u" " * sangria
+        bordes = (
+            margen + u"    " + CES + COE*3 + (COES + COE*3)*(columnas - 1) + CSO + u"\n",
+            margen + u"  " + CES + COE*3 + (COES + COE*3)*(columnas - 1) + CSO + u"\n",
+            margen + u"  " + CES + COE + CONE + COE + COES + (COE + CONE + COE + COES)*(columnas - 1) + COE + CON + u"\n",
+            margen + u"  " + CNE + COE + COES + COE + CONE + (COE + COES + COE + CONE)*(columnas - 1) + COE + CSO + u"\n",
+            margen + u"    " + CNE + COE*3 + (CONE + COE*3)*(columnas - 1) + CON + u"\n",
+            margen + u"  " + CNE + COE*3 + (CONE + COE*3)*(columnas - 1) + CON + u"\n",
+        )
+        _BORDES[(columnas, sangria)] = bordes
+
+    return bordes
+
+
+def componer_nombres_columnas(inicio, columnas, ancho):
+    """
+    Devuelve la línea con los nombres de las columnas mostradas. Con nombres numéricos sólo se muestran las tres
+    últimas cifras de cada columna.
+
+    :param inicio: primera columna mostrada
+    :param columnas: número de columnas mostradas
+    :param ancho: ancho del nombre de las filas, 0 si se usan nombres de un carácter
+    :return: línea de nombres terminada en salto de línea
+    """
+    if not ancho:
+        return u"    " + u"".join(u" " + nombre + u"  " for nombre in NOMBRE_COLUMNAS[inicio:inicio + columnas]) + u"\n"
+
+    return u" " * (ancho + 3) + u"".join(u"%3d " % (j % 1000) for j in range(inicio, inicio + columnas)) + u"\n"
+
+
+def get_ventana(tablero, ventana=None):
+    """
+    Devuelve la parte del tablero que se muestra, ajustada a las dimensiones del tablero.
+
+    :param tablero: tablero que se muestra
+    :param ventana: tupla (fila, columna, filas, columnas) con la primera celda y el tamaño de la parte mostrada; si no
+    se indica se muestra el tablero completo
+    :return: tupla (fila, columna, filas, columnas) dentro del tablero
+    """
+    filas = tablero.get_filas()
+    columnas = tablero.get_columnas()
+
+    if ventana is None:
+        return 0, 0, filas, columnas
+
+    fila, columna, alto, ancho = ventana
+    alto = max(1, min(alto, filas))
+    ancho = max(1, min(ancho, columnas))
+
+    return min(max(fila, 0), filas - alto), min(max(columna, 0), columnas - ancho), alto, ancho
+
+
+def centrar_ventana(tablero, fila, columna, alto=FILAS_VISTA, ancho=COLUMNAS_VISTA):
+    """
+    Devuelve una vista del tamaño indicado centrada, en la medida de lo posible, en una celda.
+
+    :param tablero: tablero que se muestra
+    :param fila: fila de la celda
+    :param columna: columna de la celda
+    :param alto: número máximo de filas mostradas
+    :param ancho: número máximo de columnas mostradas
+    :return: tupla (fila, columna, filas, columnas) con la vista
+    """
+    return get_ventana(tablero, (fila - alto // 2, columna - ancho // 2, alto, ancho))
+
+
+def seguir_celda(tablero, ventana, fila, columna):
+    """
+    Devuelve la vista desplazada lo mínimo necesario para que se muestre una celda.
+
+    :param tablero: tablero que se muestra
+    :param ventana: vista actual
+    :param fila: fila de la celda
+    :param columna: columna de la celda
+    :return: tupla (fila, columna, filas, columnas) con la vista
+    """
+    fila_inicio, columna_inicio, alto, ancho = get_ventana(tablero, ventana)
+
+    if fila < fila_inicio:
+        fila_inicio = fila
+    elif fila >= fila_inicio + alto:
+        fila_inicio = fila - alto + 1
+
+    if columna < columna_inicio:
+        columna_inicio = columna
+    elif columna >= columna_inicio + ancho:
+        columna_inicio = columna - ancho + 1
+
+    return get_ventana(tablero, (fila_inicio, columna_inicio, alto, ancho))
+
+
+def componer_estado(partida, tiempo, ventana=None):
+    """
+    Devuelve la línea con las minas, las celdas marcadas y el tiempo de la partida. Si sólo se muestra una parte del
+    tablero, se indican también las filas y columnas mostradas.
+
+    :param partida: partida de la que se muestra el estado
+    :param tiempo: tiempo transcurrido desde el inicio de la partida
+    :param ventana: parte del tablero que se muestra; si no se indica se muestra el tablero completo
+    :return: línea de estado, sin salto de línea
+    """
+    estado = u"MINAS RESTANTES: %2d | MARCADAS: %2d | TIEMPO: %.1f" % (partida.get_minas(),
+                                                                        partida.get_celdas_marcadas(), tiempo)
+    tablero = partida.get_tablero()
+    fila, columna, alto, ancho = get_ventana(tablero, ventana)
+
+    if (alto, ancho) != (tablero.get_filas(), tablero.get_columnas()):
+        estado += u" | VISTA: FILAS %d-%d, COLUMNAS %d-%d" % (fila, fila + alto - 1, columna, columna + ancho - 1)
+
+    return estado
+
+
+def componer_tablero(partida, tiempo, ventana=None):
+    """
+    Compone la imagen del tablero de una partida, incluida la línea de estado.
+
+    :param partida: partida cuyo tablero se compone
+    :param tiempo: tiempo transcurrido desde el inicio de la partida
+    :param ventana: tupla (fila, columna, filas, columnas) con la parte del tablero que se muestra; si no se indica se
+    compone el tablero completo
+    :return: cadena unicode con la imagen del tablero
+    """
+    tablero = partida.get_tablero()
+    columnas = tablero.get_columnas()
+    estados = tablero.get_estados()
+    contadores = tablero.get_contadores()
+    fila_inicio, columna_inicio, alto, ancho = get_ventana(tablero, ventana)
+    ancho_nombres = get_ancho_nombres(tablero.get_filas(), columnas)
+    superior_par, superior_impar, separador_par, separador_impar, inferior_par, inferior_impar = \
+        get_bordes(ancho, max(ancho_nombres - 1, 0))
+
+    lineas = [componer_estado(partida, tiempo, ventana) + u"\n",
+              componer_nombres_columnas(columna_inicio, ancho, ancho_nombres),
+              superior_par if fila_inicio % 2 == 0 else superior_impar]
+
+    for i in range(fila_inicio, fila_inicio + alto):
+        inicio = i * columnas + columna_inicio
+        textos = [_TEXTOS_CELDA[estados[k]][contadores[k] + MAX_VECINAS] for k in range(inicio, inicio + ancho)]
+        nombre = u"%*d" % (ancho_nombres, i) if ancho_nombres else NOMBRE_FILAS[i]
+
+        lineas.append(nombre + (u"   " if i % 2 == 0 else u" ") + CNS + u"".join(textos) + u"\n")
+
+        if i != fila_inicio + alto - 1:
+            lineas.append(separador_par if i % 2 == 0 else separador_impar)
+        else:
+            lineas.append(inferior_par if i % 2 == 0 else inferior_impar)
+
+    lineas.append(u"\n")
+
+    return u"".join(lineas)
+
+
+def escribir(texto, salida=None):
+    """
+    Escribe un texto unicode en la salida de una sola vez, codificado según la codificación de la salida.
+
+    :param texto: texto a escribir
+    :param salida: fichero en el que se escribe; si no se indica se usa la salida estándar
+    """
+    if salida is None:
+        salida = sys.stdout
+
+    salida.write(texto.encode(getattr(salida, "encoding", None) or "utf-8"))
+    salida.flush()
+
+
+def imprimir_tablero(partida, tiempo, salida=None, ventana=None):
+    """
+    Imprime el tablero de la partida que se pasa como parámetro con una única escritura.
+
+    :param partida: partida cuyo tablero se imprime
+    :param tiempo: tiempo transcurrido desde el inicio de la partida
+    :param salida: fichero en el que se imprime; si no se indica se usa la salida estándar
+    :param ventana: parte del tablero que se imprime; si no se indica se imprime el tablero completo
+    """
+    escribir(componer_tablero(partida, tiempo, ventana), salida)
+
+
+def mover_cursor(linea, columna):
+    """
+    Devuelve la secuencia ANSI que mueve el cursor a una posición del terminal.
+
+    :param linea: línea de destino, empezando en 1
+    :param columna: columna de destino, empezando en 1
+    :return: secuencia de control
+    """
+    return u"\x1b[%d;%dH" % (linea, columna)
+
+
+class PantallaDiferencial():
+    """
+    Dibuja el tablero de una partida en un terminal ANSI recordando el carácter mostrado en cada celda, de forma que
+    en cada turno sólo se reescriben las celdas que han cambiado y la línea de estado.
+
+    La imagen completa se dibuja desde la esquina superior izquierda del terminal, por lo que la línea de estado
+    ocupa la línea 1 y la i-ésima fila mostrada la línea 4 + 2 * i. Tras cada dibujo el cursor queda en la línea
+    siguiente a la imagen, con el resto de la pantalla borrado. Sólo se recuerdan las celdas de la parte del tablero
+    que se muestra, y al cambiar ésta se vuelve a dibujar la imagen completa.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, salida=None):
+        """
+        Se inicializa la pantalla sin ninguna imagen dibujada.
+
+        :param salida: fichero en el que se dibuja; si no se indica se usa la salida estándar
+        """
+        self.__salida = salida
+        self.__claves = None
+        self.__dimensiones = None
+        self.__ventana = None
+
+    def dibujar(self, partida, tiempo, cambiadas=None, ventana=None):
+        """
+        Dibuja el tablero de una partida. Si no se indican las celdas cambiadas, o el tablero o la parte mostrada no
+        son los de la imagen anterior, se dibuja la imagen completa; en caso contrario sólo se reescriben las celdas
+        indicadas cuyo carácter haya cambiado.
+
+        :param partida: partida cuyo tablero se dibuja
+        :param tiempo: tiempo transcurrido desde el inicio de la partida
+        :param cambiadas: índices de las celdas que han podido cambiar desde el dibujo anterior
+        :param ventana: parte del tablero que se muestra; si no se indica se muestra el tablero completo
+        """
+        tablero = partida.get_tablero()
+        dimensiones = (tablero.get_filas(), tablero.get_columnas())
+        ventana = get_ventana(tablero, ventana)
+
+        if cambiadas is None or self.__claves is None or dimensiones != self.__dimensiones or \
+                ventana != self.__ventana:
+            self.__dimensiones = dimensiones
+            self.__ventana = ventana
+            texto = self.__dibujar_completo(partida, tiempo)
+        else:
+            texto = self.__dibujar_cambios(partida, tiempo, cambiadas)
+
+        escribir(texto, self.__salida)
+
+    def __dibujar_completo(self, partida, tiempo):
+        """
+        Compone la imagen completa de la parte mostrada del tablero y guarda la clave de cada una de sus celdas.
+
+        :param partida: partida cuyo tablero se dibuja
+        :param tiempo: tiempo transcurrido desde el inicio de la partida
+        :return: texto a enviar al terminal
+        """
+        tablero = partida.get_tablero()
+        estados = tablero.get_estados()
+        contadores = tablero.get_contadores()
+        columnas = tablero.get_columnas()
+        fila_inicio, columna_inicio, alto, ancho = self.__ventana
+
+        self.__claves = claves = array('B')
+
+        for i in range(fila_inicio, fila_inicio + alto):
+            inicio = i * columnas + columna_inicio
+            claves.extend([estados[k] * VALORES_POR_ESTADO + contadores[k] + MAX_VECINAS
+                           for k in range(inicio, inicio + ancho)])
+
+        return BORRAR_PANTALLA + componer_tablero(partida, tiempo, self.__ventana)
+
+    def __dibujar_cambios(self, partida, tiempo, cambiadas):
+        """
+        Compone las secuencias que reescriben la línea de estado y las celdas cambiadas de la parte mostrada.
+
+        :param partida: partida cuyo tablero se dibuja
+        :param tiempo: tiempo transcurrido desde el inicio de la partida
+        :param cambiadas: índices de las celdas que han podido cambiar desde el dibujo anterior
+        :return: texto a enviar al terminal
+        """
+        tablero = partida.get_tablero()
+        estados = tablero.get_estados()
+        contadores = tablero.get_contadores()
+        claves = self.__claves
+        columnas = self.__dimensiones[1]
+        fila_inicio, columna_inicio, alto, ancho = self.__ventana
+        sangria = max(get_ancho_nombres(*self.__dimensiones) - 1, 0)
+
+        partes = [mover_cursor(1, 1), componer_estado(partida, tiempo, self.__ventana), BORRAR_LINEA]
+
+        for k in cambiadas:
+            i, j = divmod(k, columnas)
+            i -= fila_inicio
+            j -= columna_inicio
+
+            if not (0 <= i < alto and 0 <= j < ancho):
+                continue
+
+            clave = estados[k] * VALORES_POR_ESTADO + contadores[k] + MAX_VECINAS
+            posicion = i * ancho + j
+
+            if clave != claves[posicion]:
+                anterior = claves[posicion]
+                claves[posicion] = clave
+
+                # Distintas claves pueden tener el mismo carácter, como una celda cerrada cuyas vecinas cambian
+                if _CARACTERES_POR_CLAVE[clave] == _CARACTERES_POR_CLAVE[anterior]:
+                    continue
+
+                # El carácter de la celda está tras el nombre de la fila, su sangría y los bordes de las celdas previas
+                partes.append(mover_cursor(4 + 2 * i, (7 if (i + fila_inicio) % 2 == 0 else 5) + sangria + 4 * j))
+                partes.append(_CARACTERES_POR_CLAVE[clave])
+
+        partes.append(mover_cursor(5 + 2 * alto, 1))
+        partes.append(BORRAR_HASTA_EL_FINAL)
+
+        return u"".join(partes)
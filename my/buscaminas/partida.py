@@ -0,0 +1,567 @@
+# coding=utf-8
+
+"""
+Motor de una partida de Buscaminas, independiente de la entrada y salida por consola.
+
+Una partida se crea con nueva_partida (o directamente con Partida a partir de un tablero ya creado) y se juega
+aplicando jugadas de la forma (fila, columna, accion), donde la acción es MARCAR o ABRIR. Cada jugada devuelve un
+Resultado con un código de error (NINGUNO si la jugada es válida), las celdas abiertas y si la partida ha terminado.
+Con aplicar_lote se aplica de una vez una secuencia de jugadas, que se detiene en la primera jugada no válida o al
+terminar la partida, y devuelve un único Resultado para todo el lote.
+Las jugadas realizadas se pueden deshacer y rehacer una a una con deshacer y rehacer. Para ello la partida guarda un
+historial en el que cada jugada anota sólo las celdas que ha cambiado (la celda marcada, las celdas abiertas y las
+minas colocadas o movidas con la primera apertura), de forma que deshacer una jugada cuesta lo mismo que hacerla y la
+memoria del historial depende del número de jugadas y no del tamaño del tablero.
+Los mensajes que se muestran al jugador para cada código de error están en MENSAJES.
+
+Autor: Richard Albán Fernández
+"""
+
+import random
+import time
+from tablero import Tablero, colocar_minas, ABIERTA, MARCADA
+
+# Acciones que se pueden realizar sobre una celda
+MARCAR = "!"
+ABRIR = "*"
+
+# Códigos de error de una jugada
+NINGUNO = 0
+ENTRADA_ERRONEA = 1
+DEMASIADAS_MARCAS = 2
+MARCAR_CELDA_ABIERTA = 3
+ABRIR_CELDA_MARCADA = 4
+MARCAS_INSUFICIENTES = 5
+PARTIDA_TERMINADA = 6
+
+# Mensajes asociados a cada código de error
+MENSAJES = {
+    ENTRADA_ERRONEA: "ENTRADA ERRONEA",
+    DEMASIADAS_MARCAS: "NO SE PUEDEN MARCAR MAS CELDAS QUE MINAS",
+    MARCAR_CELDA_ABIERTA: "NO SE PUEDE MARCAR UNA CELDA ABIERTA",
+    ABRIR_CELDA_MARCADA: "NO SE PUEDE ABRIR UNA CELDA MARCADA",
+    MARCAS_INSUFICIENTES: "CELDA YA ABIERTA. NO SE PUEDEN ABRIR LAS CELDAS VECINAS POR NUMERO INSUFICIENTE DE MARCAS",
+    PARTIDA_TERMINADA: "LA PARTIDA YA HA TERMINADO",
+}
+
+# Niveles de dificultad predefinidos: (filas, columnas, minas)
+NIVELES = ((9, 9, 10), (16, 16, 40), (16, 30, 99))
+
+# Mayor semilla admitida; las semillas se guardan en las partidas y grabaciones como enteros sin signo de 64 bits
+MAX_SEMILLA = 2 ** 64 - 1
+
+
+def nueva_partida(filas, columnas, minas, semilla=None, vecinas_seguras=True):
+    """
+    Crea una partida con un tablero aleatorio de las dimensiones y minas indicadas. Las minas se colocan al abrir la
+    primera celda, de forma que ni esa celda ni, si es posible, sus vecinas tengan mina.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param semilla: semilla del generador de números aleatorios con el que se colocan las minas; si no se indica se
+    elige una al azar, que queda guardada en la partida para poder reproducirla
+    :param vecinas_seguras: determina si las vecinas de la primera celda abierta también quedan libres de minas
+    :return: la partida creada
+    :raise ValueError: si las minas no caben en el tablero o la semilla no es un entero entre 0 y MAX_SEMILLA
+    """
+    if not 0 <= minas <= filas * columnas:
+        raise ValueError("El número de minas no cabe en el tablero.")
+
+    if semilla is None:
+        semilla = random.SystemRandom().getrandbits(63)
+
+    return Partida(Tablero(filas, columnas), minas, semilla, vecinas_seguras)
+
+
+class Resultado():
+    """
+    Representa el resultado de aplicar una jugada a una partida.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, error, abiertas=(), cambiadas=(), fin_de_partida=False, partida_ganada=False, aplicadas=0):
+        """
+        Se inicializa el resultado de una jugada o de un lote de jugadas.
+
+        :param error: código de error de la jugada (NINGUNO si la jugada es válida)
+        :param abiertas: índices de las celdas que ha abierto la jugada
+        :param cambiadas: índices de las celdas cuyo aspecto ha podido cambiar con la jugada
+        :param fin_de_partida: indica si la partida ha terminado tras la jugada
+        :param partida_ganada: indica si la partida se ha ganado
+        :param aplicadas: número de jugadas que se han realizado
+        """
+        self.__error = error
+        self.__abiertas = abiertas
+        self.__cambiadas = cambiadas
+        self.__fin_de_partida = fin_de_partida
+        self.__partida_ganada = partida_ganada
+        self.__aplicadas = aplicadas
+
+    def get_error(self):
+        """
+        Devuelve el código de error de la jugada.
+
+        :return: código de error, NINGUNO si la jugada es válida
+        """
+        return self.__error
+
+    def is_valida(self):
+        """
+        Determina si la jugada era válida y se ha realizado.
+
+        :return: True si la jugada es válida y False en caso contrario
+        """
+        return self.__error == NINGUNO
+
+    def get_abiertas(self):
+        """
+        Devuelve los índices de las celdas que ha abierto la jugada.
+
+        :return: índices de las celdas abiertas
+        """
+        return self.__abiertas
+
+    def get_cambiadas(self):
+        """
+        Devuelve los índices de las celdas cuyo aspecto ha podido cambiar con la jugada: las celdas abiertas o, al
+        marcar, la celda marcada y sus vecinas. Si la partida ha terminado se abren todas las celdas, por lo que
+        cualquiera de ellas puede haber cambiado.
+
+        :return: índices de las celdas que han podido cambiar
+        """
+        return self.__cambiadas
+
+    def is_fin_de_partida(self):
+        """
+        Determina si la partida ha terminado tras la jugada.
+
+        :return: True si la partida ha terminado y False en caso contrario
+        """
+        return self.__fin_de_partida
+
+    def is_partida_ganada(self):
+        """
+        Determina si la partida se ha ganado.
+
+        :return: True si la partida se ha ganado y False en caso contrario
+        """
+        return self.__partida_ganada
+
+    def get_aplicadas(self):
+        """
+        Devuelve el número de jugadas que se han realizado. En un lote, son las jugadas anteriores a la primera no
+        válida o hasta la que ha terminado la partida.
+
+        :return: número de jugadas realizadas
+        """
+        return self.__aplicadas
+
+
+class Partida():
+    """
+    Representa una partida del juego Buscaminas. Reúne todo el estado propio de una partida (tablero, número de minas,
+    celdas marcadas, tiempo y si ya se ha abierto alguna celda), de forma que se pueden jugar varias partidas a la vez
+    en un mismo proceso.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, tablero, minas, semilla=None, vecinas_seguras=True):
+        """
+        Se inicializa la partida con el tablero y el número de minas indicados. La partida no ha empezado a contar el
+        tiempo y todavía no se ha abierto ninguna celda.
+
+        Si se indica una semilla, el tablero se recibe sin minas y éstas se colocan al abrir la primera celda con un
+        generador de números aleatorios propio de la partida, evitando esa celda y, si vecinas_seguras es True y hay
+        sitio, también sus vecinas. En caso contrario el tablero ya tiene sus minas, y si la primera celda abierta
+        tiene mina, ésta se mueve a otra celda.
+
+        :param tablero: tablero sobre el que se juega la partida
+        :param minas: número de minas del tablero
+        :param semilla: semilla del generador de números aleatorios con el que colocar las minas, entre 0 y MAX_SEMILLA
+        :param vecinas_seguras: determina si las vecinas de la primera celda abierta también quedan libres de minas
+        :raise ValueError: si la semilla no es un entero entre 0 y MAX_SEMILLA
+        """
+        if semilla is not None and not (isinstance(semilla, (int, long)) and 0 <= semilla <= MAX_SEMILLA):
+            raise ValueError("La semilla debe ser un entero entre 0 y %d." % MAX_SEMILLA)
+
+        self.__tablero = tablero
+        self.__minas = minas
+        self.__semilla = semilla
+        self.__generador = random.Random(semilla) if semilla is not None else None
+        self.__vecinas_seguras = vecinas_seguras
+        self.__tiempo_inicio = None
+        self.__primera_apertura = True
+        self.__fin_de_partida = False
+        self.__partida_ganada = False
+
+        # Cada jugada realizada se anota como una tupla (fila, columna, accion, abiertas, colocadas, movida,
+        # primera_apertura, reveladas) con las celdas abiertas, las minas colocadas o el destino de la mina movida en
+        # la primera apertura, si la jugada era la primera apertura y las celdas abiertas al terminar la partida
+        self.__historial = []
+        self.__rehacer = []
+
+    def get_tablero(self):
+        """
+        Devuelve el tablero de la partida.
+
+        :return: tablero de la partida
+        """
+        return self.__tablero
+
+    def get_minas(self):
+        """
+        Devuelve el número de minas de la partida.
+
+        :return: número de minas
+        """
+        return self.__minas
+
+    def get_semilla(self):
+        """
+        Devuelve la semilla con la que se colocan las minas de la partida.
+
+        :return: semilla de la partida, o None si el tablero se creó con sus minas ya colocadas
+        """
+        return self.__semilla
+
+    def is_vecinas_seguras(self):
+        """
+        Determina si las vecinas de la primera celda abierta quedan libres de minas al colocarlas.
+
+        :return: True si las vecinas de la primera celda abierta quedan libres de minas y False en caso contrario
+        """
+        return self.__vecinas_seguras
+
+    def get_huella(self):
+        """
+        Devuelve la huella de las minas del tablero de la partida.
+
+        :return: cadena hexadecimal con la huella del tablero
+        """
+        return self.__tablero.huella()
+
+    def get_celdas_marcadas(self):
+        """
+        Devuelve la cantidad de celdas que están marcadas en el tablero de la partida.
+
+        :return: número de celdas marcadas
+        """
+        return self.__tablero.get_marcadas()
+
+    def is_primera_apertura(self):
+        """
+        Determina si todavía no se ha abierto ninguna celda en la partida.
+
+        :return: True si no se ha abierto ninguna celda y False en caso contrario
+        """
+        return self.__primera_apertura
+
+    def registrar_apertura(self):
+        """
+        Establece que ya se ha abierto alguna celda en la partida.
+        """
+        self.__primera_apertura = False
+
+    def registrar_fin_de_partida(self, partida_ganada):
+        """
+        Establece que la partida ha terminado, con el resultado indicado. Se usa al restaurar una partida terminada, en
+        la que ya se han abierto todas las celdas y el resultado no se puede deducir del tablero.
+
+        :param partida_ganada: True si la partida se ganó y False si se perdió
+        """
+        self.__fin_de_partida = True
+        self.__partida_ganada = partida_ganada
+
+    def is_fin_de_partida(self):
+        """
+        Determina si la partida ha terminado.
+
+        :return: True si la partida ha terminado y False en caso contrario
+        """
+        return self.__fin_de_partida
+
+    def is_partida_ganada(self):
+        """
+        Determina si la partida se ha ganado.
+
+        :return: True si la partida se ha ganado y False en caso contrario
+        """
+        return self.__partida_ganada
+
+    def iniciar_tiempo(self, transcurrido=0):
+        """
+        Empieza a contar el tiempo de la partida.
+
+        :param transcurrido: segundos que ya se habían jugado, al continuar una partida guardada
+        """
+        self.__tiempo_inicio = time.time() - transcurrido
+
+    def get_tiempo(self):
+        """
+        Devuelve el tiempo transcurrido desde el inicio de la partida.
+
+        :return: segundos transcurridos, o 0 si la partida todavía no ha empezado a contar el tiempo
+        """
+        if self.__tiempo_inicio is None:
+            return 0
+
+        return time.time() - self.__tiempo_inicio
+
+    def aplicar(self, jugada):
+        """
+        Valida y realiza una jugada. Si la partida termina con la jugada, se abren todas las celdas del tablero.
+
+        :param jugada: tupla (fila, columna, accion) con la jugada a realizar
+        :return: Resultado de la jugada
+        """
+        return self.aplicar_lote((jugada,))
+
+    def aplicar_lote(self, jugadas):
+        """
+        Valida y realiza una secuencia de jugadas en orden, deteniéndose en la primera jugada no válida o cuando
+        termina la partida. Las minas por descubrir se actualizan de forma incremental con cada jugada y la detección
+        del fin de partida no depende del tamaño del tablero, por lo que el coste del lote es el de sus jugadas. Si la
+        partida termina, se abren todas las celdas del tablero una única vez al final del lote.
+
+        :param jugadas: secuencia de tuplas (fila, columna, accion) con las jugadas a realizar
+        :return: Resultado del lote, con el error de la jugada que lo ha detenido (NINGUNO si todas son válidas), las
+        celdas abiertas y cambiadas por todas las jugadas realizadas y el número de éstas
+        """
+        tablero = self.__tablero
+        error = NINGUNO
+        abiertas = []
+        cambiadas = []
+        aplicadas = 0
+
+        for fila, columna, accion in jugadas:
+            error = self.validar(fila, columna, accion)
+
+            if error != NINGUNO:
+                break
+
+            abiertas_jugada = self.hacer(fila, columna, accion)
+            aplicadas += 1
+            abiertas.extend(abiertas_jugada)
+
+            if accion == MARCAR:
+                indice = tablero.indice(fila, columna)
+                cambiadas.append(indice)
+                cambiadas.extend(tablero.get_vecinas(indice))
+            else:
+                cambiadas.extend(abiertas_jugada)
+
+            if self.detectar_fin_de_partida()[0]:
+                break
+
+        if aplicadas:
+            self.__rehacer = []
+
+        if self.__fin_de_partida and aplicadas:
+            # Las celdas abiertas al terminar la partida se anotan con la última jugada
+            self.__historial[-1] = self.__historial[-1][:-1] + (tablero.abrir_todas(),)
+
+        return Resultado(error, abiertas, cambiadas, self.__fin_de_partida, self.__partida_ganada, aplicadas)
+
+    def validar(self, fila, columna, accion):
+        """
+        Determina si una jugada es válida o no, teniendo en cuenta las condiciones del enunciado.
+
+        :param fila: fila de la celda
+        :param columna: columna de la celda
+        :param accion: acción a realizar (MARCAR o ABRIR)
+        :return: NINGUNO si la jugada es válida o el código de error correspondiente en caso contrario
+        """
+        tablero = self.__tablero
+
+        if self.__fin_de_partida:
+            return PARTIDA_TERMINADA
+
+        if not 0 <= fila < tablero.get_filas() or not 0 <= columna < tablero.get_columnas() or \
+                accion not in (MARCAR, ABRIR):
+            return ENTRADA_ERRONEA
+
+        indice = tablero.indice(fila, columna)
+        estado = tablero.get_estados()[indice]
+
+        if accion == MARCAR:
+            if not estado & MARCADA:
+                if tablero.get_marcadas() + 1 > self.__minas:
+                    return DEMASIADAS_MARCAS
+
+                if estado & ABIERTA:
+                    return MARCAR_CELDA_ABIERTA
+
+        else:
+            if estado & MARCADA:
+                return ABRIR_CELDA_MARCADA
+
+            if estado & ABIERTA and tablero.get_minas_por_descubrir(indice) > 0:
+                return MARCAS_INSUFICIENTES
+
+        return NINGUNO
+
+    def hacer(self, fila, columna, accion):
+        """
+        Realiza una jugada, que se supone válida, en el tablero de la partida.
+
+        :param fila: fila de la celda
+        :param columna: columna de la celda
+        :param accion: acción a realizar (MARCAR o ABRIR)
+        :return: lista con los índices de las celdas que se han abierto con la jugada
+        """
+        tablero = self.__tablero
+        indice = tablero.indice(fila, columna)
+        abiertas = []
+        colocadas = ()
+        movida = None
+        primera_apertura = self.__primera_apertura
+
+        if accion == MARCAR:
+            tablero.marcar(indice)
+
+        else:
+            if tablero.is_abierta(indice) and tablero.get_minas_por_descubrir(indice) <= 0:
+                abiertas = tablero.abrir_region(indice)
+            else:
+                if self.__primera_apertura:
+                    if self.__generador is not None:
+                        colocadas = self.__colocar_minas(indice)
+                    elif tablero.hay_mina(indice):
+                        movida = tablero.mover_mina_a_primera_posicion_sin_minas(indice)
+
+                tablero.abrir(indice)
+                abiertas = [indice]
+
+                # Si la celda abierta no tiene minas por descubrir alrededor, se abre toda su región
+                if not tablero.hay_mina(indice) and tablero.get_minas_por_descubrir(indice) <= 0:
+                    abiertas.extend(tablero.abrir_region(indice))
+
+            self.__primera_apertura = False
+
+        self.__historial.append((fila, columna, accion, abiertas, colocadas, movida, primera_apertura, ()))
+
+        return abiertas
+
+    def get_deshacibles(self):
+        """
+        Devuelve el número de jugadas que se pueden deshacer.
+
+        :return: número de jugadas del historial
+        """
+        return len(self.__historial)
+
+    def get_rehacibles(self):
+        """
+        Devuelve el número de jugadas deshechas que se pueden rehacer.
+
+        :return: número de jugadas deshechas desde la última jugada nueva
+        """
+        return len(self.__rehacer)
+
+    def deshacer(self):
+        """
+        Deshace la última jugada realizada, devolviendo a su estado anterior sólo las celdas que cambió: se desmarca o
+        se vuelve a marcar la celda marcada, se cierran las celdas que se abrieron (también las abiertas al terminar la
+        partida) y, si era la primera apertura, se quitan o se devuelven a su sitio las minas. La partida deja de estar
+        terminada, y la jugada se puede rehacer con rehacer hasta que se realice una jugada nueva.
+
+        :return: Resultado con las celdas cambiadas, o None si no hay ninguna jugada que deshacer
+        """
+        if not self.__historial:
+            return None
+
+        tablero = self.__tablero
+        fila, columna, accion, abiertas, colocadas, movida, primera_apertura, reveladas = self.__historial.pop()
+        indice = tablero.indice(fila, columna)
+
+        tablero.cerrar_celdas(reveladas)
+        cambiadas = list(reveladas)
+
+        if accion == MARCAR:
+            tablero.marcar(indice)
+            cambiadas.append(indice)
+            cambiadas.extend(tablero.get_vecinas(indice))
+        else:
+            tablero.cerrar_celdas(abiertas)
+            cambiadas.extend(abiertas)
+
+            for k in colocadas:
+                tablero.quitar_mina(k)
+
+            if movida is not None:
+                tablero.quitar_mina(movida)
+                tablero.poner_mina(indice)
+
+            # Al volver a la primera apertura, el generador vuelve a su estado inicial para colocar las mismas minas
+            if primera_apertura and self.__generador is not None:
+                self.__generador = random.Random(self.__semilla)
+
+        self.__primera_apertura = primera_apertura
+        self.__fin_de_partida = False
+        self.__partida_ganada = False
+        self.__rehacer.append((fila, columna, accion))
+
+        return Resultado(NINGUNO, (), cambiadas, aplicadas=1)
+
+    def rehacer(self):
+        """
+        Vuelve a realizar la última jugada deshecha.
+
+        :return: Resultado de la jugada, o None si no hay ninguna jugada que rehacer
+        """
+        if not self.__rehacer:
+            return None
+
+        jugada = self.__rehacer.pop()
+
+        # La jugada rehecha no debe descartar las demás jugadas deshechas
+        pendientes = self.__rehacer
+        resultado = self.aplicar(jugada)
+        self.__rehacer = pendientes
+
+        return resultado
+
+    def __colocar_minas(self, indice):
+        """
+        Coloca las minas de la partida dejando libre la celda que se abre en primer lugar y, si es posible, sus
+        vecinas.
+
+        :param indice: índice de la primera celda que se abre
+        :return: lista con los índices de las celdas en las que se han colocado las minas
+        """
+        tablero = self.__tablero
+        celdas = tablero.get_filas() * tablero.get_columnas()
+        zona_segura = [indice]
+
+        if self.__vecinas_seguras:
+            zona_segura.extend(tablero.get_vecinas(indice))
+
+        # Si no hay sitio suficiente se va reduciendo la zona segura
+        if celdas - len(zona_segura) < self.__minas:
+            zona_segura = [indice]
+        if celdas - len(zona_segura) < self.__minas:
+            zona_segura = []
+
+        return colocar_minas(tablero, self.__minas, self.__generador, zona_segura)
+
+    def detectar_fin_de_partida(self):
+        """
+        Determina si la partida ha llegado a su fin, y además si se ha ganado o se ha perdido, según las condiciones
+        que se detallan en el enunciado.
+
+        :return: una tupla en la que el primer elemento determina si se ha detectado el final de la partida (True si se
+        detecta y False en caso contrario), y el segundo indica si se ha ganado (True) o si se ha perdido (False)
+        """
+        tablero = self.__tablero
+
+        # El tablero lleva la cuenta de las celdas abiertas con mina y de las cerradas sin marcar
+        if tablero.get_minas_abiertas() > 0:
+            self.__fin_de_partida = True
+        elif tablero.get_marcadas() == self.__minas and tablero.get_cerradas_sin_marcar() == 0:
+            self.__fin_de_partida = True
+            self.__partida_ganada = True
+
+        return self.__fin_de_partida, self.__partida_ganada
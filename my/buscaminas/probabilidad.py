@@ -0,0 +1,622 @@
+# coding=utf-8
+
+"""
+Cálculo de la probabilidad de que cada celda cerrada de una partida tenga mina.
+
+Como el resolutor, sólo se usa lo que ve el jugador: las celdas abiertas, su número de minas por descubrir, las
+celdas marcadas (que se tratan como desconocidas, ya que el jugador puede haberse equivocado) y el número total de
+minas de la partida. Las celdas cerradas vecinas de alguna celda abierta forman la frontera, que se divide en
+componentes independientes: dos celdas están en la misma componente si comparten alguna restricción.
+
+Para cada componente se cuentan, por número de minas, sus soluciones y las soluciones en las que cada celda tiene mina.
+La enumeración recorre las celdas en orden de anchura y memoriza los subproblemas por las minas que les faltan a las
+restricciones que están a medias, de forma que el coste depende de la anchura de la frontera y no del número de
+soluciones. Además, los resultados de cada componente se guardan por su forma, de modo que una componente que no ha
+cambiado de un turno a otro no se vuelve a enumerar.
+
+Las componentes se combinan teniendo en cuenta el número total de minas: cada forma de repartir t minas en la frontera
+se pondera con el número de formas de colocar las minas restantes en las celdas cerradas del interior, que es el
+coeficiente binomial C(interior, minas - t).
+
+El cálculo tiene un límite de tiempo. Si se agota, o si alguna componente es demasiado grande, el resultado deja de
+ser exacto: en lugar del número total de minas se supone que cada celda tiene mina de forma independiente con la
+densidad media, las componentes que no se han podido enumerar se estiman con soluciones aleatorias obtenidas durante
+otro periodo igual y la probabilidad del interior se aproxima con las minas que se espera que queden fuera de la
+frontera.
+
+Autor: Richard Albán Fernández
+"""
+
+from __future__ import division
+
+import math
+import random
+import time
+from collections import deque
+from tablero import ABIERTA, MARCADA, MINA
+
+# Segundos que puede durar como máximo el cálculo exacto
+PRESUPUESTO = 1.0
+
+# Número de soluciones aleatorias con las que se estima cada componente que no se puede enumerar
+MUESTRAS = 200
+
+# Número máximo de celdas de una componente que se enumera de forma exacta
+MAX_CELDAS_EXACTAS = 200
+
+# Número máximo de pasos de vuelta atrás para obtener cada solución aleatoria
+MAX_PASOS_MUESTRA = 20000
+
+# Número máximo de componentes cuyos resultados se conservan entre cálculos
+MAX_CACHE = 10000
+
+# Resultados de las componentes ya enumeradas, por su forma
+_CACHE = {}
+
+
+class _PresupuestoAgotado(Exception):
+    """
+    Se lanza cuando se agota el tiempo del cálculo exacto.
+
+    Autor: Richard Albán Fernández
+    """
+    pass
+
+
+class Probabilidades():
+    """
+    Representa las probabilidades de que las celdas cerradas de una partida tengan mina.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, estados, frontera, interior, celda_interior, exacta):
+        """
+        Se inicializan las probabilidades calculadas.
+
+        :param estados: buffer de estados del tablero
+        :param frontera: diccionario con la probabilidad de cada celda de la frontera, por su índice
+        :param interior: probabilidad de cada celda cerrada del interior, o None si no hay ninguna
+        :param celda_interior: índice de una celda cerrada del interior, o None si no hay ninguna
+        :param exacta: indica si las probabilidades son exactas o estimadas
+        """
+        self.__estados = estados
+        self.__frontera = frontera
+        self.__interior = interior
+        self.__celda_interior = celda_interior
+        self.__exacta = exacta
+
+    def get_probabilidad(self, indice):
+        """
+        Devuelve la probabilidad de que una celda tenga mina.
+
+        :param indice: índice de la celda
+        :return: probabilidad entre 0 y 1, o None si la celda está abierta
+        """
+        if self.__estados[indice] & ABIERTA:
+            return None
+
+        return self.__frontera.get(indice, self.__interior)
+
+    def get_frontera(self):
+        """
+        Devuelve las probabilidades de las celdas de la frontera.
+
+        :return: diccionario con la probabilidad de cada celda, por su índice
+        """
+        return self.__frontera
+
+    def get_probabilidad_interior(self):
+        """
+        Devuelve la probabilidad de que tenga mina una celda cerrada que no es vecina de ninguna celda abierta.
+
+        :return: probabilidad entre 0 y 1, o None si no hay celdas cerradas en el interior
+        """
+        return self.__interior
+
+    def is_exacta(self):
+        """
+        Determina si las probabilidades son exactas o se han estimado con soluciones aleatorias.
+
+        :return: True si son exactas y False en caso contrario
+        """
+        return self.__exacta
+
+    def mas_segura(self):
+        """
+        Devuelve la celda cerrada y sin marcar con menor probabilidad de tener mina, que es la que se puede abrir.
+
+        :return: tupla (indice, probabilidad), o None si no queda ninguna celda cerrada sin marcar
+        """
+        mejor = None
+        candidatas = [k for k in self.__frontera if not self.__estados[k] & MARCADA]
+
+        if candidatas:
+            indice = min(candidatas, key=self.__frontera.get)
+            mejor = indice, self.__frontera[indice]
+
+        if self.__celda_interior is not None and (mejor is None or self.__interior < mejor[1]):
+            mejor = self.__celda_interior, self.__interior
+
+        return mejor
+
+
+def calcular_probabilidades(partida, presupuesto=PRESUPUESTO, muestras=MUESTRAS, generador=None):
+    """
+    Calcula la probabilidad de que cada celda cerrada de una partida tenga mina.
+
+    :param partida: partida de la que se calculan las probabilidades
+    :param presupuesto: segundos que puede durar el cálculo exacto antes de recurrir a soluciones aleatorias, y
+    después los que se dedican a obtenerlas
+    :param muestras: número máximo de soluciones aleatorias con las que se estima cada componente que no se puede
+    enumerar
+    :param generador: generador de números aleatorios para las estimaciones; si no se indica se crea uno
+    :return: Probabilidades de las celdas
+    :raise ValueError: si lo que se ve en el tablero no es compatible con ninguna colocación de las minas
+    """
+    tablero = partida.get_tablero()
+    estados = tablero.get_estados()
+    limite = time.time() + presupuesto
+
+    componentes = _componentes(tablero)
+    frontera = set()
+
+    for celdas, restricciones in componentes:
+        frontera.update(celdas)
+
+    cerradas = sum(estados.count(chr(estado)) for estado in (0, MARCADA, MINA, MINA | MARCADA))
+    interior = cerradas - len(frontera)
+    minas = partida.get_minas() - tablero.get_minas_abiertas()
+    celda_interior = _buscar_celda_interior(estados, frontera) if interior else None
+
+    # Se enumeran las componentes mientras quede tiempo
+    enumeradas = []
+
+    for celdas, restricciones in componentes:
+        resultado = None
+
+        if len(celdas) <= MAX_CELDAS_EXACTAS:
+            try:
+                resultado = _enumerar_componente(celdas, restricciones, limite)
+            except _PresupuestoAgotado:
+                limite = 0
+
+        enumeradas.append(resultado)
+
+    if None not in enumeradas:
+        try:
+            probabilidades, probabilidad_interior = _combinar(componentes, enumeradas, interior, minas, limite)
+
+            return Probabilidades(estados, probabilidades, probabilidad_interior, celda_interior, True)
+        except _PresupuestoAgotado:
+            pass
+
+    probabilidades, probabilidad_interior = _estimar(componentes, enumeradas, interior, minas, muestras,
+                                                     generador or random.Random(), time.time() + presupuesto)
+
+    return Probabilidades(estados, probabilidades, probabilidad_interior, celda_interior, False)
+
+
+def _componentes(tablero):
+    """
+    Obtiene las componentes independientes de la frontera de un tablero.
+
+    :param tablero: tablero del que se obtiene la frontera
+    :return: lista de tuplas con la lista de celdas de la componente, en orden de anchura, y la lista de sus
+    restricciones (celdas, minas)
+    """
+    estados = tablero.get_estados()
+    por_celda = {}
+
+    # Cada celda abierta sin mina con vecinas cerradas impone una restricción sobre ellas
+    for estado in (ABIERTA, ABIERTA | MARCADA):
+        k = estados.find(chr(estado))
+
+        while k != -1:
+            celdas = []
+            minas = tablero.get_minas_por_descubrir(k)
+
+            for vecina in tablero.get_vecinas(k):
+                # Las vecinas marcadas se descuentan del número de minas por descubrir
+                if estados[vecina] & MARCADA:
+                    minas += 1
+
+                if not estados[vecina] & ABIERTA:
+                    celdas.append(vecina)
+
+            if celdas:
+                restriccion = (celdas, minas)
+
+                for celda in celdas:
+                    por_celda.setdefault(celda, []).append(restriccion)
+
+            k = estados.find(chr(estado), k + 1)
+
+    componentes = []
+    visitadas = set()
+
+    for inicio in sorted(por_celda):
+        if inicio in visitadas:
+            continue
+
+        celdas = []
+        restricciones = []
+        vistas = set()
+        cola = deque([inicio])
+        visitadas.add(inicio)
+
+        while cola:
+            celda = cola.popleft()
+            celdas.append(celda)
+
+            for restriccion in por_celda[celda]:
+                if id(restriccion) in vistas:
+                    continue
+
+                vistas.add(id(restriccion))
+                restricciones.append(restriccion)
+
+                for otra in restriccion[0]:
+                    if otra not in visitadas:
+                        visitadas.add(otra)
+                        cola.append(otra)
+
+        componentes.append((celdas, restricciones))
+
+    return componentes
+
+
+def _buscar_celda_interior(estados, frontera):
+    """
+    Devuelve una celda cerrada y sin marcar que no pertenece a la frontera.
+
+    :param estados: buffer de estados del tablero
+    :param frontera: conjunto de celdas de la frontera
+    :return: índice de la celda, o None si no hay ninguna
+    """
+    for k in range(len(estados)):
+        if not estados[k] & (ABIERTA | MARCADA) and k not in frontera:
+            return k
+
+    return None
+
+
+def _enumerar_componente(celdas, restricciones, limite):
+    """
+    Cuenta, para cada número de minas, las soluciones de una componente y las soluciones en las que cada una de sus
+    celdas tiene mina.
+
+    :param celdas: lista de celdas de la componente, en orden de anchura
+    :param restricciones: lista de restricciones (celdas, minas) de la componente
+    :param limite: instante en el que se agota el tiempo del cálculo
+    :return: tupla con la lista de soluciones por número de minas y la lista, por número de minas, de las soluciones
+    en las que cada celda tiene mina, ambas relativas a la mayor cantidad de soluciones
+    :raise _PresupuestoAgotado: si se agota el tiempo
+    :raise ValueError: si la componente no tiene solución
+    """
+    n = len(celdas)
+    posiciones = dict((celda, i) for i, celda in enumerate(celdas))
+    forma = (n, tuple(sorted((tuple(sorted(posiciones[celda] for celda in celdas_r)), minas)
+                             for celdas_r, minas in restricciones)))
+
+    if forma in _CACHE:
+        return _CACHE[forma]
+
+    por_celda = [[] for _ in range(n)]
+    faltan = []
+    libres = []
+    primera = []
+    ultima = []
+
+    for r, (celdas_r, minas) in enumerate(restricciones):
+        indices = [posiciones[celda] for celda in celdas_r]
+        faltan.append(minas)
+        libres.append(len(indices))
+        primera.append(min(indices))
+        ultima.append(max(indices))
+
+        for i in indices:
+            por_celda[i].append(r)
+
+    # Restricciones a medias antes de decidir cada celda: las únicas cuyo estado varía entre subproblemas
+    activas = [tuple(r for r in range(len(restricciones)) if primera[r] < i <= ultima[r]) for i in range(n + 1)]
+    memoria = {}
+    pasos = [0]
+
+    def contar(i):
+        clave = (i, tuple(faltan[r] for r in activas[i]))
+
+        if clave in memoria:
+            return memoria[clave]
+
+        pasos[0] += 1
+        if pasos[0] % 1000 == 0 and time.time() > limite:
+            raise _PresupuestoAgotado()
+
+        if i == n:
+            resultado = {0: [1, []]}
+        else:
+            resultado = {}
+
+            for valor in (0, 1):
+                valida = True
+
+                for r in por_celda[i]:
+                    faltan[r] -= valor
+                    libres[r] -= 1
+                    if not 0 <= faltan[r] <= libres[r]:
+                        valida = False
+
+                if valida:
+                    for minas, (soluciones, con_mina) in contar(i + 1).items():
+                        total = resultado.setdefault(minas + valor, [0, [0] * (n - i)])
+                        total[0] += soluciones
+                        total[1][0] += valor * soluciones
+
+                        for j, cantidad in enumerate(con_mina, 1):
+                            total[1][j] += cantidad
+
+                for r in por_celda[i]:
+                    faltan[r] += valor
+                    libres[r] += 1
+
+        memoria[clave] = resultado
+
+        return resultado
+
+    resultado = contar(0)
+
+    if not resultado:
+        raise ValueError("Las restricciones del tablero no tienen solución.")
+
+    # Las cantidades de soluciones pueden no caber en un número real, por lo que se expresan respecto a la mayor
+    maximo = max(soluciones for soluciones, con_mina in resultado.values())
+    soluciones = [0.0] * (max(resultado) + 1)
+    con_mina = [[0.0] * n for _ in soluciones]
+
+    for minas, (cantidad, cantidades) in resultado.items():
+        soluciones[minas] = cantidad / maximo
+        con_mina[minas] = [c / maximo for c in cantidades]
+
+    if len(_CACHE) >= MAX_CACHE:
+        _CACHE.clear()
+
+    _CACHE[forma] = soluciones, con_mina
+
+    return soluciones, con_mina
+
+
+def _convolucion(a, b):
+    """
+    Devuelve la convolución de dos distribuciones por número de minas, relativa a su mayor valor.
+
+    :param a: lista de valores por número de minas
+    :param b: lista de valores por número de minas
+    :return: lista de valores por número de minas
+    """
+    resultado = [0.0] * (len(a) + len(b) - 1)
+
+    for i, x in enumerate(a):
+        if x:
+            for j, y in enumerate(b):
+                resultado[i + j] += x * y
+
+    maximo = max(resultado)
+
+    return [x / maximo for x in resultado] if maximo else resultado
+
+
+def _pesos_interior(interior, minas, maximo):
+    """
+    Devuelve, para cada número de minas en la frontera, el número de formas de colocar las minas restantes en el
+    interior, relativo al mayor de ellos.
+
+    :param interior: número de celdas cerradas del interior
+    :param minas: número total de minas en las celdas cerradas
+    :param maximo: mayor número de minas que puede haber en la frontera
+    :return: lista de pesos por número de minas en la frontera
+    """
+    logaritmos = []
+
+    for t in range(maximo + 1):
+        restantes = minas - t
+
+        if 0 <= restantes <= interior:
+            logaritmos.append(math.lgamma(interior + 1) - math.lgamma(restantes + 1) -
+                              math.lgamma(interior - restantes + 1))
+        else:
+            logaritmos.append(None)
+
+    mayor = max(x for x in logaritmos if x is not None) if any(x is not None for x in logaritmos) else 0
+
+    return [math.exp(x - mayor) if x is not None else 0.0 for x in logaritmos]
+
+
+def _combinar(componentes, enumeradas, interior, minas, limite):
+    """
+    Combina las soluciones de las componentes ponderándolas con las formas de colocar el resto de minas en el interior.
+
+    :param componentes: lista de componentes (celdas, restricciones)
+    :param enumeradas: lista de resultados de _enumerar_componente de cada componente
+    :param interior: número de celdas cerradas del interior
+    :param minas: número total de minas en las celdas cerradas
+    :param limite: instante en el que se agota el tiempo del cálculo
+    :return: tupla con el diccionario de probabilidades de la frontera y la probabilidad del interior
+    :raise _PresupuestoAgotado: si se agota el tiempo
+    :raise ValueError: si no hay ninguna colocación de las minas compatible con el tablero
+    """
+    # Distribuciones acumuladas desde el principio y desde el final, para excluir cada componente
+    prefijos = [[1.0]]
+    for soluciones, con_mina in enumeradas:
+        prefijos.append(_convolucion(prefijos[-1], soluciones))
+
+    sufijos = [[1.0]]
+    for soluciones, con_mina in reversed(enumeradas):
+        sufijos.append(_convolucion(sufijos[-1], soluciones))
+    sufijos.reverse()
+
+    total = prefijos[-1]
+    pesos = _pesos_interior(interior, minas, len(total) - 1)
+    normalizacion = sum(x * y for x, y in zip(total, pesos))
+
+    if not normalizacion:
+        raise ValueError("Las restricciones del tablero no tienen solución.")
+
+    probabilidad_interior = None
+
+    if interior:
+        probabilidad_interior = sum(x * y * (minas - t) for t, (x, y) in enumerate(zip(total, pesos))) / \
+            (normalizacion * interior)
+
+    probabilidades = {}
+
+    for c, (celdas, restricciones) in enumerate(componentes):
+        if time.time() > limite:
+            raise _PresupuestoAgotado()
+
+        soluciones, con_mina = enumeradas[c]
+        resto = _convolucion(prefijos[c], sufijos[c + 1])
+
+        # Peso de cada número de minas de la componente, teniendo en cuenta las demás y el interior
+        peso = [sum(resto[t] * pesos[m + t] for t in range(len(resto))) for m in range(len(soluciones))]
+        normalizacion = sum(s * p for s, p in zip(soluciones, peso))
+
+        for i, celda in enumerate(celdas):
+            probabilidades[celda] = sum(con_mina[m][i] * peso[m] for m in range(len(soluciones))) / normalizacion
+
+    return probabilidades, probabilidad_interior
+
+
+def _estimar(componentes, enumeradas, interior, minas, muestras, generador, limite):
+    """
+    Estima las probabilidades suponiendo que cada celda cerrada tiene mina de forma independiente con la densidad media
+    de minas, en lugar de usar el número exacto de minas: cada solución de una componente con m minas se pondera con
+    (d / (1 - d)) ** m, siendo d la densidad. Las componentes enumeradas usan sus soluciones exactas y las demás se
+    estiman con soluciones aleatorias, que se obtienen por rondas mientras quede tiempo.
+
+    :param componentes: lista de componentes (celdas, restricciones)
+    :param enumeradas: lista de resultados de _enumerar_componente de cada componente, o None si no se ha enumerado
+    :param interior: número de celdas cerradas del interior
+    :param minas: número total de minas en las celdas cerradas
+    :param muestras: número máximo de soluciones aleatorias por componente
+    :param generador: generador de números aleatorios
+    :param limite: instante a partir del cual no se obtienen más soluciones aleatorias, tras la primera ronda
+    :return: tupla con el diccionario de probabilidades de la frontera y la probabilidad del interior
+    """
+    cerradas = interior + sum(len(celdas) for celdas, restricciones in componentes)
+    densidad = minas / cerradas if cerradas else 0.0
+    probabilidades = {}
+    sin_enumerar = []
+
+    for (celdas, restricciones), enumerada in zip(componentes, enumeradas):
+        if enumerada is None:
+            sin_enumerar.append((celdas, restricciones, [0] * len(celdas), [0]))
+            continue
+
+        soluciones, con_mina = enumerada
+
+        if densidad >= 1:
+            peso = [1.0 if m == len(soluciones) - 1 else 0.0 for m in range(len(soluciones))]
+        else:
+            # Se usan logaritmos, ya que la razón puede ser muy pequeña y elevarse a un exponente grande
+            razon = math.log(densidad / (1 - densidad)) if densidad > 0 else None
+            peso = [1.0 if m == 0 else 0.0 for m in range(len(soluciones))] if razon is None else \
+                [math.exp(razon * (m - len(soluciones) + 1)) for m in range(len(soluciones))]
+
+        normalizacion = sum(x * y for x, y in zip(soluciones, peso))
+
+        for i, celda in enumerate(celdas):
+            probabilidades[celda] = sum(con_mina[m][i] * peso[m] for m in range(len(soluciones))) / normalizacion
+
+    for ronda in range(muestras):
+        if ronda and time.time() > limite:
+            break
+
+        for celdas, restricciones, cuentas, obtenidas in sin_enumerar:
+            solucion = _muestra(celdas, restricciones, densidad, generador)
+
+            if solucion is not None:
+                obtenidas[0] += 1
+                for i, valor in enumerate(solucion):
+                    cuentas[i] += valor
+
+    for celdas, restricciones, cuentas, obtenidas in sin_enumerar:
+        # Si no se obtiene ninguna solución, las celdas de la componente se estiman con la densidad media
+        for i, celda in enumerate(celdas):
+            probabilidades[celda] = cuentas[i] / obtenidas[0] if obtenidas[0] else densidad
+
+    probabilidad_interior = None
+
+    if interior:
+        esperadas = minas - sum(probabilidades.values())
+        probabilidad_interior = min(1.0, max(0.0, esperadas / interior))
+
+    return probabilidades, probabilidad_interior
+
+
+def _muestra(celdas, restricciones, densidad, generador):
+    """
+    Obtiene una solución aleatoria de una componente por vuelta atrás, probando primero en cada celda que tenga mina
+    con probabilidad igual a la densidad media de minas. El recorrido es iterativo, por lo que no depende del límite
+    de recursión.
+
+    :param celdas: lista de celdas de la componente, en orden de anchura
+    :param restricciones: lista de restricciones (celdas, minas) de la componente
+    :param densidad: proporción de minas entre las celdas cerradas
+    :param generador: generador de números aleatorios
+    :return: lista con el valor (0 o 1) de cada celda, o None si no se encuentra una solución en MAX_PASOS_MUESTRA pasos
+    """
+    n = len(celdas)
+    posiciones = dict((celda, i) for i, celda in enumerate(celdas))
+    por_celda = [[] for _ in range(n)]
+    faltan = []
+    libres = []
+
+    for r, (celdas_r, minas) in enumerate(restricciones):
+        faltan.append(minas)
+        libres.append(len(celdas_r))
+
+        for celda in celdas_r:
+            por_celda[posiciones[celda]].append(r)
+
+    asignacion = [None] * n
+    opciones = [None] * n
+    i = 0
+
+    for _ in range(MAX_PASOS_MUESTRA):
+        if i == n:
+            return asignacion
+        if i < 0:
+            return None
+
+        # Se deshace el valor anterior de la celda, si lo tenía
+        if asignacion[i] is not None:
+            for r in por_celda[i]:
+                faltan[r] += asignacion[i]
+                libres[r] += 1
+            asignacion[i] = None
+
+        if opciones[i] is None:
+            opciones[i] = [0, 1] if generador.random() < densidad else [1, 0]
+
+        if not opciones[i]:
+            # Se han probado los dos valores: se vuelve a la celda anterior
+            opciones[i] = None
+            i -= 1
+            continue
+
+        valor = opciones[i].pop()
+        valida = True
+
+        for r in por_celda[i]:
+            faltan[r] -= valor
+            libres[r] -= 1
+            if not 0 <= faltan[r] <= libres[r]:
+                valida = False
+
+        asignacion[i] = valor
+
+        if valida:
+            i += 1
+
+    return None
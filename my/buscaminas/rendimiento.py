@@ -0,0 +1,434 @@
+# coding=utf-8
+
+"""
+Medición del rendimiento de las operaciones más costosas del juego.
+
+Cada prueba mide una de las funciones de buscaminas (o la que usa por debajo) en los niveles predefinidos y en
+tableros mayores, hasta el tablero más grande de TAMANOS. Cada medición se repite varias veces y se guarda el tiempo
+mínimo, que es el menos afectado por el resto de la máquina, y la mediana. En cada repetición la operación se ejecuta
+las veces necesarias para superar DURACION_MINIMA, de forma que la medida no dependa de la resolución del reloj ni de
+una interrupción aislada, y el recolector de basura se desactiva mientras se mide. Las operaciones que modifican el
+tablero, como abrir_recursivamente, se ejecutan cada vez sobre un estado distinto; todos los estados de una
+repetición se preparan antes de empezar a medirla, sin contar ese tiempo.
+
+La velocidad de la máquina puede variar mucho de un momento a otro (por ejemplo en una máquina virtual compartida),
+por lo que justo antes de cada repetición se mide también una carga fija de cálculo en Python. El tiempo relativo de
+una prueba es la mediana de los cocientes entre el tiempo de cada repetición y el de su carga fija, y es el que se
+usa al comparar, ya que apenas depende de la velocidad de la máquina en el momento de medir.
+
+Los resultados se pueden guardar en un fichero JSON de referencia y compararse después con él, de forma que se
+detectan las pruebas cuyo tiempo relativo ha crecido respecto a la referencia más allá de una tolerancia:
+
+    python rendimiento.py --guardar referencia.json
+    python rendimiento.py --comparar referencia.json --tolerancia 0.3
+
+Al comparar, el programa termina con código 1 si alguna prueba se ha vuelto más lenta.
+
+Autor: Richard Albán Fernández
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+from partida import nueva_partida, NIVELES, ABRIR
+from tablero import Tablero, crear_tablero
+from ficheros import CARACTER_MINA, CARACTER_LIBRE, cargar_tablero
+from entrada import tokenizar_jugadas
+import buscaminas
+
+# Tamaños de tablero (filas, columnas, minas) en los que se mide cada prueba: los niveles y tableros mayores con la
+# densidad de minas del nivel experto
+TAMANOS = tuple(NIVELES) + ((100, 100, 2062), (300, 300, 18563), (1000, 1000, 206250))
+
+# Número de repeticiones de cada medición
+REPETICIONES = 9
+
+# Duración mínima de cada repetición
+DURACION_MINIMA = 0.1
+
+# Número de ejecuciones de la carga fija de cálculo con la que se mide la velocidad de la máquina antes de cada
+# repetición
+CALIBRACION = 10000
+
+# Número máximo de estados que se preparan para cada repetición de una operación que modifica el tablero
+MAX_ESTADOS = 1000
+
+# Tolerancia por defecto al comparar con la referencia: proporción en la que puede crecer el tiempo relativo
+TOLERANCIA = 0.25
+
+# Versión del formato del fichero de referencia
+VERSION = 2
+
+
+def _preparar_crear_tablero(filas, columnas, minas):
+    """
+    Prepara la creación de un tablero.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    return None, lambda estado: crear_tablero(filas, columnas, minas, 1), False
+
+
+def _preparar_calcular_minas_por_descubrir(filas, columnas, minas):
+    """
+    Prepara el recálculo completo de las minas por descubrir de un tablero.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    tablero = crear_tablero(filas, columnas, minas, 1)
+
+    return lambda: tablero, buscaminas.calcular_minas_por_descubrir, False
+
+
+def _preparar_abrir_recursivamente(filas, columnas, minas):
+    """
+    Prepara la apertura recursiva desde la celda central de un tablero con una mina por cada cien celdas, de forma que
+    la región abierta ocupa la mayor parte del tablero. La celda central se abre al preparar cada repetición.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    indice = (filas // 2) * columnas + columnas // 2
+
+    # Las vecinas de la celda central también quedan libres, para que la apertura no se detenga en ella
+    zona_segura = [indice] + list(Tablero(filas, columnas).get_vecinas(indice))
+
+    def preparar():
+        tablero = crear_tablero(filas, columnas, filas * columnas // 100, 1, zona_segura)
+        tablero.abrir(indice)
+        return tablero.celda(indice)
+
+    return preparar, buscaminas.abrir_recursivamente, True
+
+
+def _preparar_detectar_fin_de_partida(filas, columnas, minas):
+    """
+    Prepara la detección del fin de una partida empezada.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    partida = nueva_partida(filas, columnas, minas, 1)
+    partida.aplicar((filas // 2, columnas // 2, ABRIR))
+
+    return lambda: partida, buscaminas.detectar_fin_de_partida, False
+
+
+def _preparar_imprimir_tablero(filas, columnas, minas):
+    """
+    Prepara la impresión completa del tablero de una partida empezada en un fichero que descarta lo que recibe.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    partida = nueva_partida(filas, columnas, minas, 1)
+    partida.aplicar((filas // 2, columnas // 2, ABRIR))
+    sumidero = open(os.devnull, "w")
+    _FICHEROS_ABIERTOS.append(sumidero)
+
+    return lambda: partida, lambda estado: buscaminas.imprimir_tablero(estado, 0, sumidero), False
+
+
+def _preparar_cargar_tablero(filas, columnas, minas):
+    """
+    Prepara la lectura de un fichero de definición de tablero, que es lo que hace el juego con el nombre que introduce
+    el jugador.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    estados = crear_tablero(filas, columnas, minas, 1).get_estados()
+    descriptor, nombre_fichero = tempfile.mkstemp(suffix=".txt")
+
+    with os.fdopen(descriptor, "wb") as fichero:
+        fichero.write("%d %d\n" % (filas, columnas))
+
+        for inicio in range(0, filas * columnas, columnas):
+            fichero.write("".join(CARACTER_MINA if estado else CARACTER_LIBRE
+                                  for estado in estados[inicio:inicio + columnas]) + "\n")
+
+    _FICHEROS_TEMPORALES.append(nombre_fichero)
+
+    return lambda: nombre_fichero, cargar_tablero, False
+
+
+def _preparar_tokenizar_jugadas(filas, columnas, minas):
+    """
+    Prepara la interpretación completa de una cadena con una jugada por cada fila del tablero, con las celdas en forma
+    numérica.
+
+    :return: tupla (preparar, ejecutar, destructiva) de la prueba
+    """
+    generador = random.Random(1)
+    jugada = "".join("%d,%d%s" % (fila, generador.randrange(columnas), generador.choice("!*")) for fila in range(filas))
+
+    return lambda: jugada, lambda texto: list(tokenizar_jugadas(texto)), False
+
+
+# Pruebas disponibles, por su nombre, en el orden en el que se ejecutan
+PRUEBAS = (
+    ("crear_tablero", _preparar_crear_tablero),
+    ("calcular_minas_por_descubrir", _preparar_calcular_minas_por_descubrir),
+    ("abrir_recursivamente", _preparar_abrir_recursivamente),
+    ("detectar_fin_de_partida", _preparar_detectar_fin_de_partida),
+    ("imprimir_tablero", _preparar_imprimir_tablero),
+    ("cargar_tablero", _preparar_cargar_tablero),
+    ("tokenizar_jugadas", _preparar_tokenizar_jugadas),
+)
+
+# Ficheros creados por las pruebas, que se borran al terminar
+_FICHEROS_TEMPORALES = []
+
+# Ficheros abiertos al preparar una prueba, que se cierran al terminar su medición
+_FICHEROS_ABIERTOS = []
+
+
+def medir(preparar, ejecutar, destructiva, repeticiones=REPETICIONES):
+    """
+    Mide el tiempo de una operación.
+
+    :param preparar: función sin parámetros que devuelve el estado sobre el que se ejecuta la operación, o None
+    :param ejecutar: función que recibe el estado y ejecuta la operación
+    :param destructiva: indica si la operación modifica el estado, en cuyo caso cada ejecución usa un estado distinto
+    :param repeticiones: número de repeticiones de la medición
+    :return: tupla con el tiempo mínimo y la mediana, en segundos por ejecución, el tiempo relativo a la carga fija de
+    cálculo y el número de ejecuciones de cada repetición
+    """
+    if preparar is None:
+        preparar = lambda: None
+
+    recolector = gc.isenabled()
+    gc.disable()
+
+    try:
+        # Se ajusta el número de ejecuciones por repetición para superar la duración mínima; estas ejecuciones sirven
+        # también de calentamiento y no se cuentan
+        veces = 1
+
+        while True:
+            duracion = _ejecutar_lote(ejecutar, _preparar_lote(preparar, destructiva, veces))
+
+            if duracion >= DURACION_MINIMA or destructiva and veces >= MAX_ESTADOS:
+                break
+
+            veces *= 10 if duracion < DURACION_MINIMA / 10 else 2
+
+            if destructiva:
+                veces = min(veces, MAX_ESTADOS)
+
+        tiempos = []
+        relativos = []
+
+        for _ in range(repeticiones):
+            estados = _preparar_lote(preparar, destructiva, veces)
+            unidad = _medir_unidad()
+            tiempo = _ejecutar_lote(ejecutar, estados) / veces
+            tiempos.append(tiempo)
+            relativos.append(tiempo / unidad)
+    finally:
+        if recolector:
+            gc.enable()
+
+    tiempos.sort()
+    relativos.sort()
+
+    return tiempos[0], tiempos[len(tiempos) // 2], relativos[len(relativos) // 2], veces
+
+
+def _medir_unidad():
+    """
+    Mide el tiempo de la carga fija de cálculo con la que se compara cada repetición.
+
+    :return: segundos por ejecución de la carga fija
+    """
+    reloj = timeit.default_timer
+    inicio = reloj()
+
+    for _ in xrange(CALIBRACION):
+        sum(xrange(100))
+
+    return (reloj() - inicio) / CALIBRACION
+
+
+def _preparar_lote(preparar, destructiva, veces):
+    """
+    Prepara los estados de una repetición.
+
+    :param preparar: función sin parámetros que devuelve un estado
+    :param destructiva: indica si cada ejecución necesita un estado distinto
+    :param veces: número de ejecuciones de la repetición
+    :return: lista con el estado de cada ejecución
+    """
+    if destructiva:
+        return [preparar() for _ in xrange(veces)]
+
+    return [preparar()] * veces
+
+
+def _ejecutar_lote(ejecutar, estados):
+    """
+    Ejecuta la operación sobre cada estado de una repetición.
+
+    :param ejecutar: función que recibe el estado y ejecuta la operación
+    :param estados: lista de estados
+    :return: duración total en segundos
+    """
+    reloj = timeit.default_timer
+    inicio = reloj()
+
+    for estado in estados:
+        ejecutar(estado)
+
+    return reloj() - inicio
+
+
+def ejecutar_pruebas(tamanos=TAMANOS, pruebas=None, repeticiones=REPETICIONES, informar=None):
+    """
+    Ejecuta las pruebas en los tamaños indicados.
+
+    :param tamanos: secuencia de tuplas (filas, columnas, minas)
+    :param pruebas: nombres de las pruebas que se ejecutan; si no se indican se ejecutan todas
+    :param repeticiones: número de repeticiones de cada medición
+    :param informar: función a la que se llama con la clave y el resultado de cada medición, según se obtienen
+    :return: diccionario con el resultado de cada medición por su clave "prueba@filasxcolumnas"
+    """
+    resultados = {}
+
+    try:
+        for nombre, preparar_prueba in PRUEBAS:
+            if pruebas and nombre not in pruebas:
+                continue
+
+            for filas, columnas, minas in tamanos:
+                clave = "%s@%dx%d" % (nombre, filas, columnas)
+
+                try:
+                    minimo, mediana, relativo, veces = medir(*preparar_prueba(filas, columnas, minas),
+                                                             repeticiones=repeticiones)
+                finally:
+                    while _FICHEROS_ABIERTOS:
+                        _FICHEROS_ABIERTOS.pop().close()
+                resultados[clave] = {"minimo": minimo, "mediana": mediana, "relativo": relativo, "veces": veces,
+                                     "minas": minas}
+
+                if informar:
+                    informar(clave, resultados[clave])
+    finally:
+        while _FICHEROS_TEMPORALES:
+            os.remove(_FICHEROS_TEMPORALES.pop())
+
+    return resultados
+
+
+def comparar(resultados, referencia, tolerancia=TOLERANCIA):
+    """
+    Compara los resultados con los de una referencia.
+
+    :param resultados: resultados de ejecutar_pruebas
+    :param referencia: resultados de referencia
+    :param tolerancia: proporción en la que puede crecer el tiempo relativo sin considerarse una regresión
+    :return: lista de tuplas (clave, razon) con las mediciones que se han vuelto más lentas, donde razon es el tiempo
+    relativo actual dividido por el de la referencia
+    """
+    regresiones = []
+
+    for clave in sorted(resultados):
+        if clave in referencia:
+            razon = resultados[clave]["relativo"] / referencia[clave]["relativo"]
+
+            if razon > 1 + tolerancia:
+                regresiones.append((clave, razon))
+
+    return regresiones
+
+
+def guardar_referencia(nombre_fichero, resultados):
+    """
+    Guarda los resultados en un fichero JSON de referencia.
+
+    :param nombre_fichero: nombre del fichero
+    :param resultados: resultados de ejecutar_pruebas
+    """
+    datos = {
+        "version": VERSION,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+
+    with open(nombre_fichero, "wb") as fichero:
+        json.dump(datos, fichero, indent=1, sort_keys=True)
+
+
+def cargar_referencia(nombre_fichero):
+    """
+    Carga los resultados de un fichero JSON de referencia.
+
+    :param nombre_fichero: nombre del fichero
+    :return: resultados de referencia
+    :raise IOError: si no se puede abrir el fichero
+    :raise ValueError: si el fichero no es una referencia válida
+    """
+    with open(nombre_fichero, "rb") as fichero:
+        datos = json.load(fichero)
+
+    if not isinstance(datos, dict) or datos.get("version") != VERSION:
+        raise ValueError('"' + nombre_fichero + '" no es un fichero de referencia válido.')
+
+    return datos["resultados"]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mide el rendimiento de las operaciones más costosas del juego.")
+    parser.add_argument("--guardar", help="fichero JSON en el que se guardan los resultados como referencia")
+    parser.add_argument("--comparar", help="fichero JSON de referencia con el que se comparan los resultados")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="proporción en la que puede crecer un tiempo sin considerarse una regresión")
+    parser.add_argument("--repeticiones", type=int, default=REPETICIONES, help="repeticiones de cada medición")
+    parser.add_argument("--max-celdas", type=int, help="no mide los tableros con más celdas que las indicadas")
+    parser.add_argument("--prueba", action="append", choices=[nombre for nombre, preparar in PRUEBAS],
+                        help="prueba que se ejecuta (se puede repetir); por defecto se ejecutan todas")
+    argumentos = parser.parse_args()
+
+    if argumentos.repeticiones < 1:
+        parser.error("se necesita al menos una repetición")
+
+    referencia = None
+
+    if argumentos.comparar:
+        try:
+            referencia = cargar_referencia(argumentos.comparar)
+        except (IOError, ValueError) as e:
+            parser.error(str(e))
+
+    tamanos = [tamano for tamano in TAMANOS
+               if argumentos.max_celdas is None or tamano[0] * tamano[1] <= argumentos.max_celdas]
+
+    def informar(clave, resultado):
+        linea = "%-45s %12.3f ms %12.3f ms" % (clave, resultado["minimo"] * 1000, resultado["mediana"] * 1000)
+
+        if referencia is not None and clave in referencia:
+            linea += " %+7.1f%%" % ((resultado["relativo"] / referencia[clave]["relativo"] - 1) * 100)
+
+        print linea
+        sys.stdout.flush()
+
+    print "%-45s %15s %15s" % ("PRUEBA", "MINIMO", "MEDIANA")
+    resultados = ejecutar_pruebas(tamanos, argumentos.prueba, argumentos.repeticiones, informar)
+
+    if argumentos.guardar:
+        guardar_referencia(argumentos.guardar, resultados)
+
+    if referencia is not None:
+        regresiones = comparar(resultados, referencia, argumentos.tolerancia)
+
+        if regresiones:
+            print
+            print "PRUEBAS MAS LENTAS QUE LA REFERENCIA (TOLERANCIA %d%%):" % round(argumentos.tolerancia * 100)
+
+            for clave, razon in regresiones:
+                print "    %s: %.2f veces" % (clave, razon)
+
+            sys.exit(1)
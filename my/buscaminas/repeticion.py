@@ -0,0 +1,451 @@
+# coding=utf-8
+
+"""
+Grabación de partidas y reproducción de las grabaciones.
+
+Una grabación es un fichero binario al que sólo se añaden datos. Empieza por una cabecera con la marca MAGIA, la
+versión del formato y el tipo de origen, seguida del origen de la partida: si la partida se graba desde el principio y
+sus minas se colocan con una semilla, basta con las dimensiones, las minas y la semilla (ORIGEN_SEMILLA); en caso
+contrario se guarda el estado completo de la partida con el formato de guardado (ORIGEN_ESTADO), del que se obtiene
+también la huella del tablero. A continuación va un registro de tamaño fijo (REGISTRO) por cada jugada realizada: los
+milisegundos transcurridos desde el inicio de la grabación, la fila, la columna y la acción. Cada lote de jugadas se
+escribe en cuanto se realiza, por lo que si el programa termina de forma inesperada la grabación conserva todas las
+jugadas anteriores; un último registro incompleto se descarta al leerla. Las jugadas deshechas y rehechas se graban
+con las acciones especiales DESHACER y REHACER.
+
+El Reproductor vuelve a aplicar las jugadas de una grabación a una partida nueva, sin entrada ni salida, a la máxima
+velocidad o al ritmo en que se jugaron. Cada INTERVALO_INSTANTANEAS jugadas guarda una instantánea del estado de la
+partida, de forma que ir_a lleva la reproducción a cualquier jugada partiendo de la instantánea anterior más cercana
+en lugar de repetir la partida desde el principio. Como una instantánea no conserva el historial de la partida, sólo
+se parte de ella si ninguna jugada deshecha entre la instantánea y la posición buscada es anterior a la instantánea.
+
+Ejecutado como programa reproduce una grabación y muestra el tablero final:
+
+    python repeticion.py partida.bmr
+    python repeticion.py partida.bmr --tiempo-real --velocidad 2
+    python repeticion.py partida.bmr --ir-a 120
+
+Autor: Richard Albán Fernández
+"""
+
+import argparse
+import struct
+import time
+from partida import nueva_partida
+from guardado import codificar_partida, decodificar_partida
+from pantalla import imprimir_tablero
+
+# Marca con la que empiezan las grabaciones y versión del formato
+MAGIA = "BMRP"
+VERSION = 1
+
+# Cabecera: marca, versión y tipo de origen
+CABECERA = struct.Struct(">4sHB")
+
+# Tipos de origen de la partida
+ORIGEN_SEMILLA = 0
+ORIGEN_ESTADO = 1
+
+# Origen por semilla: filas, columnas, minas, semilla y si las vecinas de la primera celda quedan libres de minas
+SEMILLA = struct.Struct(">IIIQ?")
+
+# Origen por estado: longitud del estado codificado con codificar_partida, que va a continuación
+ESTADO = struct.Struct(">I")
+
+# Registro de una jugada: milisegundos desde el inicio de la grabación, fila, columna y acción
+REGISTRO = struct.Struct(">IIIc")
+
+# Acciones con las que se graban las jugadas deshechas y rehechas, cuya fila y columna no se usan
+DESHACER = "<"
+REHACER = ">"
+
+# Número de jugadas entre dos instantáneas de la reproducción
+INTERVALO_INSTANTANEAS = 64
+
+
+class Grabador():
+    """
+    Graba las jugadas de una partida en un fichero.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, nombre_fichero, partida):
+        """
+        Se crea la grabación con el origen de la partida en su estado actual.
+
+        :param nombre_fichero: nombre del fichero de la grabación
+        :param partida: partida que se graba
+        :raise IOError: si no se puede crear el fichero
+        """
+        self.__fichero = open(nombre_fichero, "wb")
+        self.__inicio = time.time()
+
+        self.__fichero.write(codificar_origen(partida))
+        self.__fichero.flush()
+
+    def registrar(self, jugadas):
+        """
+        Añade a la grabación las jugadas realizadas, con el instante actual.
+
+        :param jugadas: secuencia de jugadas (fila, columna, accion) que se han aplicado a la partida
+        """
+        milisegundos = int((time.time() - self.__inicio) * 1000)
+
+        self.__fichero.write("".join(REGISTRO.pack(milisegundos, fila, columna, accion)
+                                     for fila, columna, accion in jugadas))
+        self.__fichero.flush()
+
+    def registrar_deshacer(self):
+        """
+        Añade a la grabación que se ha deshecho la última jugada.
+        """
+        self.registrar(((0, 0, DESHACER),))
+
+    def registrar_rehacer(self):
+        """
+        Añade a la grabación que se ha rehecho la última jugada deshecha.
+        """
+        self.registrar(((0, 0, REHACER),))
+
+    def cerrar(self):
+        """
+        Cierra el fichero de la grabación.
+        """
+        self.__fichero.close()
+
+
+def codificar_origen(partida):
+    """
+    Devuelve la cabecera y el origen de la grabación de una partida.
+
+    :param partida: partida que se graba
+    :return: cadena de bytes
+    """
+    semilla = partida.get_semilla()
+
+    if semilla is not None and partida.is_primera_apertura():
+        tablero = partida.get_tablero()
+
+        return CABECERA.pack(MAGIA, VERSION, ORIGEN_SEMILLA) + \
+            SEMILLA.pack(tablero.get_filas(), tablero.get_columnas(), partida.get_minas(), semilla,
+                         partida.is_vecinas_seguras())
+
+    estado = codificar_partida(partida)
+
+    return CABECERA.pack(MAGIA, VERSION, ORIGEN_ESTADO) + ESTADO.pack(len(estado)) + estado
+
+
+def leer_grabacion(datos):
+    """
+    Interpreta el contenido de una grabación.
+
+    :param datos: cadena de bytes con la grabación
+    :return: tupla con una función sin parámetros que crea la partida inicial y la lista de jugadas, cada una como una
+    tupla (milisegundos, fila, columna, accion)
+    :raise ValueError: si los datos no son una grabación válida
+    """
+    if len(datos) < CABECERA.size:
+        raise ValueError("El fichero es demasiado corto para ser una grabación.")
+
+    magia, version, origen = CABECERA.unpack_from(datos)
+
+    if magia != MAGIA:
+        raise ValueError("El fichero no es una grabación.")
+    if version != VERSION:
+        raise ValueError("Versión %d del formato no soportada." % version)
+
+    inicio = CABECERA.size
+
+    if origen == ORIGEN_SEMILLA:
+        if len(datos) < inicio + SEMILLA.size:
+            raise ValueError("La grabación está incompleta.")
+
+        filas, columnas, minas, semilla, vecinas_seguras = SEMILLA.unpack_from(datos, inicio)
+        inicio += SEMILLA.size
+        crear_partida = lambda: nueva_partida(filas, columnas, minas, semilla, vecinas_seguras)
+
+    elif origen == ORIGEN_ESTADO:
+        if len(datos) < inicio + ESTADO.size:
+            raise ValueError("La grabación está incompleta.")
+
+        longitud = ESTADO.unpack_from(datos, inicio)[0]
+        inicio += ESTADO.size
+
+        if len(datos) < inicio + longitud:
+            raise ValueError("La grabación está incompleta.")
+
+        estado = datos[inicio:inicio + longitud]
+        inicio += longitud
+
+        # Se comprueba ya que el estado es válido
+        decodificar_partida(estado)
+        crear_partida = lambda: decodificar_partida(estado)[0]
+
+    else:
+        raise ValueError("Tipo de origen %d no soportado." % origen)
+
+    # Un último registro incompleto corresponde a una escritura interrumpida y se descarta
+    final = inicio + (len(datos) - inicio) // REGISTRO.size * REGISTRO.size
+    jugadas = [REGISTRO.unpack_from(datos, posicion) for posicion in range(inicio, final, REGISTRO.size)]
+
+    return crear_partida, jugadas
+
+
+def resolver_rehechas(jugadas):
+    """
+    Sustituye cada jugada rehecha de una grabación por la jugada que vuelve a realizar y calcula el número de jugadas
+    que hay en el historial de la partida tras cada registro.
+
+    :param jugadas: lista de tuplas (milisegundos, fila, columna, accion) de la grabación
+    :return: tupla con la lista de jugadas resultante y la lista de profundidades del historial, que empieza por la
+    de la partida inicial
+    :raise ValueError: si se deshace o se rehace una jugada que no existe
+    """
+    resueltas = []
+    profundidades = [0]
+    historial = []
+    deshechas = []
+
+    for posicion, (milisegundos, fila, columna, accion) in enumerate(jugadas):
+        if accion == DESHACER:
+            if not historial:
+                raise ValueError("La jugada %d de la grabación deshace una jugada que no existe." % (posicion + 1))
+
+            deshechas.append(historial.pop())
+        elif accion == REHACER:
+            if not deshechas:
+                raise ValueError("La jugada %d de la grabación rehace una jugada que no existe." % (posicion + 1))
+
+            fila, columna, accion = deshechas.pop()
+            historial.append((fila, columna, accion))
+        else:
+            historial.append((fila, columna, accion))
+            deshechas = []
+
+        resueltas.append((milisegundos, fila, columna, accion))
+        profundidades.append(len(historial))
+
+    return resueltas, profundidades
+
+
+class Reproductor():
+    """
+    Reproduce una grabación sobre una partida nueva.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, datos, intervalo=INTERVALO_INSTANTANEAS):
+        """
+        Se prepara la reproducción desde el principio de la grabación.
+
+        :param datos: cadena de bytes con la grabación
+        :param intervalo: número de jugadas entre dos instantáneas
+        :raise ValueError: si los datos no son una grabación válida
+        """
+        self.__crear_partida, jugadas = leer_grabacion(datos)
+        self.__jugadas, self.__profundidades = resolver_rehechas(jugadas)
+        self.__intervalo = intervalo
+        self.__partida = self.__crear_partida()
+        self.__posicion = 0
+
+        # Profundidad del historial a partir de la cual la partida actual conserva las jugadas que se pueden deshacer
+        self.__suelo = 0
+
+        # Estado codificado de cada instantánea según su posición; la posición 0 es la partida inicial
+        self.__instantaneas = {0: None}
+
+    def __len__(self):
+        """
+        Devuelve el número de jugadas de la grabación.
+
+        :return: número de jugadas
+        """
+        return len(self.__jugadas)
+
+    def get_partida(self):
+        """
+        Devuelve la partida en el estado de la posición actual de la reproducción.
+
+        :return: la partida
+        """
+        return self.__partida
+
+    def get_posicion(self):
+        """
+        Devuelve el número de jugadas ya reproducidas.
+
+        :return: posición actual
+        """
+        return self.__posicion
+
+    def get_jugadas(self):
+        """
+        Devuelve las jugadas de la grabación.
+
+        :return: lista de tuplas (milisegundos, fila, columna, accion), en la que las jugadas rehechas aparecen como
+        la jugada que vuelven a realizar
+        """
+        return self.__jugadas
+
+    def avanzar(self, cantidad=1):
+        """
+        Reproduce las siguientes jugadas a la máxima velocidad, aplicándolas por lotes que terminan en las posiciones de
+        las instantáneas.
+
+        :param cantidad: número de jugadas a reproducir
+        :return: número de jugadas reproducidas, que es menor que el indicado si se llega al final de la grabación
+        :raise ValueError: si alguna jugada no es válida en la partida reproducida
+        """
+        final = min(self.__posicion + cantidad, len(self.__jugadas))
+        reproducidas = final - self.__posicion
+
+        while self.__posicion < final:
+            siguiente = min(final, (self.__posicion // self.__intervalo + 1) * self.__intervalo)
+
+            while self.__posicion < siguiente:
+                if self.__jugadas[self.__posicion][3] == DESHACER:
+                    if self.__partida.deshacer() is None:
+                        raise ValueError("La jugada %d de la grabación no se puede deshacer." % (self.__posicion + 1))
+
+                    self.__posicion += 1
+                    continue
+
+                # Las jugadas hasta la siguiente jugada deshecha se aplican en un único lote
+                fin_lote = self.__posicion
+
+                while fin_lote < siguiente and self.__jugadas[fin_lote][3] != DESHACER:
+                    fin_lote += 1
+
+                lote = [jugada[1:] for jugada in self.__jugadas[self.__posicion:fin_lote]]
+                resultado = self.__partida.aplicar_lote(lote)
+
+                if resultado.get_aplicadas() != len(lote):
+                    raise ValueError("La jugada %d de la grabación no es válida." %
+                                     (self.__posicion + resultado.get_aplicadas() + 1))
+
+                self.__posicion = fin_lote
+
+            if siguiente % self.__intervalo == 0 and siguiente not in self.__instantaneas:
+                self.__instantaneas[siguiente] = codificar_partida(self.__partida)
+
+        return reproducidas
+
+    def ir_a(self, posicion):
+        """
+        Lleva la reproducción a la posición indicada. Se parte de la posición actual o de la última instantánea
+        anterior a la posición, la que esté más cerca, siempre que las jugadas deshechas hasta la posición no vayan más
+        allá de las jugadas que conserva el historial de la partida de la que se parte.
+
+        :param posicion: número de jugadas que deben quedar reproducidas
+        :raise ValueError: si la posición está fuera de la grabación
+        """
+        if not 0 <= posicion <= len(self.__jugadas):
+            raise ValueError("La posición %d está fuera de la grabación." % posicion)
+
+        profundidades = self.__profundidades
+        minimo = profundidades[posicion]
+        inicio = posicion
+
+        # Se retrocede desde la posición hasta el primer punto de partida válido; la partida inicial siempre lo es
+        while True:
+            minimo = min(minimo, profundidades[inicio])
+
+            if inicio == self.__posicion and minimo >= self.__suelo:
+                break
+
+            if inicio in self.__instantaneas and minimo >= profundidades[inicio]:
+                estado = self.__instantaneas[inicio]
+                self.__partida = self.__crear_partida() if estado is None else decodificar_partida(estado)[0]
+                self.__posicion = inicio
+                self.__suelo = profundidades[inicio]
+                break
+
+            inicio -= 1
+
+        self.avanzar(posicion - self.__posicion)
+
+    def reproducir(self, velocidad=None, al_aplicar=None):
+        """
+        Reproduce el resto de la grabación.
+
+        :param velocidad: si se indica, las jugadas se reproducen al ritmo en que se jugaron multiplicado por este
+        factor; si no, a la máxima velocidad
+        :param al_aplicar: función a la que se llama con el reproductor tras cada jugada reproducida al ritmo original
+        """
+        if velocidad is None:
+            self.avanzar(len(self.__jugadas) - self.__posicion)
+            return
+
+        # Las jugadas se reproducen a partir del instante de la jugada actual
+        origen = self.__jugadas[self.__posicion - 1][0] if self.__posicion else 0
+        inicio = time.time()
+
+        while self.__posicion < len(self.__jugadas):
+            espera = (self.__jugadas[self.__posicion][0] - origen) / 1000.0 / velocidad - (time.time() - inicio)
+
+            if espera > 0:
+                time.sleep(espera)
+
+            self.avanzar()
+
+            if al_aplicar is not None:
+                al_aplicar(self)
+
+
+def cargar_grabacion(nombre_fichero, intervalo=INTERVALO_INSTANTANEAS):
+    """
+    Crea un reproductor para una grabación guardada en un fichero.
+
+    :param nombre_fichero: nombre del fichero
+    :param intervalo: número de jugadas entre dos instantáneas
+    :return: el reproductor
+    :raise IOError: si no se puede abrir el fichero
+    :raise ValueError: si el fichero no es una grabación válida
+    """
+    with open(nombre_fichero, "rb") as fichero:
+        return Reproductor(fichero.read(), intervalo)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reproduce una partida grabada.")
+    parser.add_argument("grabacion", help="fichero de la grabación")
+    parser.add_argument("--tiempo-real", action="store_true",
+                        help="reproduce las jugadas al ritmo en que se jugaron, mostrando el tablero tras cada una")
+    parser.add_argument("--velocidad", type=float, default=1.0, help="factor de velocidad con --tiempo-real")
+    parser.add_argument("--ir-a", type=int, help="reproduce sólo hasta la jugada indicada")
+    argumentos = parser.parse_args()
+
+    if argumentos.velocidad <= 0:
+        parser.error("la velocidad debe ser positiva")
+
+    try:
+        reproductor = cargar_grabacion(argumentos.grabacion)
+    except (IOError, ValueError) as e:
+        parser.error(str(e))
+
+    inicio = time.time()
+
+    if argumentos.ir_a is not None:
+        reproductor.ir_a(argumentos.ir_a)
+    elif argumentos.tiempo_real:
+        reproductor.reproducir(argumentos.velocidad,
+                               lambda r: imprimir_tablero(r.get_partida(), r.get_jugadas()[r.get_posicion() - 1][0] /
+                                                          1000.0))
+    else:
+        reproductor.reproducir()
+
+    duracion = time.time() - inicio
+    partida = reproductor.get_partida()
+    jugadas = reproductor.get_jugadas()
+    tiempo = jugadas[reproductor.get_posicion() - 1][0] / 1000.0 if reproductor.get_posicion() else 0
+
+    imprimir_tablero(partida, tiempo)
+
+    print "JUGADAS REPRODUCIDAS: %d DE %d (%.3f s)" % (reproductor.get_posicion(), len(reproductor), duracion)
+
+    if partida.is_fin_de_partida():
+        print "PARTIDA GANADA" if partida.is_partida_ganada() else "PARTIDA PERDIDA"
+    else:
+        print "PARTIDA SIN TERMINAR"
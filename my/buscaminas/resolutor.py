@@ -0,0 +1,590 @@
+# coding=utf-8
+
+"""
+Resolutor por propagación de restricciones para el Buscaminas en rejilla hexagonal.
+
+El resolutor sólo usa la información que ve el jugador: qué celdas están abiertas, su número de minas por descubrir y
+qué celdas están marcadas. Cada celda abierta sin mina impone una restricción sobre sus vecinas cerradas: entre ellas
+hay tantas minas como su número de minas por descubrir más el número de vecinas marcadas. Las marcas no se dan por
+buenas, ya que el jugador puede haberse equivocado, por lo que las celdas marcadas se tratan como desconocidas.
+
+Una marca equivocada hace que las celdas vecinas muestren menos minas por descubrir de las que tienen, y al abrir una
+celda que muestra cero se abren automáticamente sus vecinas, por lo que abrir una celda segura puede llegar a abrir una
+mina. Por eso las marcas que no se han deducido como minas se consideran dudosas, y sólo se propone abrir una celda
+segura si la apertura automática que puede provocar no alcanza ninguna vecina de una marca dudosa. Si se deduce que
+una celda marcada no tiene mina, se propone quitar la marca antes que cualquier otra jugada.
+
+Las deducciones se obtienen con tres reglas, de menor a mayor coste:
+    - Reglas de una celda: si a una restricción no le quedan minas, todas sus celdas son seguras, y si le quedan
+      tantas minas como celdas, todas tienen mina.
+
+    - Reducción por parejas: para dos restricciones A y B que comparten celdas, las minas de B menos las de A son
+      las minas de B - A menos las de A - B. Si la diferencia es igual al número de celdas de B - A, todas ellas
+      tienen mina y todas las de A - B son seguras (lo que incluye el caso en que A está contenida en B).
+
+    - Enumeración exacta: si las reglas anteriores no deducen nada, se enumeran todas las soluciones de cada
+      componente conexa de la frontera que no tenga más de MAX_CELDAS_ENUMERACION celdas. Las celdas que no tienen
+      mina en ninguna solución son seguras y las que la tienen en todas tienen mina.
+
+El resolutor es incremental: tras cada jugada sólo se vuelven a evaluar las restricciones de las celdas cambiadas y
+de sus vecinas, y sólo se enumeran las componentes que contienen alguna celda afectada, por lo que el coste de cada
+pista depende del tamaño del cambio y no del tamaño del tablero.
+
+Autor: Richard Albán Fernández
+"""
+
+from collections import deque
+from partida import MARCAR, ABRIR
+from tablero import ABIERTA, MARCADA, MINA
+
+# Número máximo de celdas de una componente de la frontera para enumerar todas sus soluciones
+MAX_CELDAS_ENUMERACION = 18
+
+
+class Resolutor():
+    """
+    Deduce qué celdas cerradas de una partida son seguras y cuáles tienen mina, manteniendo las deducciones
+    actualizadas a medida que se juega.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, partida):
+        """
+        Se inicializa el resolutor para una partida, examinando todas las celdas abiertas de su tablero.
+
+        :param partida: partida a resolver
+        """
+        self.__partida = partida
+        self.__tablero = partida.get_tablero()
+        self.__conocidas = {}
+        self.__seguras = set()
+        self.__minas_por_marcar = set()
+        self.__cola = deque()
+        self.__en_cola = set()
+        self.__pendientes = set()
+        self.__dudosas = set()
+
+        estados = self.__tablero.get_estados()
+
+        # Al principio ninguna marca se ha deducido como mina
+        for estado in (MARCADA, MARCADA | MINA):
+            k = estados.find(chr(estado))
+
+            while k != -1:
+                self.__dudosas.add(k)
+                k = estados.find(chr(estado), k + 1)
+
+        # Se examinan todas las celdas abiertas sin mina, que son las que se pueden encontrar en la frontera
+        for estado in (ABIERTA, ABIERTA | MARCADA):
+            k = estados.find(chr(estado))
+
+            while k != -1:
+                self.__encolar(k)
+                k = estados.find(chr(estado), k + 1)
+
+    def get_partida(self):
+        """
+        Devuelve la partida que se resuelve.
+
+        :return: partida del resolutor
+        """
+        return self.__partida
+
+    def actualizar(self, cambiadas):
+        """
+        Indica al resolutor las celdas que han cambiado con una jugada, para que vuelva a evaluar sólo las
+        restricciones afectadas.
+
+        :param cambiadas: índices de las celdas que han cambiado (Resultado.get_cambiadas)
+        """
+        tablero = self.__tablero
+        estados = tablero.get_estados()
+
+        for k in cambiadas:
+            if estados[k] & ABIERTA:
+                self.__conocidas.pop(k, None)
+                self.__seguras.discard(k)
+                self.__minas_por_marcar.discard(k)
+                self.__dudosas.discard(k)
+                self.__encolar(k)
+            elif estados[k] & MARCADA:
+                self.__minas_por_marcar.discard(k)
+
+                if self.__conocidas.get(k) != 1:
+                    self.__dudosas.add(k)
+            else:
+                self.__dudosas.discard(k)
+
+                if self.__conocidas.get(k) == 1:
+                    self.__minas_por_marcar.add(k)
+
+            for vecina in tablero.get_vecinas(k):
+                if estados[vecina] & ABIERTA:
+                    self.__encolar(vecina)
+
+    def deducir(self):
+        """
+        Aplica las reglas hasta que no se pueden deducir más celdas y devuelve las deducciones sobre las celdas que
+        siguen cerradas.
+
+        :return: tupla con la lista de índices de las celdas seguras y la de las celdas con mina
+        """
+        self.__propagar()
+
+        while self.__enumerar():
+            self.__propagar()
+
+        estados = self.__tablero.get_estados()
+        minas = [k for k, mina in self.__conocidas.items() if mina and not estados[k] & ABIERTA]
+
+        return sorted(self.__seguras), sorted(minas)
+
+    def pista(self):
+        """
+        Devuelve una jugada que se puede hacer sin riesgo: quitar la marca de una celda marcada que no tiene mina,
+        abrir una celda segura cuya apertura no pueda alcanzar ninguna mina o, si no hay ninguna, marcar una celda con
+        mina que no esté marcada. Sólo se enumeran soluciones si las reglas más sencillas no dan ninguna jugada.
+
+        :return: tupla (fila, columna, accion), o None si no se puede deducir ninguna jugada
+        """
+        if self.__partida.is_fin_de_partida():
+            return None
+
+        self.__propagar()
+        jugada = self.__siguiente_jugada()
+
+        while jugada is None and self.__enumerar():
+            self.__propagar()
+            jugada = self.__siguiente_jugada()
+
+        return jugada
+
+    def resolver(self):
+        """
+        Juega la partida mientras se puedan deducir jugadas seguras: abre todas las celdas seguras y marca todas las
+        celdas con mina, actualizando las deducciones tras cada lote de jugadas.
+
+        :return: lista de jugadas (fila, columna, accion) realizadas
+        """
+        partida = self.__partida
+        realizadas = []
+
+        while not partida.is_fin_de_partida():
+            self.deducir()
+            estados = self.__tablero.get_estados()
+            zona = self.__zona_dudosa()
+
+            # Primero se quitan las marcas equivocadas, lo que también se hace con MARCAR
+            jugadas = [(k, MARCAR) for k in sorted(self.__seguras) if estados[k] & MARCADA]
+
+            # Si hay marcas equivocadas que no se han podido deducir puede no haber marcas para todas las minas
+            restantes = partida.get_minas() - self.__tablero.get_marcadas() + len(jugadas)
+
+            jugadas.extend((k, ABRIR) for k in sorted(self.__seguras)
+                           if not estados[k] & MARCADA and self.__apertura_segura(k, zona))
+            jugadas.extend((k, MARCAR) for k in sorted(self.__minas_por_marcar)[:max(restantes, 0)])
+
+            if not jugadas:
+                break
+
+            enviadas = []
+            resultado = partida.aplicar_lote(self.__pendientes_de_jugar(jugadas, enviadas))
+            realizadas.extend(enviadas[:resultado.get_aplicadas()])
+            self.actualizar(resultado.get_cambiadas())
+
+            if not resultado.is_valida():
+                break
+
+        return realizadas
+
+    def __siguiente_jugada(self):
+        """
+        Devuelve una de las jugadas deducidas que todavía no se han hecho.
+
+        :return: tupla (fila, columna, accion), o None si no hay ninguna
+        """
+        estados = self.__tablero.get_estados()
+        columnas = self.__tablero.get_columnas()
+
+        # Una celda segura marcada tiene una marca equivocada, que se quita antes de nada
+        for k in self.__seguras:
+            if estados[k] & MARCADA:
+                return divmod(k, columnas) + (MARCAR,)
+
+        zona = self.__zona_dudosa()
+
+        for k in self.__seguras:
+            if self.__apertura_segura(k, zona):
+                return divmod(k, columnas) + (ABRIR,)
+
+        # Si hay marcas equivocadas que no se han podido deducir puede no haber marcas para todas las minas
+        if self.__tablero.get_marcadas() < self.__partida.get_minas():
+            for k in self.__minas_por_marcar:
+                return divmod(k, columnas) + (MARCAR,)
+
+        return None
+
+    def __zona_dudosa(self):
+        """
+        Devuelve las celdas vecinas de las marcas dudosas, que son las que pueden mostrar menos minas por descubrir de
+        las que tienen.
+
+        :return: conjunto de índices de celdas
+        """
+        tablero = self.__tablero
+        zona = set()
+
+        for k in self.__dudosas:
+            zona.update(tablero.get_vecinas(k))
+
+        return zona
+
+    def __apertura_segura(self, k, zona):
+        """
+        Determina si abrir una celda segura no puede abrir ninguna mina. Una celda abierta que no es vecina de ninguna
+        marca dudosa sólo abre sus vecinas si ninguna de ellas tiene mina, por lo que basta con recorrer las celdas
+        que puede alcanzar la apertura automática y comprobar que ninguna está en la zona dudosa. El recorrido no
+        sigue por las celdas vecinas de una mina deducida sin marcar, que no pueden mostrar cero.
+
+        :param k: índice de la celda segura
+        :param zona: conjunto de celdas vecinas de las marcas dudosas (ver __zona_dudosa)
+        :return: True si la apertura no puede abrir ninguna mina y False en caso contrario
+        """
+        if not zona:
+            return True
+
+        tablero = self.__tablero
+        estados = tablero.get_estados()
+        conocidas = self.__conocidas
+        visitadas = set([k])
+        cola = deque([k])
+
+        while cola:
+            celda = cola.popleft()
+
+            if celda in zona:
+                return False
+
+            vecinas = [vecina for vecina in tablero.get_vecinas(celda) if not estados[vecina] & (ABIERTA | MARCADA)]
+
+            if any(conocidas.get(vecina) == 1 for vecina in vecinas):
+                continue
+
+            for vecina in vecinas:
+                if vecina not in visitadas:
+                    visitadas.add(vecina)
+                    cola.append(vecina)
+
+        return True
+
+    def __pendientes_de_jugar(self, jugadas, enviadas):
+        """
+        Devuelve las jugadas de una lista a medida que se aplican, saltando las celdas que ya se han abierto con una
+        jugada anterior del mismo lote, ya que volver a abrirlas abriría también sus vecinas.
+
+        :param jugadas: lista de tuplas (indice, accion)
+        :param enviadas: lista en la que se guardan las jugadas devueltas
+        :return: generador de jugadas (fila, columna, accion)
+        """
+        estados = self.__tablero.get_estados()
+        columnas = self.__tablero.get_columnas()
+
+        for k, accion in jugadas:
+            if not estados[k] & ABIERTA:
+                jugada = divmod(k, columnas) + (accion,)
+                enviadas.append(jugada)
+                yield jugada
+
+    def get_restriccion(self, k):
+        """
+        Devuelve la restricción que impone una celda abierta sobre sus vecinas cerradas de las que todavía no se ha
+        deducido nada.
+
+        :param k: índice de la celda abierta
+        :return: tupla con la lista de celdas desconocidas y el número de minas que hay entre ellas
+        """
+        tablero = self.__tablero
+        estados = tablero.get_estados()
+        conocidas = self.__conocidas
+        celdas = []
+        minas = tablero.get_minas_por_descubrir(k)
+
+        for vecina in tablero.get_vecinas(k):
+            estado = estados[vecina]
+
+            if estado & MARCADA:
+                minas += 1
+
+            if not estado & ABIERTA:
+                if vecina in conocidas:
+                    minas -= conocidas[vecina]
+                else:
+                    celdas.append(vecina)
+
+        return celdas, minas
+
+    def __encolar(self, k):
+        """
+        Añade una celda abierta a la cola de restricciones que se deben evaluar.
+
+        :param k: índice de la celda
+        """
+        if k not in self.__en_cola and not self.__tablero.get_estados()[k] & MINA:
+            self.__en_cola.add(k)
+            self.__cola.append(k)
+
+    def __restricciones_de(self, celda):
+        """
+        Devuelve las celdas abiertas sin mina vecinas de una celda cerrada, que son las que imponen restricciones sobre
+        ella.
+
+        :param celda: índice de la celda cerrada
+        :return: lista de índices de las celdas abiertas
+        """
+        estados = self.__tablero.get_estados()
+
+        return [vecina for vecina in self.__tablero.get_vecinas(celda)
+                if estados[vecina] & ABIERTA and not estados[vecina] & MINA]
+
+    def __deducir_celda(self, celda, mina):
+        """
+        Guarda la deducción sobre una celda y encola las restricciones en las que participa.
+
+        :param celda: índice de la celda
+        :param mina: 1 si la celda tiene mina y 0 si es segura
+        """
+        if celda in self.__conocidas:
+            return
+
+        self.__conocidas[celda] = mina
+
+        if not mina:
+            self.__seguras.add(celda)
+        elif not self.__tablero.get_estados()[celda] & MARCADA:
+            self.__minas_por_marcar.add(celda)
+        else:
+            self.__dudosas.discard(celda)
+
+        for k in self.__restricciones_de(celda):
+            self.__encolar(k)
+            self.__pendientes.update(self.get_restriccion(k)[0])
+
+    def __propagar(self):
+        """
+        Evalúa las restricciones de la cola con las reglas de una celda y de reducción por parejas hasta vaciarla.
+        """
+        cola = self.__cola
+
+        while cola:
+            k = cola.popleft()
+            self.__en_cola.discard(k)
+
+            celdas, minas = self.get_restriccion(k)
+
+            if not celdas:
+                continue
+
+            self.__pendientes.update(celdas)
+
+            if minas == 0 or minas == len(celdas):
+                for celda in celdas:
+                    self.__deducir_celda(celda, 1 if minas else 0)
+                continue
+
+            # Reducción por parejas con las restricciones que comparten alguna celda con la de k
+            conjunto = set(celdas)
+            otras = set()
+
+            for celda in celdas:
+                otras.update(self.__restricciones_de(celda))
+
+            otras.discard(k)
+
+            for otra in otras:
+                celdas_otra, minas_otra = self.get_restriccion(otra)
+                conjunto_otra = set(celdas_otra)
+
+                if self.__reducir(conjunto, minas, conjunto_otra, minas_otra) or \
+                        self.__reducir(conjunto_otra, minas_otra, conjunto, minas):
+                    # La restricción de k ha podido cambiar, por lo que se vuelve a evaluar más adelante
+                    self.__encolar(k)
+                    break
+
+    def __reducir(self, a, minas_a, b, minas_b):
+        """
+        Aplica la reducción por parejas a dos restricciones: si las minas de B menos las de A son tantas como celdas
+        hay en B - A, todas ellas tienen mina y todas las de A - B son seguras.
+
+        :param a: celdas de la restricción A
+        :param minas_a: minas de la restricción A
+        :param b: celdas de la restricción B
+        :param minas_b: minas de la restricción B
+        :return: True si se ha deducido alguna celda y False en caso contrario
+        """
+        solo_b = b - a
+
+        if not a & b or minas_b - minas_a != len(solo_b):
+            return False
+
+        solo_a = a - b
+
+        if not solo_a and not solo_b:
+            return False
+
+        for celda in solo_b:
+            self.__deducir_celda(celda, 1)
+        for celda in solo_a:
+            self.__deducir_celda(celda, 0)
+
+        return True
+
+    def __enumerar(self):
+        """
+        Enumera las soluciones de las componentes de la frontera que contienen alguna celda afectada desde la última
+        enumeración y que no superan MAX_CELDAS_ENUMERACION celdas.
+
+        :return: True si se ha deducido alguna celda y False en caso contrario
+        """
+        estados = self.__tablero.get_estados()
+        pendientes = self.__pendientes
+        visitadas = set()
+        deducido = False
+
+        self.__pendientes = set()
+
+        for inicio in pendientes:
+            if inicio in visitadas or inicio in self.__conocidas or estados[inicio] & ABIERTA:
+                continue
+
+            componente, restricciones = self.__componente(inicio, visitadas)
+
+            if componente is not None and restricciones:
+                for celda, mina in _resolver_componente(componente, restricciones):
+                    self.__deducir_celda(celda, mina)
+                    deducido = True
+
+        return deducido
+
+    def __componente(self, inicio, visitadas):
+        """
+        Obtiene la componente conexa de la frontera que contiene una celda: las celdas desconocidas unidas por
+        compartir alguna restricción.
+
+        :param inicio: índice de una celda desconocida de la componente
+        :param visitadas: conjunto de celdas ya incluidas en alguna componente, que se actualiza
+        :return: tupla con la lista de celdas de la componente y la lista de sus restricciones (celdas, minas), o
+        (None, None) si la componente tiene más de MAX_CELDAS_ENUMERACION celdas
+        """
+        componente = []
+        restricciones = []
+        vistas = set()
+        propias = set([inicio])
+        cola = deque([inicio])
+        visitadas.add(inicio)
+
+        while cola:
+            celda = cola.popleft()
+            componente.append(celda)
+
+            for k in self.__restricciones_de(celda):
+                if k in vistas:
+                    continue
+
+                vistas.add(k)
+                celdas, minas = self.get_restriccion(k)
+                restricciones.append((celdas, minas))
+
+                for otra in celdas:
+                    if otra not in visitadas:
+                        visitadas.add(otra)
+                        propias.add(otra)
+                        cola.append(otra)
+                    elif otra not in propias:
+                        # La celda pertenece a una componente que ya se ha descartado por ser demasiado grande
+                        return None, None
+
+            # Se deja de recorrer la componente en cuanto es demasiado grande para enumerarla
+            if len(propias) > MAX_CELDAS_ENUMERACION:
+                return None, None
+
+        return componente, restricciones
+
+
+def _resolver_componente(componente, restricciones):
+    """
+    Enumera por vuelta atrás todas las asignaciones de minas de una componente que cumplen sus restricciones.
+
+    :param componente: lista de celdas de la componente
+    :param restricciones: lista de restricciones (celdas, minas) de la componente
+    :return: lista de tuplas (celda, mina) con las celdas que tienen el mismo valor en todas las soluciones
+    """
+    posiciones = dict((celda, i) for i, celda in enumerate(componente))
+    por_celda = [[] for _ in componente]
+    faltan = []
+    libres = []
+
+    for r, (celdas, minas) in enumerate(restricciones):
+        faltan.append(minas)
+        libres.append(len(celdas))
+
+        for celda in celdas:
+            por_celda[posiciones[celda]].append(r)
+
+    asignacion = [0] * len(componente)
+    cuentas = [0] * len(componente)
+    soluciones = [0]
+
+    def vuelta_atras(i):
+        if i == len(componente):
+            soluciones[0] += 1
+            for j in range(len(componente)):
+                cuentas[j] += asignacion[j]
+            return
+
+        for valor in (0, 1):
+            valida = True
+
+            for r in por_celda[i]:
+                faltan[r] -= valor
+                libres[r] -= 1
+                if not 0 <= faltan[r] <= libres[r]:
+                    valida = False
+
+            if valida:
+                asignacion[i] = valor
+                vuelta_atras(i + 1)
+
+            for r in por_celda[i]:
+                faltan[r] += valor
+                libres[r] += 1
+
+        asignacion[i] = 0
+
+    vuelta_atras(0)
+
+    if not soluciones[0]:
+        return []
+
+    return [(componente[i], 1 if cuentas[i] else 0) for i in range(len(componente))
+            if cuentas[i] in (0, soluciones[0])]
+
+
+def pista(partida):
+    """
+    Devuelve una jugada segura para una partida.
+
+    :param partida: partida para la que se busca la jugada
+    :return: tupla (fila, columna, accion), o None si no se puede deducir ninguna jugada
+    """
+    return Resolutor(partida).pista()
+
+
+def resolver(partida):
+    """
+    Juega una partida mientras se puedan deducir jugadas seguras.
+
+    :param partida: partida a resolver
+    :return: lista de jugadas (fila, columna, accion) realizadas
+    """
+    return Resolutor(partida).resolver()
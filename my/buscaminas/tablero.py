@@ -0,0 +1,657 @@
+# coding=utf-8
+
+import binascii
+import hashlib
+import random
+import struct
+from array import array
+from bisect import bisect_right
+from collections import deque
+from celda import Celda
+from vecinas import obtener_tabla_vecinas
+
+# Bits del estado de cada celda
+ABIERTA = 1
+MARCADA = 2
+MINA = 4
+
+# Cabecera de la codificación de un tablero: filas y columnas
+CABECERA_CODIFICACION = struct.Struct(">II")
+
+# Tablas de traducción que usan empaquetar_bits y desempaquetar_bits: la primera pasa cada estado al carácter '1' si
+# tiene el bit de estado indicado y '0' si no, y la segunda cada dígito octal '0' a '7' al byte con ese valor
+_ESTADO_A_BIT = dict((bit, "".join("1" if estado & bit else "0" for estado in range(256)))
+                     for bit in (ABIERTA, MARCADA, MINA))
+_OCTAL_A_ESTADO = "".join(chr(int(chr(c), 8)) if chr(c) in "01234567" else chr(0) for c in range(256))
+
+# Tablas de traducción del buffer de estados a una máscara con '\x01' en las celdas que tienen el bit indicado
+_MASCARAS = dict((bit, "".join("\x01" if estado & bit else "\x00" for estado in range(256))) for bit in (MINA, MARCADA))
+
+
+class Tablero():
+    """
+    Representa el tablero del juego Buscaminas. El estado de las celdas se guarda en buffers planos indexados por
+    fila * columnas + columna: un bytearray con los bits ABIERTA, MARCADA y MINA de cada celda y un array de bytes con
+    signo con el número de minas por descubrir, que se mantiene actualizado al poner o quitar minas y al marcar.
+
+    Además se llevan contadores del número de minas, de celdas marcadas, de celdas cerradas sin marcar y de celdas
+    abiertas con mina, de forma que el fin de partida se detecta sin recorrer el tablero.
+
+    Para mantener la compatibilidad con el código que trabaja con objetos Celda, tablero[fila][columna] devuelve una
+    Celda que es una vista sobre la celda correspondiente del tablero.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self, filas, columnas):
+        """
+        Se inicializa un tablero con todas las celdas cerradas, sin marcar y sin minas.
+
+        :param filas: número de filas del tablero
+        :param columnas: número de columnas del tablero
+        """
+        self.__filas = filas
+        self.__columnas = columnas
+        self.__estados = bytearray(filas * columnas)
+        self.__minas_por_descubrir = array('b', [0]) * (filas * columnas)
+        self.__inicios, self.__vecinas = obtener_tabla_vecinas(filas, columnas)
+        self.__minas = 0
+        self.__marcadas = 0
+        self.__cerradas_sin_marcar = filas * columnas
+        self.__minas_abiertas = 0
+
+    def __len__(self):
+        """
+        Devuelve el número de filas del tablero.
+
+        :return: número de filas del tablero
+        """
+        return self.__filas
+
+    def __getitem__(self, fila):
+        """
+        Devuelve una fila del tablero, cuyas celdas se obtienen como objetos Celda.
+
+        :param fila: número de fila
+        :return: fila del tablero
+        """
+        if not 0 <= fila < self.__filas:
+            raise IndexError("Fila fuera del tablero.")
+
+        return _FilaTablero(self, fila * self.__columnas, self.__columnas)
+
+    def get_filas(self):
+        """
+        Devuelve el número de filas del tablero.
+
+        :return: número de filas del tablero
+        """
+        return self.__filas
+
+    def get_columnas(self):
+        """
+        Devuelve el número de columnas del tablero.
+
+        :return: número de columnas del tablero
+        """
+        return self.__columnas
+
+    def get_estados(self):
+        """
+        Devuelve el buffer con los bits de estado de todas las celdas.
+
+        :return: bytearray con el estado de cada celda
+        """
+        return self.__estados
+
+    def get_contadores(self):
+        """
+        Devuelve el buffer con el número de minas por descubrir de todas las celdas.
+
+        :return: array con el número de minas por descubrir de cada celda
+        """
+        return self.__minas_por_descubrir
+
+    def get_minas(self):
+        """
+        Devuelve el número de minas que hay en el tablero.
+
+        :return: número de minas del tablero
+        """
+        return self.__minas
+
+    def get_marcadas(self):
+        """
+        Devuelve el número de celdas marcadas.
+
+        :return: número de celdas marcadas
+        """
+        return self.__marcadas
+
+    def get_cerradas_sin_marcar(self):
+        """
+        Devuelve el número de celdas que están cerradas y sin marcar.
+
+        :return: número de celdas cerradas y sin marcar
+        """
+        return self.__cerradas_sin_marcar
+
+    def get_minas_abiertas(self):
+        """
+        Devuelve el número de celdas abiertas que contienen una mina.
+
+        :return: número de celdas abiertas con mina
+        """
+        return self.__minas_abiertas
+
+    def indice(self, fila, columna):
+        """
+        Devuelve el índice plano de una celda.
+
+        :param fila: fila de la celda
+        :param columna: columna de la celda
+        :return: índice de la celda en los buffers del tablero
+        """
+        return fila * self.__columnas + columna
+
+    def celda(self, indice):
+        """
+        Devuelve una Celda que da acceso a la celda con el índice indicado.
+
+        :param indice: índice de la celda
+        :return: Celda asociada a la celda del tablero
+        """
+        return Celda(self, indice)
+
+    def get_vecinas(self, indice):
+        """
+        Devuelve los índices de las celdas vecinas de una celda.
+
+        :param indice: índice de la celda
+        :return: array con los índices de las celdas vecinas
+        """
+        return self.__vecinas[self.__inicios[indice]:self.__inicios[indice + 1]]
+
+    def is_abierta(self, indice):
+        """
+        Determina si una celda está abierta.
+
+        :param indice: índice de la celda
+        :return: True si la celda está abierta y False en caso contrario
+        """
+        return self.__estados[indice] & ABIERTA != 0
+
+    def is_marcada(self, indice):
+        """
+        Determina si una celda está marcada.
+
+        :param indice: índice de la celda
+        :return: True si la celda está marcada y False en caso contrario
+        """
+        return self.__estados[indice] & MARCADA != 0
+
+    def hay_mina(self, indice):
+        """
+        Determina si una celda contiene una mina.
+
+        :param indice: índice de la celda
+        :return: True si la celda tiene una mina y False en caso contrario
+        """
+        return self.__estados[indice] & MINA != 0
+
+    def get_minas_por_descubrir(self, indice):
+        """
+        Devuelve el número de minas por descubrir de una celda.
+
+        :param indice: índice de la celda
+        :return: número de minas por descubrir
+        """
+        return self.__minas_por_descubrir[indice]
+
+    def set_minas_por_descubrir(self, indice, minas_por_descubrir):
+        """
+        Establece el número de minas por descubrir de una celda.
+
+        :param indice: índice de la celda
+        :param minas_por_descubrir: número de minas por descubrir
+        """
+        self.__minas_por_descubrir[indice] = minas_por_descubrir
+
+    def poner_mina(self, indice):
+        """
+        Pone una mina en una celda y actualiza el número de minas por descubrir de sus vecinas y, si la celda está
+        abierta, el de minas abiertas. Se lanza una excepción en caso de que la celda ya tenga mina.
+
+        :param indice: índice de la celda
+        """
+        if self.__estados[indice] & MINA:
+            raise ValueError("Esta celda ya tiene una mina.")
+
+        self.__estados[indice] |= MINA
+        self.__minas += 1
+        self.__actualizar_vecinas(indice, 1)
+
+        if self.__estados[indice] & ABIERTA:
+            self.__minas_abiertas += 1
+
+    def quitar_mina(self, indice):
+        """
+        Quita la mina de una celda y actualiza el número de minas por descubrir de sus vecinas y, si la celda está
+        abierta, el de minas abiertas. Se lanza una excepción en caso de que la celda no tenga mina.
+
+        :param indice: índice de la celda
+        """
+        if not self.__estados[indice] & MINA:
+            raise ValueError("Esta celda no tiene ninguna mina.")
+
+        self.__estados[indice] &= ~MINA
+        self.__minas -= 1
+        self.__actualizar_vecinas(indice, -1)
+
+        if self.__estados[indice] & ABIERTA:
+            self.__minas_abiertas -= 1
+
+    def marcar(self, indice):
+        """
+        Marca una celda si no está marcada y la desmarca si lo está, actualizando el número de minas por descubrir de
+        sus vecinas. Se lanza una excepción en caso de que se intente marcar una celda abierta.
+
+        :param indice: índice de la celda
+        """
+        estado = self.__estados[indice]
+
+        if estado & MARCADA:
+            self.__estados[indice] = estado & ~MARCADA
+            self.__marcadas -= 1
+            self.__cerradas_sin_marcar += 1
+            self.__actualizar_vecinas(indice, 1)
+        else:
+            if estado & ABIERTA:
+                raise ValueError("No se puede marcar una celda que ya está abierta.")
+
+            self.__estados[indice] = estado | MARCADA
+            self.__marcadas += 1
+            self.__cerradas_sin_marcar -= 1
+            self.__actualizar_vecinas(indice, -1)
+
+    def abrir(self, indice):
+        """
+        Abre una celda. Se lanza una excepción en caso de que la celda ya esté abierta.
+
+        :param indice: índice de la celda
+        """
+        estado = self.__estados[indice]
+
+        if estado & ABIERTA:
+            raise ValueError("No se puede abrir una celda que ya está abierta.")
+
+        self.__estados[indice] = estado | ABIERTA
+
+        if not estado & MARCADA:
+            self.__cerradas_sin_marcar -= 1
+        if estado & MINA:
+            self.__minas_abiertas += 1
+
+    def abrir_region(self, indice):
+        """
+        Abre las celdas vecinas cerradas y no marcadas de una celda y, a partir de ellas, se sigue abriendo en anchura
+        a través de las celdas abiertas que no tengan mina y cuyo número de minas por descubrir sea menor o igual que
+        cero. Las celdas se marcan como abiertas en el momento de encolarlas, por lo que el propio bit ABIERTA del
+        buffer de estados hace de mapa de celdas visitadas.
+
+        :param indice: índice de la celda desde la que se abre la región
+        :return: lista con los índices de las celdas que se han abierto
+        """
+        estados = self.__estados
+        minas_por_descubrir = self.__minas_por_descubrir
+        inicios = self.__inicios
+        vecinas = self.__vecinas
+        abiertas = []
+        minas_abiertas = 0
+        pendientes = deque([indice])
+
+        while pendientes:
+            k = pendientes.popleft()
+
+            for vecina in vecinas[inicios[k]:inicios[k + 1]]:
+                estado = estados[vecina]
+
+                if not estado & (ABIERTA | MARCADA):
+                    estados[vecina] = estado | ABIERTA
+                    abiertas.append(vecina)
+
+                    if estado & MINA:
+                        minas_abiertas += 1
+                    elif minas_por_descubrir[vecina] <= 0:
+                        pendientes.append(vecina)
+
+        self.__cerradas_sin_marcar -= len(abiertas)
+        self.__minas_abiertas += minas_abiertas
+
+        return abiertas
+
+    def abrir_todas(self):
+        """
+        Abre todas las celdas del tablero.
+
+        :return: lista con los índices de las celdas que se han abierto
+        """
+        estados = self.__estados
+        abiertas = []
+
+        for k in range(len(estados)):
+            if not estados[k] & ABIERTA:
+                estados[k] |= ABIERTA
+                abiertas.append(k)
+
+        self.__cerradas_sin_marcar = 0
+        self.__minas_abiertas = self.__minas
+
+        return abiertas
+
+    def cerrar(self, indice):
+        """
+        Cierra una celda abierta, deshaciendo su apertura. Se lanza una excepción en caso de que la celda esté cerrada.
+
+        :param indice: índice de la celda
+        """
+        estado = self.__estados[indice]
+
+        if not estado & ABIERTA:
+            raise ValueError("No se puede cerrar una celda que ya está cerrada.")
+
+        self.__estados[indice] = estado & ~ABIERTA
+
+        if not estado & MARCADA:
+            self.__cerradas_sin_marcar += 1
+        if estado & MINA:
+            self.__minas_abiertas -= 1
+
+    def cerrar_celdas(self, indices):
+        """
+        Cierra las celdas indicadas, que se suponen abiertas, deshaciendo su apertura con abrir, abrir_region o
+        abrir_todas. El coste depende del número de celdas cerradas y no del tamaño del tablero.
+
+        :param indices: índices de las celdas a cerrar
+        """
+        estados = self.__estados
+        cerradas_sin_marcar = 0
+        minas_abiertas = 0
+
+        for k in indices:
+            estado = estados[k]
+            estados[k] = estado & ~ABIERTA
+
+            if not estado & MARCADA:
+                cerradas_sin_marcar += 1
+            if estado & MINA:
+                minas_abiertas += 1
+
+        self.__cerradas_sin_marcar += cerradas_sin_marcar
+        self.__minas_abiertas -= minas_abiertas
+
+    def mover_mina_a_primera_posicion_sin_minas(self, indice):
+        """
+        Mueve la mina de una celda a la primera celda del tablero que no contenga minas. Si todas las celdas tienen
+        mina, el tablero no se modifica.
+
+        :param indice: índice de la celda cuya mina se mueve
+        :return: índice de la celda a la que se ha movido la mina, o None si no se ha movido
+        """
+        estados = self.__estados
+
+        for k in range(len(estados)):
+            if not estados[k] & MINA:
+                self.quitar_mina(indice)
+                self.poner_mina(k)
+                return k
+
+        return None
+
+    def set_estados(self, estados):
+        """
+        Sustituye el estado de todas las celdas del tablero y recalcula los contadores y el número de minas por
+        descubrir de cada celda.
+
+        :param estados: bytearray con los bits de estado de cada celda
+        """
+        if len(estados) != len(self.__estados):
+            raise ValueError("El número de estados no coincide con el número de celdas del tablero.")
+
+        self.__estados = estados = bytearray(estados)
+
+        # Los contadores se obtienen contando cada combinación de bits directamente sobre el buffer
+        cuentas = [estados.count(chr(estado)) for estado in range((ABIERTA | MARCADA | MINA) + 1)]
+        self.__minas = sum(cuentas[estado] for estado in range(len(cuentas)) if estado & MINA)
+        self.__marcadas = sum(cuentas[estado] for estado in range(len(cuentas)) if estado & MARCADA)
+        self.__cerradas_sin_marcar = cuentas[0] + cuentas[MINA]
+        self.__minas_abiertas = cuentas[ABIERTA | MINA] + cuentas[ABIERTA | MARCADA | MINA]
+
+        self.calcular_minas_por_descubrir()
+
+    def codificar(self):
+        """
+        Devuelve la codificación canónica de las minas del tablero: una cabecera con las filas y las columnas seguida
+        de un conjunto de bits, uno por celda en orden de índice, en el que cada bit indica si la celda tiene mina.
+
+        :return: cadena de bytes con la codificación del tablero
+        """
+        return codificar_minas(self.__filas, self.__columnas, self.__estados)
+
+    def huella(self):
+        """
+        Devuelve una huella de las minas del tablero, que es la misma para dos tableros si y sólo si tienen las mismas
+        dimensiones y las minas en las mismas celdas.
+
+        :return: cadena hexadecimal con la huella del tablero
+        """
+        return calcular_huella(self.codificar())
+
+    def calcular_minas_por_descubrir(self):
+        """
+        Calcula desde cero el número de minas por descubrir de todas las celdas a partir de las minas y las marcas. Sólo
+        se recorren las vecinas de las celdas con mina o marcadas, que se localizan buscando sobre una máscara del
+        buffer de estados, por lo que el coste depende del número de minas y marcas y no del de celdas.
+        """
+        inicios = self.__inicios
+        vecinas = self.__vecinas
+        minas_por_descubrir = self.__minas_por_descubrir
+
+        minas_por_descubrir[:] = array('b', [0]) * len(minas_por_descubrir)
+
+        for bit, incremento in ((MINA, 1), (MARCADA, -1)):
+            mascara = self.__estados.translate(_MASCARAS[bit])
+            k = mascara.find("\x01")
+
+            while k != -1:
+                for vecina in vecinas[inicios[k]:inicios[k + 1]]:
+                    minas_por_descubrir[vecina] += incremento
+
+                k = mascara.find("\x01", k + 1)
+
+    def __actualizar_vecinas(self, indice, incremento):
+        """
+        Suma el incremento indicado al número de minas por descubrir de las celdas vecinas de una celda.
+
+        :param indice: índice de la celda
+        :param incremento: cantidad a sumar (1 al poner una mina o desmarcar, -1 al quitar una mina o marcar)
+        """
+        minas_por_descubrir = self.__minas_por_descubrir
+        vecinas = self.__vecinas
+
+        for k in range(self.__inicios[indice], self.__inicios[indice + 1]):
+            minas_por_descubrir[vecinas[k]] += incremento
+
+
+def crear_tablero(filas, columnas, minas, semilla=None, zona_segura=()):
+    """
+    Se crea un tablero a partir del número de filas, el número de columnas y el número de filas. Las minas se colocan
+    con un generador de números aleatorios propio, por lo que con la misma semilla se obtiene siempre el mismo tablero.
+
+    :param filas: número de filas que tiene el tablero
+    :param columnas: número de columnas que tiene el tablero
+    :param minas: número de minas que tiene el tablero
+    :param semilla: semilla del generador de números aleatorios
+    :param zona_segura: índices de las celdas en las que no se puede colocar ninguna mina
+    :return: el tablero con las dimensiones y minas adecuadas
+    """
+    tablero = Tablero(filas, columnas)
+
+    colocar_minas(tablero, minas, random.Random(semilla), zona_segura)
+
+    return tablero
+
+
+def decodificar_tablero(datos):
+    """
+    Crea un tablero con todas las celdas cerradas y sin marcar a partir de la codificación de sus minas obtenida con
+    Tablero.codificar.
+
+    :param datos: cadena de bytes con la codificación del tablero
+    :return: el tablero con las dimensiones y minas de la codificación
+    """
+    filas, columnas = CABECERA_CODIFICACION.unpack_from(datos)
+    celdas = filas * columnas
+    datos = datos[CABECERA_CODIFICACION.size:]
+
+    if len(datos) != (celdas + 7) // 8:
+        raise ValueError("La codificación no corresponde a un tablero de %d x %d." % (filas, columnas))
+
+    tablero = Tablero(filas, columnas)
+    tablero.set_estados(desempaquetar_bits(((MINA, datos),), celdas))
+
+    return tablero
+
+
+def codificar_minas(filas, columnas, estados):
+    """
+    Devuelve la codificación canónica de las minas de un tablero, la misma que Tablero.codificar, a partir de su buffer
+    de estados, sin necesidad de crear el tablero.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param estados: buffer con los bits de estado de cada celda
+    :return: cadena de bytes con la codificación del tablero
+    """
+    return CABECERA_CODIFICACION.pack(filas, columnas) + empaquetar_bits(estados, MINA)
+
+
+def calcular_huella(codificacion):
+    """
+    Devuelve la huella que corresponde a la codificación de las minas de un tablero.
+
+    :param codificacion: cadena de bytes con la codificación del tablero
+    :return: cadena hexadecimal con la huella del tablero
+    """
+    return hashlib.sha1(codificacion).hexdigest()[:16]
+
+
+def empaquetar_bits(estados, bit):
+    """
+    Devuelve un conjunto de bits, uno por celda en orden de índice y empezando por el bit más significativo de cada
+    byte, en el que cada bit indica si la celda tiene el bit de estado indicado.
+
+    El buffer completo se convierte de una vez, sin recorrer las celdas en Python: se traduce a una cadena de
+    caracteres '0' y '1', que se completa con ceros hasta un múltiplo de 8, se lee como un número en base 2 y se
+    escribe en hexadecimal para pasarlo a bytes con unhexlify.
+
+    :param estados: buffer con los bits de estado de cada celda
+    :param bit: bit de estado (ABIERTA, MARCADA o MINA)
+    :return: cadena de bytes con el conjunto de bits
+    """
+    bits = str(estados).translate(_ESTADO_A_BIT[bit])
+    bits += "0" * (-len(bits) % 8)
+
+    return binascii.unhexlify("%0*x" % (len(bits) // 4, int(bits, 2))) if bits else ""
+
+
+def desempaquetar_bits(planos, celdas):
+    """
+    Reconstruye el buffer de estados a partir de los conjuntos de bits obtenidos con empaquetar_bits, también sin
+    recorrer las celdas en Python. Cada conjunto se escribe en binario, con un carácter '0' o '1' por celda, y esa
+    cadena se lee en base 8, de modo que se obtiene un número cuyo dígito octal de cada celda es 1 si la celda tiene
+    el bit. Al multiplicar ese número por el bit de estado y sumar los de todos los conjuntos, el dígito octal de cada
+    celda pasa a ser su estado completo (los bits de estado son distintos y caben en un dígito octal, por lo que la
+    suma no produce acarreos), y basta con escribir el resultado en octal y traducir cada dígito a un byte.
+
+    :param planos: secuencia de tuplas (bit, datos) con cada bit de estado y su conjunto de bits
+    :param celdas: número de celdas del tablero
+    :return: bytearray con los bits de estado de cada celda
+    """
+    valor = 0
+
+    for bit, datos in planos:
+        if len(datos) != (celdas + 7) // 8:
+            raise ValueError("El conjunto de bits no corresponde a un tablero de %d celdas." % celdas)
+
+        if celdas:
+            # Se descartan los bits de relleno del último byte, que no corresponden a ninguna celda
+            bits = format(int(binascii.hexlify(datos), 16), "0%db" % (len(datos) * 8))[:celdas]
+            valor += bit * int(bits, 8)
+
+    return bytearray(("%0*o" % (celdas, valor)).translate(_OCTAL_A_ESTADO)) if celdas else bytearray()
+
+
+def colocar_minas(tablero, minas, generador=None, zona_segura=()):
+    """
+    Coloca al azar el número de minas indicado en las celdas de un tablero que no tengan mina, salvo en las celdas de
+    la zona segura. Las posiciones se eligen con un muestreo sin reemplazamiento sobre los índices permitidos, por lo
+    que el coste depende del número de minas y no de la densidad del tablero. Se lanza una excepción en caso de que no
+    haya sitio para todas las minas.
+
+    :param tablero: tablero en el que se colocan las minas
+    :param minas: número de minas a colocar
+    :param generador: generador de números aleatorios a usar (random.Random); si no se indica se usa el del módulo
+    random
+    :param zona_segura: índices de las celdas en las que no se puede colocar ninguna mina
+    :return: lista con los índices de las celdas en las que se han colocado las minas
+    """
+    if generador is None:
+        generador = random
+
+    estados = tablero.get_estados()
+
+    # Las celdas que ya tienen mina tampoco se pueden elegir
+    excluidas = set(zona_segura)
+    if tablero.get_minas():
+        excluidas.update(k for k in range(len(estados)) if estados[k] & MINA)
+    excluidas = sorted(excluidas)
+
+    libres = len(estados) - len(excluidas)
+
+    if minas > libres:
+        raise ValueError("No caben tantas minas en el tablero.")
+
+    colocadas = []
+
+    # Cada posición elegida entre las libres se traslada a su índice real sumándole las celdas excluidas que quedan
+    # antes. Delante de la excluida i hay excluidas[i] - i celdas libres, así que hay que saltar las excluidas con
+    # excluidas[i] - i <= posicion, que se buscan por bisección porque excluidas[i] - i nunca decrece
+    libres_antes = [excluida - i for i, excluida in enumerate(excluidas)]
+
+    for posicion in generador.sample(xrange(libres), minas):
+        indice = posicion + bisect_right(libres_antes, posicion)
+        tablero.poner_mina(indice)
+        colocadas.append(indice)
+
+    return colocadas
+
+
+class _FilaTablero():
+    """
+    Fila de un Tablero, que permite seguir accediendo a las celdas con la sintaxis tablero[fila][columna].
+    """
+
+    def __init__(self, tablero, inicio, columnas):
+        self.__tablero = tablero
+        self.__inicio = inicio
+        self.__columnas = columnas
+
+    def __len__(self):
+        return self.__columnas
+
+    def __getitem__(self, columna):
+        if not 0 <= columna < self.__columnas:
+            raise IndexError("Columna fuera del tablero.")
+
+        return Celda(self.__tablero, self.__inicio + columna)
@@ -0,0 +1,104 @@
+# coding=utf-8
+
+"""
+Pruebas de la carga de corpus de tableros desde directorios y archivos tar o zip.
+
+Autor: Richard Albán Fernández
+"""
+
+import os
+import shutil
+import tarfile
+import tempfile
+import unittest
+import zipfile
+from corpus import cargar_corpus
+
+# Ficheros del corpus de prueba, en el orden en el que se cargan desde el directorio
+FICHEROS = (
+    ("a.txt", "2 3\n*..\n..*\n"),
+    ("b.txt", "2 3\n*..\n.x*\n"),
+    (os.path.join("sub", "c.txt"), "3 3\n...\n.*.\n...\n"),
+    (os.path.join("sub", "d.txt"), "1 4\n**..\n"),
+)
+
+
+def contenido(corpus):
+    """
+    Devuelve todo lo que se ha cargado en un corpus.
+
+    :param corpus: el corpus
+    :return: tupla con la lista de datos de cada tablero y la lista de nombres de los ficheros con error
+    """
+    tableros = [(corpus.get_nombre(k), corpus.get_codificacion(k), corpus.get_huella(k), corpus.get_dimensiones(k),
+                 corpus.get_minas(k)) for k in range(len(corpus))]
+
+    return tableros, [nombre for nombre, _ in corpus.get_errores()]
+
+
+class PruebasCorpus(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.raiz = os.path.join(self.directorio, "tableros")
+        os.makedirs(os.path.join(self.raiz, "sub"))
+
+        for nombre, texto in FICHEROS:
+            with open(os.path.join(self.raiz, nombre), "wb") as fichero:
+                fichero.write(texto)
+
+        self.tar = os.path.join(self.directorio, "tableros.tar")
+        archivo = tarfile.open(self.tar, "w")
+
+        for nombre, _ in FICHEROS:
+            archivo.add(os.path.join(self.raiz, nombre), nombre)
+        archivo.close()
+
+        self.zip = os.path.join(self.directorio, "tableros.zip")
+        archivo = zipfile.ZipFile(self.zip, "w")
+
+        for nombre, _ in FICHEROS:
+            archivo.write(os.path.join(self.raiz, nombre), nombre)
+        archivo.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_directorio_tar_y_zip(self):
+        corpus = cargar_corpus(self.raiz, procesos=1)
+        tableros, errores = contenido(corpus)
+
+        self.assertEqual([nombre for nombre, _, _, _, _ in tableros], [FICHEROS[0][0], FICHEROS[2][0], FICHEROS[3][0]])
+        self.assertEqual([(dimensiones, minas) for _, _, _, dimensiones, minas in tableros],
+                         [((2, 3), 2), ((3, 3), 1), ((1, 4), 2)])
+        self.assertEqual(errores, [FICHEROS[1][0]])
+
+        for ruta in (self.tar, self.zip):
+            self.assertEqual(contenido(cargar_corpus(ruta, procesos=1)), (tableros, errores))
+
+        # Con varios procesos se obtiene lo mismo y en el mismo orden
+        self.assertEqual(contenido(cargar_corpus(self.zip, procesos=2)), (tableros, errores))
+
+    def test_error_en_un_miembro(self):
+        for ruta in (self.raiz, self.tar, self.zip):
+            (nombre, mensaje), = cargar_corpus(ruta, procesos=1).get_errores()
+
+            self.assertEqual(nombre, FICHEROS[1][0])
+            self.assertIn("Línea 3, columna 2", mensaje)
+
+    def test_tableros_recuperados(self):
+        corpus = cargar_corpus(self.tar, procesos=1)
+        tablero = corpus.get_tablero(corpus.buscar(corpus.get_huella(0)))
+
+        self.assertEqual((tablero.get_filas(), tablero.get_columnas()), (2, 3))
+        self.assertEqual([k for k in range(6) if tablero.hay_mina(k)], [0, 5])
+        self.assertIsNone(corpus.buscar("0" * 16))
+        self.assertEqual(corpus.buscar_dimensiones(1, 4), [2])
+        self.assertEqual(corpus.buscar_dimensiones(2, 3, 1), [])
+
+    def test_ruta_no_valida(self):
+        self.assertRaises(IOError, cargar_corpus, os.path.join(self.raiz, "a.txt"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# coding=utf-8
+
+"""
+Pruebas de la interpretación de las jugadas escritas por el jugador.
+
+Autor: Richard Albán Fernández
+"""
+
+import unittest
+from entrada import ErrorDeJugada, tokenizar_jugadas, interpretar_celda, nombrar_celda
+from partida import ABRIR, MARCAR
+
+
+def leer_hasta_el_error(texto):
+    """
+    Recorre una cadena de jugadas hasta el final o hasta el primer fragmento no válido.
+
+    :param texto: cadena de jugadas
+    :return: tupla con la lista de jugadas reconocidas y la posición del error, o None si no hay ninguno
+    """
+    jugadas = []
+
+    try:
+        for jugada in tokenizar_jugadas(texto):
+            jugadas.append(jugada)
+    except ErrorDeJugada as error:
+        return jugadas, error.posicion
+
+    return jugadas, None
+
+
+class PruebasEntrada(unittest.TestCase):
+
+    def test_varias_jugadas(self):
+        self.assertEqual(list(tokenizar_jugadas("Ab*Cd!Aa*")), [(0, 1, ABRIR), (2, 3, MARCAR), (0, 0, ABRIR)])
+        self.assertEqual(list(tokenizar_jugadas("@=*&/!")), [(26, 26, ABRIR), (30, 30, MARCAR)])
+        self.assertEqual(list(tokenizar_jugadas("")), [])
+
+    def test_espacios(self):
+        self.assertEqual(list(tokenizar_jugadas("  Ab*   Cd! \t")), [(0, 1, ABRIR), (2, 3, MARCAR)])
+        self.assertEqual(list(tokenizar_jugadas("3 , 4*  5,6!")), [(3, 4, ABRIR), (5, 6, MARCAR)])
+        self.assertEqual(list(tokenizar_jugadas("   ")), [])
+
+    def test_coordenadas_numericas(self):
+        self.assertEqual(list(tokenizar_jugadas("120,7*0,999!")), [(120, 7, ABRIR), (0, 999, MARCAR)])
+        self.assertEqual(list(tokenizar_jugadas("Ab*10,20!")), [(0, 1, ABRIR), (10, 20, MARCAR)])
+
+    def test_posicion_del_error(self):
+        # Las jugadas anteriores al error se devuelven, y la posición es la del primer carácter del fragmento
+        self.assertEqual(leer_hasta_el_error("Ab*Cd!xx*Ef*"), ([(0, 1, ABRIR), (2, 3, MARCAR)], 6))
+        self.assertEqual(leer_hasta_el_error("Ab*  Cd?"), ([(0, 1, ABRIR)], 5))
+        self.assertEqual(leer_hasta_el_error("1,2*3,*"), ([(1, 2, ABRIR)], 4))
+        self.assertEqual(leer_hasta_el_error("Ab"), ([], 0))
+        self.assertEqual(leer_hasta_el_error("Ab* !"), ([(0, 1, ABRIR)], 4))
+
+    def test_mensaje_del_error(self):
+        try:
+            list(tokenizar_jugadas("Ab*?"))
+        except ErrorDeJugada as error:
+            self.assertIsInstance(error, ValueError)
+            self.assertIn("3", str(error))
+        else:
+            self.fail("Se esperaba un ErrorDeJugada")
+
+    def test_nombres_de_celdas(self):
+        # Hasta 31 x 31 las celdas se nombran con letras, incluidas las filas y columnas tras la z
+        self.assertEqual(nombrar_celda(26, 27, 31, 31), "@+")
+        self.assertEqual(nombrar_celda(30, 30, 31, 31), "&/")
+
+        for filas, columnas in ((9, 9), (31, 31), (32, 31), (31, 40), (1000, 1000)):
+            for fila in set((0, 25, 26, 29, 30, filas - 1)):
+                for columna in set((0, 25, 26, 27, 30, columnas - 1)):
+                    if fila < filas and columna < columnas:
+                        nombre = nombrar_celda(fila, columna, filas, columnas)
+
+                        self.assertEqual(interpretar_celda(nombre), (fila, columna))
+                        self.assertEqual(list(tokenizar_jugadas(nombre + "*")), [(fila, columna, ABRIR)])
+
+        # Con más de 31 filas o columnas se usan números
+        self.assertEqual(nombrar_celda(30, 26, 32, 31), "30,26")
+        self.assertEqual(interpretar_celda(" 999 , 27 "), (999, 27))
+        self.assertIsNone(interpretar_celda("30,"))
+        self.assertIsNone(interpretar_celda("Ab*"))
+
+
+if __name__ == '__main__':
+    unittest.main()
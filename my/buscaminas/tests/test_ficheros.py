@@ -0,0 +1,84 @@
+# coding=utf-8
+
+"""
+Pruebas de la lectura de los ficheros de definición de tableros.
+
+Autor: Richard Albán Fernández
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from ficheros import ErrorDeFormato, cargar_tablero
+
+
+class PruebasFicheros(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.fichero = os.path.join(self.directorio, "tablero.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def cargar(self, contenido):
+        with open(self.fichero, "wb") as fichero:
+            fichero.write(contenido)
+
+        return cargar_tablero(self.fichero)
+
+    def comprobar_error(self, contenido, linea, columna):
+        try:
+            self.cargar(contenido)
+        except ErrorDeFormato as error:
+            self.assertEqual((error.linea, error.columna), (linea, columna))
+        else:
+            self.fail("Se esperaba un ErrorDeFormato")
+
+    def test_fichero_correcto(self):
+        tablero, minas = self.cargar("3 4\n*...\n..*.\n...*\n")
+
+        self.assertEqual((tablero.get_filas(), tablero.get_columnas(), minas), (3, 4, 3))
+        self.assertEqual([k for k in range(12) if tablero.hay_mina(k)], [0, 6, 11])
+
+        for k in range(12):
+            vecinas = tablero.get_vecinas(k)
+            self.assertEqual(tablero.get_contadores()[k], sum(1 for vecina in vecinas if tablero.hay_mina(vecina)))
+
+    def test_fin_de_linea_y_lineas_en_blanco(self):
+        # Se admiten los finales de línea de Windows, la falta del último y líneas en blanco al final
+        for contenido in ("2 2\r\n.*\r\n*.\r\n", "2 2\n.*\n*.", "2 2\n.*\n*.\n\n  \n"):
+            tablero, minas = self.cargar(contenido)
+
+            self.assertEqual(minas, 2)
+            self.assertEqual([k for k in range(4) if tablero.hay_mina(k)], [1, 2])
+
+    def test_caracter_no_valido(self):
+        self.comprobar_error("2 3\n.*.\n.x.\n", 3, 2)
+        self.comprobar_error("1 3\n#..\n", 2, 1)
+
+    def test_fila_corta_o_larga(self):
+        self.comprobar_error("2 3\n..\n...\n", 2, 3)
+        self.comprobar_error("2 3\n...\n....\n", 3, 4)
+        # Un carácter no válido después de la última columna se indica como fila larga
+        self.comprobar_error("1 3\n...x\n", 2, 4)
+
+    def test_numero_de_filas(self):
+        self.comprobar_error("3 2\n..\n..\n", 4, None)
+        self.comprobar_error("1 2\n..\n..\n", 3, None)
+
+    def test_sin_ultimo_fin_de_linea(self):
+        self.comprobar_error("2 3\n...\n..", 3, 3)
+        self.comprobar_error("2 3\n...\n.?.", 3, 2)
+        self.comprobar_error("2 3\n...", 3, None)
+
+    def test_cabecera(self):
+        self.comprobar_error("", 1, None)
+        self.comprobar_error("2\n..\n", 1, None)
+        self.comprobar_error("2 x\n..\n", 1, None)
+        self.comprobar_error("0 2\n", 1, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
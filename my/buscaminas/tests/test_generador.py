@@ -0,0 +1,87 @@
+# coding=utf-8
+
+"""
+Pruebas del generador de tableros que se pueden resolver sin adivinar y de la reserva de semillas.
+
+Autor: Richard Albán Fernández
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from generador import ReservaDeSemillas, abrir_celda_inicial, buscar_semillas, partida_sin_adivinar
+from partida import nueva_partida, MAX_SEMILLA
+from resolutor import Resolutor
+
+
+class PruebasGenerador(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.fichero = os.path.join(self.directorio, "reserva.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def escribir(self, datos):
+        with open(self.fichero, "wb") as fichero:
+            json.dump(datos, fichero)
+
+    def test_semillas_resolubles(self):
+        for procesos in (1, 2):
+            semillas = buscar_semillas(9, 9, 10, 3, procesos)
+
+            self.assertEqual(len(semillas), 3)
+
+            # Cada semilla debe dar un tablero que el resolutor gana sin adivinar desde la celda inicial
+            for semilla in semillas:
+                partida = nueva_partida(9, 9, 10, semilla)
+                abrir_celda_inicial(partida)
+                Resolutor(partida).resolver()
+
+                self.assertTrue(partida.is_partida_ganada())
+
+    def test_partida_sin_adivinar(self):
+        reserva = ReservaDeSemillas()
+        reserva.rellenar(8, 8, 8, 2, 1)
+
+        self.assertEqual(reserva.contar(8, 8, 8), 2)
+
+        partida = partida_sin_adivinar(8, 8, 8, reserva, 1)
+
+        self.assertFalse(partida.is_primera_apertura())
+        self.assertEqual(reserva.contar(8, 8, 8), 1)
+
+    def test_guardar_y_cargar_reserva(self):
+        reserva = ReservaDeSemillas()
+        reserva.anadir(9, 9, 10, [1, 2, MAX_SEMILLA])
+        reserva.anadir(16, 30, 99, [7])
+        reserva.guardar(self.fichero)
+
+        cargada = ReservaDeSemillas()
+        cargada.cargar(self.fichero)
+
+        self.assertEqual(len(cargada), 4)
+        self.assertEqual([cargada.sacar(9, 9, 10) for _ in range(4)], [1, 2, MAX_SEMILLA, None])
+        self.assertEqual(cargada.sacar(16, 30, 99), 7)
+
+    def test_reserva_no_valida(self):
+        for datos in ([1, 2], {"9x9": [1]}, {"9x9x10": 5}, {"9x9x10": {"a": 1}}, {"9x9x10": [1, "2"]},
+                      {"9x9x10": [1.5]}, {"9x9x10": [-1]}, {"9x9x10": [MAX_SEMILLA + 1]}, {"9x9x10": [True]},
+                      {"9x9x10": [3], "axbxc": [1]}, 7, None):
+            self.escribir(datos)
+            reserva = ReservaDeSemillas()
+
+            self.assertRaises(ValueError, reserva.cargar, self.fichero)
+            self.assertEqual(len(reserva), 0)
+
+        with open(self.fichero, "wb") as fichero:
+            fichero.write("{no es JSON")
+
+        self.assertRaises(ValueError, ReservaDeSemillas().cargar, self.fichero)
+
+
+if __name__ == '__main__':
+    unittest.main()
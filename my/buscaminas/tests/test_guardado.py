@@ -0,0 +1,90 @@
+# coding=utf-8
+
+"""
+Pruebas del formato binario de guardado de partidas.
+
+Se ejecutan desde el directorio del paquete con:
+
+    python -m unittest discover tests
+
+Autor: Richard Albán Fernández
+"""
+
+import unittest
+from guardado import codificar_partida, decodificar_partida
+from partida import Partida, nueva_partida, ABRIR, MARCAR, MAX_SEMILLA
+from tablero import Tablero
+
+
+def crear_partida(filas, columnas, minas):
+    """
+    Crea una partida sobre un tablero con las minas en las celdas indicadas.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: lista de tuplas (fila, columna) de las celdas con mina
+    :return: la partida creada
+    """
+    tablero = Tablero(filas, columnas)
+
+    for fila, columna in minas:
+        tablero.poner_mina(tablero.indice(fila, columna))
+
+    return Partida(tablero, len(minas))
+
+
+class PruebasGuardado(unittest.TestCase):
+
+    def comprobar_ida_y_vuelta(self, partida):
+        restaurada, tiempo = decodificar_partida(codificar_partida(partida, 12.5))
+
+        self.assertEqual(tiempo, 12.5)
+        self.assertEqual(str(restaurada.get_tablero().get_estados()), str(partida.get_tablero().get_estados()))
+        self.assertEqual(restaurada.get_tablero().get_contadores(), partida.get_tablero().get_contadores())
+        self.assertEqual(restaurada.get_semilla(), partida.get_semilla())
+        self.assertEqual(restaurada.is_primera_apertura(), partida.is_primera_apertura())
+        self.assertEqual(restaurada.is_vecinas_seguras(), partida.is_vecinas_seguras())
+        self.assertEqual(restaurada.is_fin_de_partida(), partida.is_fin_de_partida())
+        self.assertEqual(restaurada.is_partida_ganada(), partida.is_partida_ganada())
+
+        return restaurada
+
+    def test_partida_sin_empezar(self):
+        self.comprobar_ida_y_vuelta(nueva_partida(9, 9, 10, 3))
+
+    def test_partida_en_curso(self):
+        partida = nueva_partida(16, 16, 40, 7, vecinas_seguras=False)
+        partida.aplicar((8, 8, ABRIR))
+
+        restaurada = self.comprobar_ida_y_vuelta(partida)
+        self.assertFalse(restaurada.is_fin_de_partida())
+
+    def test_partida_ganada(self):
+        partida = crear_partida(3, 3, [(1, 1)])
+        partida.aplicar_lote([(1, 1, MARCAR), (0, 0, ABRIR)])
+        self.assertTrue(partida.is_partida_ganada())
+
+        restaurada = self.comprobar_ida_y_vuelta(partida)
+        self.assertTrue(restaurada.is_fin_de_partida())
+        self.assertTrue(restaurada.is_partida_ganada())
+
+    def test_partida_perdida(self):
+        partida = crear_partida(3, 3, [(1, 1)])
+        partida.aplicar_lote([(0, 0, ABRIR), (1, 1, ABRIR)])
+        self.assertTrue(partida.is_fin_de_partida())
+        self.assertFalse(partida.is_partida_ganada())
+
+        restaurada = self.comprobar_ida_y_vuelta(partida)
+        self.assertTrue(restaurada.is_fin_de_partida())
+        self.assertFalse(restaurada.is_partida_ganada())
+
+    def test_semillas_extremas(self):
+        for semilla in (0, MAX_SEMILLA):
+            self.comprobar_ida_y_vuelta(nueva_partida(9, 9, 10, semilla))
+
+        for semilla in (-1, MAX_SEMILLA + 1, 1.5):
+            self.assertRaises(ValueError, nueva_partida, 9, 9, 10, semilla)
+
+
+if __name__ == '__main__':
+    unittest.main()
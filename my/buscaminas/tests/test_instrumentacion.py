@@ -0,0 +1,95 @@
+# coding=utf-8
+
+"""
+Pruebas de la medición de las etapas de los turnos.
+
+Autor: Richard Albán Fernández
+"""
+
+import sys
+import types
+import unittest
+import entrada
+import instrumentacion
+from instrumentacion import ETAPAS, TURNO
+from partida import nueva_partida, ABRIR, MARCAR
+
+
+def originales():
+    """
+    Devuelve las funciones y métodos de las etapas tal y como están ahora, en los objetos de ETAPAS y en los módulos
+    que han importado las mismas funciones de módulo.
+
+    :return: lista de tuplas (objeto, nombre, función)
+    """
+    actuales = []
+
+    for _, objeto, nombre in ETAPAS:
+        funcion = objeto.__dict__[nombre]
+        actuales.append((objeto, nombre, funcion))
+
+        if isinstance(objeto, types.ModuleType):
+            for modulo in sys.modules.values():
+                if modulo is not None and modulo is not objeto and getattr(modulo, nombre, None) is funcion:
+                    actuales.append((modulo, nombre, funcion))
+
+    return actuales
+
+
+class PruebasInstrumentacion(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentacion.desactivar()
+
+    def test_activar_y_desactivar(self):
+        antes = originales()
+        estadisticas = instrumentacion.activar()
+
+        self.assertIs(instrumentacion.get_estadisticas(), estadisticas)
+        self.assertIs(instrumentacion.activar(), estadisticas)
+
+        for objeto, nombre, original in antes:
+            self.assertIsNot(objeto.__dict__[nombre], original)
+
+        partida = nueva_partida(9, 9, 10, 1)
+        jugadas = list(entrada.tokenizar_jugadas("Ee*Aa!Ii!"))
+        resultado = partida.aplicar_lote(jugadas)
+        instrumentacion.fin_de_turno()
+
+        self.assertEqual(resultado.get_aplicadas(), 3)
+        self.assertEqual(estadisticas.get_llamadas("entrada"), 1)
+        self.assertEqual(estadisticas.get_llamadas("validacion"), 3)
+        self.assertEqual(estadisticas.get_llamadas("recuento"), 2)
+        self.assertEqual(estadisticas.get_llamadas("apertura"), 1)
+        # La celda jugada se abre antes de la apertura recursiva, que cuenta sólo las demás
+        self.assertEqual(estadisticas.get_celdas("apertura"), len(resultado.get_abiertas()) - 1)
+        self.assertEqual(estadisticas.get_llamadas("fin_de_partida"), 3)
+        self.assertEqual(estadisticas.get_llamadas(TURNO), 1)
+        self.assertEqual(sum(llamadas for _, llamadas in estadisticas.get_histograma("validacion")), 3)
+
+        self.assertIs(instrumentacion.desactivar(), estadisticas)
+        self.assertIsNone(instrumentacion.get_estadisticas())
+        self.assertEqual(originales(), antes)
+
+        # Sin la medición activa ya no se registra nada
+        partida.aplicar((8, 8, MARCAR))
+        instrumentacion.fin_de_turno()
+
+        self.assertEqual(estadisticas.get_llamadas("validacion"), 3)
+        self.assertEqual(estadisticas.get_llamadas(TURNO), 1)
+        self.assertIsNone(instrumentacion.desactivar())
+
+    def test_generador_interrumpido(self):
+        estadisticas = instrumentacion.activar()
+
+        # La interpretación se registra aunque el generador termine con un error
+        self.assertRaises(entrada.ErrorDeJugada, list, entrada.tokenizar_jugadas("Aa*??"))
+        self.assertEqual(estadisticas.get_llamadas("entrada"), 1)
+
+        partida = nueva_partida(9, 9, 10, 1)
+        partida.aplicar((4, 4, ABRIR))
+        self.assertEqual(estadisticas.get_llamadas("validacion"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+# coding=utf-8
+
+"""
+Pruebas del dibujo del tablero en la consola.
+
+Autor: Richard Albán Fernández
+"""
+
+import random
+import re
+import unittest
+from StringIO import StringIO
+from pantalla import BORRAR_PANTALLA, FILAS_VISTA, COLUMNAS_VISTA, PantallaDiferencial, centrar_ventana, \
+    componer_tablero, get_caracter, get_ventana, seguir_celda
+from partida import nueva_partida, ABRIR, MARCAR
+from tablero import ABIERTA
+
+# Secuencias ANSI que emite PantallaDiferencial: mover el cursor, borrar hasta el final de la línea y de la pantalla
+_SECUENCIA = re.compile(u"\x1b\\[(?:(\\d+);(\\d+)H|K|J)")
+
+
+class Terminal():
+    """
+    Terminal ANSI mínimo que interpreta lo que escribe PantallaDiferencial.
+
+    Autor: Richard Albán Fernández
+    """
+
+    def __init__(self):
+        """
+        Se inicializa el terminal con la pantalla vacía.
+        """
+        self.lineas = []
+        self.escritas = 0
+        self.__linea = 0
+        self.__columna = 0
+
+    def procesar(self, texto):
+        """
+        Interpreta el texto enviado al terminal.
+
+        :param texto: texto unicode con caracteres y secuencias de control
+        """
+        if texto.startswith(BORRAR_PANTALLA):
+            self.lineas = texto[len(BORRAR_PANTALLA):].split(u"\n")
+            return
+
+        posicion = 0
+
+        for secuencia in _SECUENCIA.finditer(texto):
+            self.__escribir(texto[posicion:secuencia.start()])
+            posicion = secuencia.end()
+
+            if secuencia.group(1) is not None:
+                self.__linea, self.__columna = int(secuencia.group(1)) - 1, int(secuencia.group(2)) - 1
+            elif secuencia.group().endswith(u"K"):
+                self.lineas[self.__linea] = self.lineas[self.__linea][:self.__columna]
+            else:
+                self.lineas[self.__linea] = self.lineas[self.__linea][:self.__columna]
+                del self.lineas[self.__linea + 1:]
+
+        self.__escribir(texto[posicion:])
+
+    def __escribir(self, caracteres):
+        """
+        Escribe caracteres en la posición del cursor y lo avanza.
+
+        :param caracteres: caracteres a escribir
+        """
+        if not caracteres:
+            return
+
+        linea = self.lineas[self.__linea].ljust(self.__columna)
+        self.lineas[self.__linea] = linea[:self.__columna] + caracteres + linea[self.__columna + len(caracteres):]
+        self.__columna += len(caracteres)
+        self.escritas += 1
+
+    def get_imagen(self):
+        """
+        Devuelve lo que se ve en el terminal, sin espacios ni líneas vacías al final.
+
+        :return: lista de líneas
+        """
+        lineas = [linea.rstrip() for linea in self.lineas]
+
+        while lineas and not lineas[-1]:
+            lineas.pop()
+
+        return lineas
+
+
+def caracteres(partida):
+    """
+    Devuelve el carácter que se muestra en cada celda del tablero.
+
+    :param partida: la partida
+    :return: lista de caracteres, por índice de celda
+    """
+    tablero = partida.get_tablero()
+    contadores = tablero.get_contadores()
+
+    return [get_caracter(estado, contadores[k]) for k, estado in enumerate(tablero.get_estados())]
+
+
+def imagen(partida, tiempo, ventana=None):
+    """
+    Devuelve la imagen completa del tablero tal y como se vería en el terminal.
+
+    :param partida: la partida
+    :param tiempo: tiempo transcurrido
+    :param ventana: parte del tablero que se muestra
+    :return: lista de líneas, sin espacios ni líneas vacías al final
+    """
+    terminal = Terminal()
+    terminal.procesar(BORRAR_PANTALLA + componer_tablero(partida, tiempo, ventana))
+
+    return terminal.get_imagen()
+
+
+class PruebasPantalla(unittest.TestCase):
+
+    def dibujar(self, pantalla, salida, terminal, partida, tiempo, cambiadas=None, ventana=None):
+        salida.seek(0)
+        salida.truncate()
+        pantalla.dibujar(partida, tiempo, cambiadas, ventana)
+        terminal.procesar(salida.getvalue().decode("utf-8"))
+
+        return salida.getvalue().decode("utf-8")
+
+    def test_dos_imagenes(self):
+        partida = nueva_partida(9, 9, 10, 5)
+        partida.aplicar((4, 4, ABRIR))
+        salida = StringIO()
+        pantalla = PantallaDiferencial(salida)
+        terminal = Terminal()
+
+        primera = self.dibujar(pantalla, salida, terminal, partida, 1.0)
+
+        self.assertTrue(primera.startswith(BORRAR_PANTALLA))
+        self.assertEqual(terminal.get_imagen(), imagen(partida, 1.0))
+
+        # Al marcar una celda sin vecinas abiertas cambian los contadores de sus vecinas, pero sólo se ve la marca
+        tablero = partida.get_tablero()
+        estados = tablero.get_estados()
+        k = next(k for k in range(len(estados))
+                 if not any(estados[vecina] & ABIERTA for vecina in list(tablero.get_vecinas(k)) + [k]))
+        resultado = partida.aplicar(divmod(k, 9) + (MARCAR,))
+        terminal.escritas = 0
+
+        segunda = self.dibujar(pantalla, salida, terminal, partida, 2.0, resultado.get_cambiadas())
+
+        self.assertFalse(segunda.startswith(BORRAR_PANTALLA))
+        self.assertGreater(len(resultado.get_cambiadas()), 1)
+        self.assertEqual(terminal.escritas, 2)
+        self.assertEqual(segunda.count(u"X"), 1)
+        self.assertEqual(terminal.get_imagen(), imagen(partida, 2.0))
+
+    def test_partida_al_azar(self):
+        generador = random.Random(1)
+
+        for _ in range(10):
+            partida = nueva_partida(12, 14, 25, generador.getrandbits(32))
+            salida = StringIO()
+            pantalla = PantallaDiferencial(salida)
+            terminal = Terminal()
+            self.dibujar(pantalla, salida, terminal, partida, 0.0)
+
+            for turno in range(30):
+                estados = partida.get_tablero().get_estados()
+                k = generador.randrange(len(estados))
+                accion = MARCAR if generador.random() < 0.3 and not estados[k] & ABIERTA else ABRIR
+                anteriores = caracteres(partida)
+                resultado = partida.aplicar(divmod(k, 14) + (accion,))
+
+                # Al terminar la partida se abren todas las celdas y el juego redibuja el tablero completo
+                if partida.is_fin_de_partida():
+                    self.dibujar(pantalla, salida, terminal, partida, turno)
+                    self.assertEqual(terminal.get_imagen(), imagen(partida, turno))
+                    break
+
+                # Sólo se reescriben la línea de estado y cada celda cuyo carácter ha cambiado
+                terminal.escritas = 0
+                self.dibujar(pantalla, salida, terminal, partida, turno, resultado.get_cambiadas())
+                actuales = caracteres(partida)
+
+                self.assertEqual(terminal.get_imagen(), imagen(partida, turno))
+                self.assertEqual(terminal.escritas - 1, sum(1 for antes, ahora in zip(anteriores, actuales)
+                                                            if antes != ahora))
+
+    def test_vista(self):
+        partida = nueva_partida(100, 120, 1500, 3)
+        tablero = partida.get_tablero()
+
+        self.assertEqual(get_ventana(tablero), (0, 0, 100, 120))
+        self.assertEqual(centrar_ventana(tablero, 50, 60), (35, 45, FILAS_VISTA, COLUMNAS_VISTA))
+        self.assertEqual(centrar_ventana(tablero, 0, 119), (0, 120 - COLUMNAS_VISTA, FILAS_VISTA, COLUMNAS_VISTA))
+        self.assertEqual(seguir_celda(tablero, (35, 45, 30, 30), 70, 40), (41, 40, 30, 30))
+        self.assertEqual(seguir_celda(tablero, (35, 45, 30, 30), 40, 50), (35, 45, 30, 30))
+
+        # Con nombres numéricos la imagen sólo contiene la vista, con el número de cada fila y columna mostrada
+        ventana = centrar_ventana(tablero, 50, 60)
+        lineas = imagen(partida, 0.0, ventana)
+
+        self.assertIn(u"VISTA: FILAS 35-64, COLUMNAS 45-74", lineas[0])
+        self.assertEqual(lineas[1].split(), [unicode(j) for j in range(45, 75)])
+        self.assertEqual([linea.split()[0] for linea in lineas[3::2]], [unicode(i) for i in range(35, 65)])
+
+    def test_vista_diferencial(self):
+        generador = random.Random(2)
+        partida = nueva_partida(60, 70, 300, 4)
+        partida.aplicar((30, 35, ABRIR))
+        salida = StringIO()
+        pantalla = PantallaDiferencial(salida)
+        terminal = Terminal()
+        ventana = centrar_ventana(partida.get_tablero(), 30, 35)
+        self.dibujar(pantalla, salida, terminal, partida, 0.0, ventana=ventana)
+
+        for turno in range(60):
+            # Se marcan las celdas con mina y algunas sin ella, y se abren las demás, para que la partida siga
+            fila, columna = generador.randrange(60), generador.randrange(70)
+            con_mina = partida.get_tablero().hay_mina(fila * 70 + columna)
+            anteriores = caracteres(partida)
+            resultado = partida.aplicar((fila, columna, MARCAR if con_mina or generador.random() < 0.2 else ABRIR))
+
+            # A veces la vista se desplaza para seguir la celda jugada, y entonces se dibuja la imagen completa
+            anterior = ventana
+
+            if generador.random() < 0.3:
+                ventana = seguir_celda(partida.get_tablero(), ventana, fila, columna)
+
+            terminal.escritas = 0
+            texto = self.dibujar(pantalla, salida, terminal, partida, turno, resultado.get_cambiadas(), ventana)
+
+            self.assertEqual(terminal.get_imagen(), imagen(partida, turno, ventana))
+            self.assertEqual(texto.startswith(BORRAR_PANTALLA), ventana != anterior)
+
+            # Sin desplazamiento sólo se reescriben las celdas de la vista cuyo carácter ha cambiado
+            if ventana == anterior:
+                actuales = caracteres(partida)
+                fila_inicio, columna_inicio, alto, ancho = ventana
+                vista = [i * 70 + j for i in range(fila_inicio, fila_inicio + alto)
+                         for j in range(columna_inicio, columna_inicio + ancho)]
+
+                self.assertEqual(terminal.escritas - 1, sum(1 for k in vista if anteriores[k] != actuales[k]))
+
+if __name__ == '__main__':
+    unittest.main()
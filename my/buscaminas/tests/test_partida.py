@@ -0,0 +1,118 @@
+# coding=utf-8
+
+"""
+Pruebas del motor de la partida.
+
+Autor: Richard Albán Fernández
+"""
+
+import random
+import unittest
+from partida import Partida, nueva_partida, ABRIR, MARCAR
+from tablero import Tablero, ABIERTA, MINA, crear_tablero
+
+
+def instantanea(partida):
+    """
+    Devuelve todo el estado de una partida que debe recuperarse al deshacer o rehacer jugadas.
+
+    :param partida: la partida
+    :return: tupla con los estados, las minas por descubrir y los contadores del tablero, y el estado de la partida
+    """
+    tablero = partida.get_tablero()
+
+    return (str(tablero.get_estados()), list(tablero.get_contadores()), tablero.get_minas(), tablero.get_marcadas(),
+            tablero.get_cerradas_sin_marcar(), tablero.get_minas_abiertas(), partida.is_primera_apertura(),
+            partida.is_fin_de_partida(), partida.is_partida_ganada(), partida.get_deshacibles())
+
+
+def jugada_al_azar(generador, partida):
+    """
+    Elige una jugada al azar, que prefiere abrir las celdas sin mina y marcar las celdas con mina para que la partida
+    no termine enseguida. También se eligen celdas abiertas, para abrir sus vecinas.
+
+    :param generador: generador de números aleatorios
+    :param partida: la partida
+    :return: tupla (fila, columna, accion) con la jugada
+    """
+    tablero = partida.get_tablero()
+    estados = tablero.get_estados()
+    indice = generador.randrange(len(estados))
+
+    if estados[indice] & ABIERTA:
+        accion = ABRIR
+    elif bool(estados[indice] & MINA) == (generador.random() < 0.9) and not partida.is_primera_apertura():
+        accion = MARCAR
+    else:
+        accion = ABRIR
+
+    return divmod(indice, tablero.get_columnas()) + (accion,)
+
+
+class PruebasPartida(unittest.TestCase):
+
+    def comprobar_recuento(self, partida):
+        # Un tablero nuevo con los mismos estados recalcula desde cero los contadores y las minas por descubrir
+        tablero = partida.get_tablero()
+        recontado = Tablero(tablero.get_filas(), tablero.get_columnas())
+        recontado.set_estados(tablero.get_estados())
+
+        self.assertEqual(list(tablero.get_contadores()), list(recontado.get_contadores()))
+        self.assertEqual((tablero.get_minas(), tablero.get_marcadas(), tablero.get_cerradas_sin_marcar(),
+                          tablero.get_minas_abiertas()),
+                         (recontado.get_minas(), recontado.get_marcadas(), recontado.get_cerradas_sin_marcar(),
+                          recontado.get_minas_abiertas()))
+
+    def test_deshacer_y_rehacer(self):
+        generador = random.Random(1)
+
+        for partida_de_prueba in range(60):
+            filas, columnas, minas = generador.randint(2, 8), generador.randint(2, 8), generador.randint(1, 8)
+            minas = min(minas, filas * columnas - 1)
+
+            # Se alternan partidas con semilla y partidas con las minas ya colocadas, en las que se mueve una mina
+            # si la primera celda abierta la tiene
+            if partida_de_prueba % 2:
+                partida = nueva_partida(filas, columnas, minas, generador.getrandbits(32), generador.random() < 0.5)
+            else:
+                partida = Partida(crear_tablero(filas, columnas, minas, generador.getrandbits(32)), minas)
+
+            historial = [instantanea(partida)]
+            deshechas = []
+
+            for _ in range(80):
+                azar = generador.random()
+
+                if azar < 0.2:
+                    if partida.deshacer() is None:
+                        self.assertEqual(len(historial), 1)
+                        continue
+
+                    deshechas.append(historial.pop())
+                elif azar < 0.3:
+                    if partida.rehacer() is None:
+                        self.assertEqual(deshechas, [])
+                        continue
+
+                    historial.append(deshechas.pop())
+                else:
+                    if not partida.aplicar(jugada_al_azar(generador, partida)).get_aplicadas():
+                        continue
+
+                    historial.append(instantanea(partida))
+                    deshechas = []
+
+                self.assertEqual(instantanea(partida), historial[-1])
+                self.assertEqual(partida.get_rehacibles(), len(deshechas))
+                self.comprobar_recuento(partida)
+
+            # Deshacer todas las jugadas devuelve la partida a su estado inicial
+            while partida.deshacer() is not None:
+                historial.pop()
+                self.assertEqual(instantanea(partida), historial[-1])
+
+            self.assertEqual(len(historial), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+# coding=utf-8
+
+"""
+Pruebas del cálculo de probabilidades.
+
+Autor: Richard Albán Fernández
+"""
+
+import itertools
+import random
+import unittest
+from partida import nueva_partida, ABRIR, MARCAR
+from probabilidad import calcular_probabilidades
+from tablero import ABIERTA, MARCADA, MINA
+
+
+def fuerza_bruta(partida):
+    """
+    Calcula la probabilidad de que cada celda cerrada tenga mina probando todas las formas de colocar las minas que
+    quedan en las celdas cerradas, marcadas o no, y quedándose con las que dan a cada celda abierta su número.
+
+    :param partida: la partida, que no debe haber terminado
+    :return: diccionario con la probabilidad de cada celda cerrada, por su índice
+    """
+    tablero = partida.get_tablero()
+    estados = tablero.get_estados()
+    cerradas = [k for k in range(len(estados)) if not estados[k] & ABIERTA]
+    abiertas = [k for k in range(len(estados)) if estados[k] & ABIERTA]
+
+    # El número que ve el jugador en cada celda abierta es el de vecinas con mina
+    numeros = dict((k, sum(1 for vecina in tablero.get_vecinas(k) if estados[vecina] & MINA)) for k in abiertas)
+
+    soluciones = 0
+    con_mina = dict((k, 0) for k in cerradas)
+
+    for minas in itertools.combinations(cerradas, partida.get_minas()):
+        minas = set(minas)
+
+        if all(sum(1 for vecina in tablero.get_vecinas(k) if vecina in minas) == numeros[k] for k in abiertas):
+            soluciones += 1
+
+            for k in minas:
+                con_mina[k] += 1
+
+    return dict((k, con_mina[k] / float(soluciones)) for k in cerradas)
+
+
+class PruebasProbabilidad(unittest.TestCase):
+
+    def test_probabilidades_exactas(self):
+        generador = random.Random(2)
+
+        for _ in range(150):
+            filas, columnas = generador.randint(2, 5), generador.randint(2, 4)
+            partida = nueva_partida(filas, columnas, generador.randint(1, filas * columnas // 3),
+                                    generador.getrandbits(32), generador.random() < 0.5)
+            tablero = partida.get_tablero()
+            estados = tablero.get_estados()
+            partida.aplicar((generador.randrange(filas), generador.randrange(columnas), ABRIR))
+
+            # Se abren algunas celdas sin mina más y se marcan celdas al azar, con o sin mina
+            for _ in range(generador.randint(0, 2)):
+                seguras = [k for k in range(len(estados)) if not estados[k] & (ABIERTA | MARCADA | MINA)]
+
+                if seguras:
+                    partida.aplicar(divmod(generador.choice(seguras), columnas) + (ABRIR,))
+
+            cerradas = [k for k in range(len(estados)) if not estados[k] & ABIERTA]
+
+            for k in generador.sample(cerradas, min(generador.randint(0, 2), len(cerradas), partida.get_minas())):
+                partida.aplicar(divmod(k, columnas) + (MARCAR,))
+
+            if partida.is_fin_de_partida():
+                continue
+
+            probabilidades = calcular_probabilidades(partida)
+            esperadas = fuerza_bruta(partida)
+
+            self.assertTrue(probabilidades.is_exacta())
+
+            for k in range(len(estados)):
+                if k in esperadas:
+                    self.assertAlmostEqual(probabilidades.get_probabilidad(k), esperadas[k])
+                else:
+                    self.assertIsNone(probabilidades.get_probabilidad(k))
+
+    def test_mas_segura_sin_marcar(self):
+        generador = random.Random(1)
+
+        for _ in range(100):
+            partida = nueva_partida(8, 8, 10, generador.getrandbits(32))
+            tablero = partida.get_tablero()
+            estados = tablero.get_estados()
+            partida.aplicar((4, 4, ABRIR))
+
+            # Se marcan casi todas las celdas cerradas para que las marcas incluyan a las más seguras
+            cerradas = [k for k in range(len(estados)) if not estados[k] & ABIERTA]
+
+            for k in generador.sample(cerradas, min(len(cerradas) - 1, partida.get_minas())):
+                partida.aplicar(divmod(k, tablero.get_columnas()) + (MARCAR,))
+
+            mejor = calcular_probabilidades(partida).mas_segura()
+
+            self.assertIsNotNone(mejor)
+            self.assertFalse(estados[mejor[0]] & (ABIERTA | MARCADA))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,147 @@
+# coding=utf-8
+
+"""
+Pruebas de la grabación y la reproducción de partidas.
+
+Autor: Richard Albán Fernández
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from guardado import codificar_partida
+from partida import nueva_partida, ABRIR, MARCAR
+from repeticion import Grabador, Reproductor, cargar_grabacion
+from tablero import MINA, ABIERTA, MARCADA
+
+
+def estado(partida):
+    """
+    Devuelve el estado de una partida que debe coincidir entre la partida jugada y la reproducida.
+
+    :param partida: la partida
+    :return: tupla con la codificación de la partida, si ha terminado y si se ha ganado
+    """
+    return codificar_partida(partida), partida.is_fin_de_partida(), partida.is_partida_ganada()
+
+
+def jugar_y_grabar(nombre_fichero, generador, filas, columnas, minas, pasos):
+    """
+    Juega una partida al azar, con jugadas deshechas y rehechas, y la graba. Las jugadas prefieren las celdas sin mina
+    para abrir y las celdas con mina para marcar, de forma que también se llegan a ganar partidas.
+
+    :param nombre_fichero: nombre del fichero de la grabación
+    :param generador: generador de números aleatorios
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :param pasos: número de intentos de jugada
+    :return: lista con el estado de la partida tras cada registro de la grabación (ver estado)
+    """
+    partida = nueva_partida(filas, columnas, minas, generador.getrandbits(32))
+    grabador = Grabador(nombre_fichero, partida)
+    estados = [estado(partida)]
+
+    for _ in range(pasos):
+        azar = generador.random()
+
+        if azar < 0.15 and partida.get_deshacibles():
+            partida.deshacer()
+            grabador.registrar_deshacer()
+        elif azar < 0.25 and partida.get_rehacibles():
+            partida.rehacer()
+            grabador.registrar_rehacer()
+        elif not partida.is_fin_de_partida():
+            estados_tablero = partida.get_tablero().get_estados()
+            cerradas = [k for k in range(filas * columnas) if not estados_tablero[k] & ABIERTA]
+            indice = generador.choice(cerradas)
+            acertada = generador.random() < 0.9
+            con_mina = bool(estados_tablero[indice] & MINA)
+
+            if estados_tablero[indice] & MARCADA or con_mina == acertada and not partida.is_primera_apertura():
+                accion = MARCAR
+            else:
+                accion = ABRIR
+
+            jugada = divmod(indice, columnas) + (accion,)
+
+            if not partida.aplicar(jugada).get_aplicadas():
+                continue
+
+            grabador.registrar([jugada])
+        else:
+            continue
+
+        estados.append(estado(partida))
+
+    grabador.cerrar()
+
+    return estados
+
+
+class PruebasRepeticion(unittest.TestCase):
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.fichero = os.path.join(self.directorio, "partida.bmr")
+
+    def tearDown(self):
+        shutil.rmtree(self.directorio)
+
+    def test_reproduccion_lineal(self):
+        generador = random.Random(1)
+
+        for _ in range(30):
+            estados = jugar_y_grabar(self.fichero, generador, 5, 6, 4, 40)
+            reproductor = cargar_grabacion(self.fichero)
+
+            self.assertEqual(len(reproductor), len(estados) - 1)
+
+            for posicion in range(1, len(estados)):
+                reproductor.avanzar()
+                self.assertEqual(estado(reproductor.get_partida()), estados[posicion])
+
+    def test_ir_a_con_instantaneas(self):
+        generador = random.Random(2)
+        ganadas = 0
+
+        for _ in range(60):
+            estados = jugar_y_grabar(self.fichero, generador, 4, 5, 3, 50)
+            ganadas += any(ganada for _, _, ganada in estados)
+
+            with open(self.fichero, "rb") as fichero:
+                datos = fichero.read()
+
+            for intervalo in (1, 2, 4, 7, 64):
+                reproductor = Reproductor(datos, intervalo)
+
+                # Primero se recorre la grabación completa para crear todas las instantáneas
+                reproductor.reproducir()
+
+                for _ in range(25):
+                    posicion = generador.randrange(len(estados))
+                    reproductor.ir_a(posicion)
+
+                    self.assertEqual(reproductor.get_posicion(), posicion)
+                    self.assertEqual(estado(reproductor.get_partida()), estados[posicion])
+
+        # Las instantáneas tomadas después de ganar una partida deben conservar el resultado
+        self.assertGreater(ganadas, 0)
+
+    def test_grabacion_interrumpida(self):
+        estados = jugar_y_grabar(self.fichero, random.Random(3), 6, 6, 5, 30)
+
+        with open(self.fichero, "rb") as fichero:
+            datos = fichero.read()
+
+        reproductor = Reproductor(datos[:-3])
+        reproductor.reproducir()
+
+        self.assertEqual(len(reproductor), len(estados) - 2)
+        self.assertEqual(estado(reproductor.get_partida()), estados[-2])
+
+
+if __name__ == '__main__':
+    unittest.main()
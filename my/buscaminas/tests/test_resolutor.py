@@ -0,0 +1,117 @@
+# coding=utf-8
+
+"""
+Pruebas del resolutor por propagación de restricciones.
+
+Autor: Richard Albán Fernández
+"""
+
+import random
+import unittest
+from partida import nueva_partida, ABRIR, MARCAR
+from resolutor import Resolutor
+from tablero import ABIERTA, MINA
+
+
+def empezar_partida(generador, filas, columnas, minas):
+    """
+    Crea una partida al azar y abre su celda central.
+
+    :param generador: generador de números aleatorios
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param minas: número de minas del tablero
+    :return: la partida
+    """
+    partida = nueva_partida(filas, columnas, minas, generador.getrandbits(32))
+    partida.aplicar((filas // 2, columnas // 2, ABRIR))
+
+    return partida
+
+
+def marcar_al_azar(generador, partida, marcas):
+    """
+    Marca celdas cerradas al azar, tengan mina o no.
+
+    :param generador: generador de números aleatorios
+    :param partida: la partida
+    :param marcas: número máximo de marcas
+    """
+    tablero = partida.get_tablero()
+    estados = tablero.get_estados()
+    cerradas = [k for k in range(len(estados)) if not estados[k] & ABIERTA]
+
+    for k in generador.sample(cerradas, min(marcas, len(cerradas), partida.get_minas())):
+        partida.aplicar(divmod(k, tablero.get_columnas()) + (MARCAR,))
+
+
+class PruebasResolutor(unittest.TestCase):
+
+    def test_deducciones_correctas(self):
+        generador = random.Random(1)
+
+        for filas, columnas, minas in ((9, 9, 10), (16, 16, 40), (16, 30, 99)):
+            for _ in range(20):
+                partida = empezar_partida(generador, filas, columnas, minas)
+                marcar_al_azar(generador, partida, generador.randint(0, 5))
+
+                if partida.is_fin_de_partida():
+                    continue
+
+                seguras, con_mina = Resolutor(partida).deducir()
+                estados = partida.get_tablero().get_estados()
+
+                for k in seguras:
+                    self.assertFalse(estados[k] & MINA)
+                for k in con_mina:
+                    self.assertTrue(estados[k] & MINA)
+
+    def test_resolver_no_pierde(self):
+        generador = random.Random(2)
+
+        for _ in range(40):
+            partida = empezar_partida(generador, 9, 9, 10)
+            Resolutor(partida).resolver()
+
+            self.assertFalse(partida.is_fin_de_partida() and not partida.is_partida_ganada())
+
+    def test_pistas_con_marcas_equivocadas(self):
+        generador = random.Random(3)
+
+        for _ in range(150):
+            partida = empezar_partida(generador, 8, 8, 10)
+            marcar_al_azar(generador, partida, generador.randint(1, 6))
+            resolutor = Resolutor(partida)
+            tablero = partida.get_tablero()
+
+            while not partida.is_fin_de_partida():
+                pista = resolutor.pista()
+
+                if pista is None:
+                    break
+
+                indice = tablero.indice(pista[0], pista[1])
+
+                # Sólo se propone quitar una marca si la celda no tiene mina
+                if tablero.is_marcada(indice):
+                    self.assertEqual(pista[2], MARCAR)
+                    self.assertFalse(tablero.hay_mina(indice))
+
+                resultado = partida.aplicar(pista)
+                self.assertEqual(resultado.get_aplicadas(), 1)
+                self.assertFalse(partida.is_fin_de_partida() and not partida.is_partida_ganada())
+                resolutor.actualizar(resultado.get_cambiadas())
+
+    def test_resolver_con_marcas_equivocadas(self):
+        generador = random.Random(4)
+
+        for _ in range(100):
+            partida = empezar_partida(generador, 8, 8, 10)
+            marcar_al_azar(generador, partida, generador.randint(1, 6))
+            Resolutor(partida).resolver()
+
+            self.assertFalse(partida.is_fin_de_partida() and not partida.is_partida_ganada())
+
+
+if __name__ == '__main__':
+    unittest.main()
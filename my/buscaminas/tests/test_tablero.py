@@ -0,0 +1,141 @@
+# coding=utf-8
+
+"""
+Pruebas del tablero y de sus codificaciones.
+
+Autor: Richard Albán Fernández
+"""
+
+import random
+import unittest
+from buscaminas import verificar_minas_por_descubrir
+from tablero import Tablero, ABIERTA, MARCADA, MINA, colocar_minas, empaquetar_bits, desempaquetar_bits
+
+
+def recontar(tablero):
+    """
+    Obtiene desde cero, celda a celda, los contadores del tablero y el número de minas por descubrir de cada celda.
+
+    :param tablero: tablero a recontar
+    :return: tupla con las minas, las marcadas, las cerradas sin marcar, las minas abiertas y la lista de minas por
+    descubrir de cada celda
+    """
+    estados = tablero.get_estados()
+    minas_por_descubrir = []
+
+    for k in range(len(estados)):
+        vecinas = tablero.get_vecinas(k)
+        minas_por_descubrir.append(sum(1 for vecina in vecinas if estados[vecina] & MINA) -
+                                   sum(1 for vecina in vecinas if estados[vecina] & MARCADA))
+
+    return (sum(1 for estado in estados if estado & MINA),
+            sum(1 for estado in estados if estado & MARCADA),
+            sum(1 for estado in estados if not estado & (ABIERTA | MARCADA)),
+            sum(1 for estado in estados if estado & ABIERTA and estado & MINA),
+            minas_por_descubrir)
+
+
+class PruebasTablero(unittest.TestCase):
+
+    def test_contadores_incrementales(self):
+        generador = random.Random(3)
+
+        for _ in range(20):
+            tablero = Tablero(generador.randint(1, 10), generador.randint(1, 10))
+            celdas = tablero.get_filas() * tablero.get_columnas()
+            estados = tablero.get_estados()
+
+            for _ in range(150):
+                k = generador.randrange(celdas)
+                azar = generador.random()
+
+                if azar < 0.25:
+                    if estados[k] & MINA:
+                        tablero.quitar_mina(k)
+                    else:
+                        tablero.poner_mina(k)
+                elif azar < 0.5:
+                    if not estados[k] & ABIERTA:
+                        tablero.marcar(k)
+                elif azar < 0.6:
+                    if not estados[k] & ABIERTA:
+                        tablero.abrir(k)
+                elif azar < 0.75:
+                    abiertas = tablero.abrir_region(k)
+
+                    if generador.random() < 0.5:
+                        tablero.cerrar_celdas(abiertas)
+                elif azar < 0.8:
+                    if estados[k] & ABIERTA:
+                        tablero.cerrar(k)
+                elif azar < 0.85:
+                    if estados[k] & MINA:
+                        tablero.mover_mina_a_primera_posicion_sin_minas(k)
+                elif azar < 0.9:
+                    tablero.cerrar_celdas(tablero.abrir_todas())
+
+                minas, marcadas, cerradas_sin_marcar, minas_abiertas, minas_por_descubrir = recontar(tablero)
+
+                self.assertEqual(tablero.get_minas(), minas)
+                self.assertEqual(tablero.get_marcadas(), marcadas)
+                self.assertEqual(tablero.get_cerradas_sin_marcar(), cerradas_sin_marcar)
+                self.assertEqual(tablero.get_minas_abiertas(), minas_abiertas)
+                self.assertEqual(list(tablero.get_contadores()), minas_por_descubrir)
+                self.assertTrue(verificar_minas_por_descubrir(tablero))
+
+    def test_empaquetar_bits(self):
+        # Un bit por celda, empezando por el bit más significativo de cada byte y completando el último con ceros
+        estados = bytearray([MINA, 0, ABIERTA, 0, 0, 0, 0, MINA | MARCADA, MINA])
+
+        self.assertEqual(empaquetar_bits(estados, MINA), "\x81\x80")
+        self.assertEqual(empaquetar_bits(estados, ABIERTA), "\x20\x00")
+        self.assertEqual(empaquetar_bits(estados, MARCADA), "\x01\x00")
+        self.assertEqual(empaquetar_bits(bytearray(), MINA), "")
+
+    def test_desempaquetar_bits(self):
+        generador = random.Random(1)
+
+        for celdas in (0, 1, 7, 8, 9, 64, 65, 480, 10007):
+            estados = bytearray(generador.choice((0, ABIERTA, MARCADA, MINA, MINA | ABIERTA, MINA | MARCADA))
+                                for _ in range(celdas))
+            planos = [(bit, empaquetar_bits(estados, bit)) for bit in (MINA, ABIERTA, MARCADA)]
+
+            # Cada conjunto debe coincidir con el que se obtiene poniendo los bits uno a uno
+            for bit, datos in planos:
+                esperados = bytearray((celdas + 7) // 8)
+
+                for k in range(celdas):
+                    if estados[k] & bit:
+                        esperados[k // 8] |= 0x80 >> k % 8
+
+                self.assertEqual(datos, str(esperados))
+
+            self.assertEqual(desempaquetar_bits(planos, celdas), estados)
+            self.assertRaises(ValueError, desempaquetar_bits, [(MINA, planos[0][1] + "\x00")], celdas)
+
+    def test_colocar_minas(self):
+        generador = random.Random(2)
+
+        for _ in range(200):
+            tablero = Tablero(generador.randint(1, 12), generador.randint(1, 12))
+            celdas = tablero.get_filas() * tablero.get_columnas()
+
+            for k in generador.sample(range(celdas), generador.randint(0, celdas // 3)):
+                tablero.poner_mina(k)
+
+            zona_segura = generador.sample(range(celdas), generador.randint(0, celdas // 3))
+            libres = [k for k in range(celdas) if not tablero.hay_mina(k) and k not in zona_segura]
+            minas = generador.randint(0, len(libres))
+
+            # Con la misma semilla, la posición i elegida entre las libres debe ser la i-ésima celda libre
+            semilla = generador.getrandbits(32)
+            esperadas = [libres[posicion] for posicion in random.Random(semilla).sample(xrange(len(libres)), minas)]
+            antes = tablero.get_minas()
+
+            self.assertEqual(colocar_minas(tablero, minas, random.Random(semilla), zona_segura), esperadas)
+            self.assertEqual(tablero.get_minas(), antes + minas)
+            self.assertRaises(ValueError, colocar_minas, tablero, len(libres) - minas + 1, generador, zona_segura)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# coding=utf-8
+
+"""
+Tabla de celdas vecinas de la rejilla hexagonal del Buscaminas.
+
+Las celdas del tablero se numeran con un índice plano (fila * columnas + columna). Las filas desplazadas a la derecha
+al imprimir el tablero (las de la misma paridad que 'paridad') tienen como vecinas superiores e inferiores las celdas
+de su misma columna y de la columna siguiente, mientras que el resto de filas las tienen en su misma columna y en la
+anterior.
+
+La tabla se guarda en formato CSR: las vecinas de la celda k son vecinas[inicios[k]:inicios[k + 1]]. Se construye
+una única vez para cada geometría (filas, columnas, paridad) y la comparten todos los tableros de ese tamaño.
+
+Autor: Richard Albán Fernández
+"""
+
+from array import array
+
+# Desplazamientos (fila, columna) de las celdas vecinas según la fila esté desplazada a la derecha o no
+DESPLAZAMIENTOS_FILA_DESPLAZADA = ((-1, 0), (-1, 1), (0, -1), (0, 1), (1, 0), (1, 1))
+DESPLAZAMIENTOS_FILA_NO_DESPLAZADA = ((-1, -1), (-1, 0), (0, -1), (0, 1), (1, -1), (1, 0))
+
+# Tablas ya construidas, indexadas por (filas, columnas, paridad)
+_TABLAS = {}
+
+
+def obtener_tabla_vecinas(filas, columnas, paridad=0):
+    """
+    Devuelve la tabla de celdas vecinas para un tablero de las dimensiones indicadas, construyéndola sólo la primera
+    vez que se pide.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param paridad: paridad (0 o 1) de las filas que se dibujan desplazadas a la derecha
+    :return: tupla (inicios, vecinas) con los dos arrays de la tabla en formato CSR
+    """
+    clave = (filas, columnas, paridad)
+    tabla = _TABLAS.get(clave)
+
+    if tabla is None:
+        tabla = construir_tabla_vecinas(filas, columnas, paridad)
+        _TABLAS[clave] = tabla
+
+    return tabla
+
+
+def construir_tabla_vecinas(filas, columnas, paridad=0):
+    """
+    Construye la tabla de celdas vecinas para un tablero de las dimensiones indicadas. Las vecinas de una fila sólo
+    dependen de su paridad y de si es la primera o la última fila, por lo que se calculan como desplazamientos
+    respecto al inicio de la fila una vez por cada caso y se trasladan a cada fila.
+
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param paridad: paridad (0 o 1) de las filas que se dibujan desplazadas a la derecha
+    :return: tupla (inicios, vecinas) con los dos arrays de la tabla en formato CSR
+    """
+    inicios = array('i', [0])
+    vecinas = array('i')
+    plantillas = {}
+
+    for i in range(filas):
+        caso = (i % 2 == paridad, i == 0, i == filas - 1)
+        plantilla = plantillas.get(caso)
+
+        if plantilla is None:
+            plantilla = plantillas[caso] = _construir_plantilla(i, filas, columnas, paridad)
+
+        desplazamientos, cantidades = plantilla
+        base = i * columnas
+        inicio = len(vecinas)
+
+        vecinas.extend(array('i', [base + desplazamiento for desplazamiento in desplazamientos]))
+        inicios.extend(array('i', [inicio + cantidad for cantidad in cantidades]))
+
+    return inicios, vecinas
+
+
+def _construir_plantilla(i, filas, columnas, paridad):
+    """
+    Calcula las vecinas de las celdas de una fila como desplazamientos respecto a la primera celda de la fila.
+
+    :param i: fila de la que se calculan las vecinas
+    :param filas: número de filas del tablero
+    :param columnas: número de columnas del tablero
+    :param paridad: paridad (0 o 1) de las filas que se dibujan desplazadas a la derecha
+    :return: tupla con la lista de desplazamientos de las vecinas de toda la fila y la lista con el número acumulado
+    de vecinas al final de cada celda de la fila
+    """
+    if i % 2 == paridad:
+        desplazamientos_vecinas = DESPLAZAMIENTOS_FILA_DESPLAZADA
+    else:
+        desplazamientos_vecinas = DESPLAZAMIENTOS_FILA_NO_DESPLAZADA
+
+    desplazamientos = []
+    cantidades = []
+
+    for j in range(columnas):
+        for di, dj in desplazamientos_vecinas:
+            if 0 <= i + di < filas and 0 <= j + dj < columnas:
+                desplazamientos.append(di * columnas + j + dj)
+
+        cantidades.append(len(desplazamientos))
+
+    return desplazamientos, cantidades